@@ -1,16 +1,30 @@
 import sys
 import os
+
+# --profile-startup prints an import-time breakdown; it must be installed before anything heavy is imported
+if __name__ == "__main__" and '--profile-startup' in sys.argv:
+    import time as _profile_time
+    _profile_started = _profile_time.perf_counter()
+    from organiser_core import startup_profiler
+    startup_profiler.start(_profile_started, 'organiser_core')
+
+# Headless organise run: dispatch before PyQt5 and the rest of the GUI are imported
+if __name__ == "__main__" and '--cli' in sys.argv:
+    from desktop_mover import cli_main
+    sys.exit(cli_main([arg for arg in sys.argv[1:] if arg != '--profile-startup']))
+
+# Scheduled check: needs neither Qt nor the module system, so it never imports them
+if __name__ == "__main__" and '--background-run' in sys.argv:
+    from organiser_core import background_main
+    sys.exit(background_main())
+
 import importlib.util
 import shutil
 import yaml
 import platform
-import psutil
-import re
 import copy
 import json
-import zipfile
 import tempfile
-import hashlib
 from datetime import datetime, timedelta, time
 from typing import Optional
 from PyQt5.QtWidgets import (
@@ -44,32 +58,16 @@ import subprocess
 import json
 from pathlib import Path
 
-# --- Helper Functions for subprocess without console popup on Windows ---
-def run_subprocess_silent(command: list, **kwargs) -> subprocess.CompletedProcess:
-    """Run subprocess without showing console window on Windows"""
-    if platform.system() == "Windows":
-        import ctypes
-        from subprocess import STARTUPINFO, STARTF_USESHOWWINDOW, SW_HIDE
-
-        startupinfo = STARTUPINFO()
-        startupinfo.dwFlags |= STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = SW_HIDE
-        kwargs['startupinfo'] = startupinfo
-
-    return subprocess.run(command, **kwargs)
-
-def popen_subprocess_silent(command: list, **kwargs):
-    """Popen subprocess without showing console window on Windows"""
-    if platform.system() == "Windows":
-        import ctypes
-        from subprocess import STARTUPINFO, STARTF_USESHOWWINDOW, SW_HIDE
-
-        startupinfo = STARTUPINFO()
-        startupinfo.dwFlags |= STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = SW_HIDE
-        kwargs['startupinfo'] = startupinfo
-
-    return subprocess.Popen(command, **kwargs)
+from organiser_core import (
+    CONFIG_DIR, CONFIG_FILE, LAST_RUN_FILE, DEFAULT_SETTINGS, startup_profiler,
+    run_subprocess_silent, popen_subprocess_silent, load_settings, save_settings,
+    find_next_available_drive, get_incomplete_run_journals, is_scheduled_day, was_scheduled_day
+)
+from desktop_mover import (
+    ARCHIVE_FOLDER_NAME, engine_from_settings, snapshot_destination, FilterRules, PlanAction, plan_directory, format_progress,
+    execute_plan, load_journal, resume_with_manifest, rollback_journal,
+    write_manifest, manifest_path_for, DesktopWatcher
+)
 
 # --- Administrator Privilege Functions ---
 def is_running_as_admin() -> bool:
@@ -143,13 +141,6 @@ def run_with_admin_privileges(command: list, **kwargs) -> subprocess.CompletedPr
         # Fallback to normal execution
         return subprocess.run(command, **kwargs)
 
-# --- Configuration File Path ---
-CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".DesktopOrganizer")
-CONFIG_FILE = os.path.join(CONFIG_DIR, "config.yaml")
-LAST_RUN_FILE = os.path.join(CONFIG_DIR, "last_run.txt")
-os.makedirs(CONFIG_DIR, exist_ok=True)
-
-
 class PackageMessageFormatter:
     """Dynamic package-related message formatter to avoid hardcoded strings"""
 
@@ -364,39 +355,6 @@ def setup_venv_python_path():
         print(f"❌ Failed to setup virtual environment path: {e}")
         pass
 
-# Setup Python path early
-setup_venv_python_path()
-
-# --- Default Settings ---
-DEFAULT_SETTINGS = {
-    'application': {
-        'autostart_timer_enabled': True,
-        'notifications_enabled': True,
-        'minimize_to_tray': False,
-    },
-    'timer': {
-        'override_default_enabled': False,
-        'default_minutes': 3,
-    },
-    'drives': {
-        'main_drive_policy': 'D',
-    },
-    'file_manager': {
-        'max_file_size_mb': 100,
-        'allowed_extensions': ['.lnk'],
-        'allowed_filenames': []
-    },
-    'schedule': {
-        'type': 'disabled',  # 'вимкнено', 'щодня', 'щотижня', 'щомісяця', 'щокварталу'
-        'time_start': '15:00',
-        'time_end': '17:00',
-        'day_of_week': 1,  # 1=Понеділок, 7=Неділя
-        'day_of_month': 1,
-        'quarter_month': 1, # 1, 2, 3
-        'quarter_day': 1
-    }
-}
-
 SCHEDULE_TYPE_MAP = {
     "disabled": "Вимкнено",
     "daily": "Щодня",
@@ -1520,6 +1478,7 @@ class NGITPackageInstaller:
             return False
 
         # Check if it's a valid zip file
+        import zipfile
         try:
             with zipfile.ZipFile(package_path, 'r') as zipf:
                 # Check for required files
@@ -1550,6 +1509,7 @@ class NGITPackageInstaller:
 
     def _extract_package(self, package_path: str, extract_to: str) -> bool:
         """Extract package to directory"""
+        import zipfile
         try:
             with zipfile.ZipFile(package_path, 'r') as zipf:
                 zipf.extractall(extract_to)
@@ -1573,6 +1533,7 @@ class NGITPackageInstaller:
                     return False
 
                 with open(full_path, 'rb') as f:
+                    import hashlib
                     actual_hash = hashlib.sha256(f.read()).hexdigest()
 
                 if actual_hash != expected_hash:
@@ -1606,6 +1567,7 @@ class NGITPackageInstaller:
 
     def get_package_info(self, package_path: str) -> dict:
         """Get package information without installing"""
+        import zipfile
         try:
             with zipfile.ZipFile(package_path, 'r') as zipf:
                 # Read manifest
@@ -3261,73 +3223,16 @@ class SettingsDialog(QDialog):
                 if not os.path.exists(desktop_path):
                     desktop_path = os.path.expanduser("~/Робочий стіл")
 
-                file_count = 0
-                would_move_count = 0
-                affected_files = []
-                file_details = {}
-
                 # Get file manager settings
                 fm_settings = settings.get('file_manager', {})
-                allowed_extensions = {ext.lower() for ext in fm_settings.get('allowed_extensions', [])}
-                allowed_filenames = {name for name in fm_settings.get('allowed_filenames', [])}
-                max_size_bytes = fm_settings.get('max_file_size_mb', 100) * 1024 * 1024
-
-                
-                if os.path.exists(desktop_path):
-                    for item in os.listdir(desktop_path):
-                        if item.startswith('.'):
-                            continue
-
-                        item_path = os.path.join(desktop_path, item)
-                        if not os.path.exists(item_path):
-                            continue
-
-                        file_count += 1
-
-                        # Check if it's a file or directory
-                        is_file = os.path.isfile(item_path)
-                        file_size = 0
-                        file_ext = ""
-
-                        if is_file:
-                            try:
-                                file_size = os.path.getsize(item_path)
-                                file_ext = os.path.splitext(item)[1].lower()
-                            except:
-                                pass
-
-                        # Determine if file would be moved based on filters (same logic as actual organization)
-                        would_move = True  # Default to moving, then check filters
-                        reason = "Would be moved"
-
-                        # Get filename without extension for checking
-                        item_name_no_ext, _ = os.path.splitext(item)
-
-                        # INVERSE LOGIC: If allowed_extensions is not empty, KEEP files with those extensions, move others
-                        if allowed_extensions and file_ext in allowed_extensions:
-                            would_move = False
-                            reason = f"Extension whitelisted (kept): {file_ext}"
+                rules = FilterRules.from_settings(fm_settings)
+                allowed_extensions = rules.allowed_extensions
+                allowed_filenames = rules.allowed_filenames
 
-                        # INVERSE LOGIC: If allowed_filenames is not empty, KEEP files with those names, move others
-                        elif allowed_filenames and item_name_no_ext in allowed_filenames:
-                            would_move = False
-                            reason = f"Filename whitelisted (kept): {item_name_no_ext}"
-
-                        # Check file size limit
-                        elif is_file and file_size > max_size_bytes:
-                            would_move = False
-                            size_mb = file_size / (1024 * 1024)
-                            reason = f"File too large: {size_mb:.1f}MB > {fm_settings.get('max_file_size_mb', 100)}MB"
-
-                        if would_move:
-                            would_move_count += 1
-                            affected_files.append(f"📄 {item}")
-                            file_details[item] = {
-                                'size': file_size,
-                                'ext': file_ext,
-                                'reason': reason,
-                                'type': 'file' if is_file else 'directory'
-                            }
+                # Same classifier as the real run (FileMover), so the dry run cannot diverge
+                plan = plan_directory(desktop_path, rules) if os.path.exists(desktop_path) else None
+                plan_entries = plan.entries if plan else []
+                file_count = len(plan_entries)
 
                 progress.setValue(70)
                 QApplication.processEvents()
@@ -3346,124 +3251,54 @@ class SettingsDialog(QDialog):
                     'Shortcuts': 'Ярлики'
                 }
 
+                # Categorize based on common file types
+                category_exts = {
+                    'Documents': ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.xls', '.xlsx', '.ppt', '.pptx'],
+                    'Images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp'],
+                    'Videos': ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v'],
+                    'Archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2'],
+                    'Programs': ['.exe', '.msi', '.deb', '.rpm', '.dmg', '.pkg'],
+                    'Shortcuts': ['.lnk', '.url', '.webloc'],
+                }
+
                 simulated_moves = 0
                 simulated_copies = []
                 debug_info = []
 
-                if os.path.exists(desktop_path):
-                    # Debug: Get all files on desktop
-                    all_desktop_items = [f for f in os.listdir(desktop_path)
-                                       if not f.startswith('.') and
-                                       os.path.exists(os.path.join(desktop_path, f))]
-
-                    debug_info.append(f"DEBUG: Found {len(all_desktop_items)} items on desktop")
+                if plan is not None:
+                    debug_info.append(f"DEBUG: Found {file_count} items on desktop")
                     debug_info.append(f"DEBUG: Extension filters: {list(allowed_extensions)}")
                     debug_info.append(f"DEBUG: Name filters: {list(allowed_filenames)}")
                     debug_info.append(f"DEBUG: Size limit: {fm_settings.get('max_file_size_mb', 100)}MB")
 
-                    processed_files = 0
-                    total_files = len(all_desktop_items)
-
-                    for item in os.listdir(desktop_path):
+                    for processed_files, entry in enumerate(plan_entries, 1):
                         if progress.wasCanceled():
                             QMessageBox.information(self, "Скасовано", "Симуляцію організації скасовано.")
                             progress.close()
                             return
 
-                        if item.startswith('.'):
-                            continue
-
-                        item_path = os.path.join(desktop_path, item)
-                        if not os.path.exists(item_path):
-                            continue
-
-                        processed_files += 1
-
-                        # Determine if file would be moved and where
-                        would_move = False
-                        target_dir = "Other"
-                        reason = ""
-
-                        is_file = os.path.isfile(item_path)
-                        file_ext = os.path.splitext(item)[1].lower()
-
-                        # Apply filter logic (same as actual organization)
-                        would_move = True  # Default to moving, then check filters
-                        reason = "Would be moved"
-
-                        # Get filename without extension for checking
-                        item_name_no_ext, _ = os.path.splitext(item)
-
-                        # INVERSE LOGIC: If allowed_extensions is not empty, KEEP files with those extensions, move others
-                        if allowed_extensions and file_ext in allowed_extensions:
-                            would_move = False
-                            reason = f"Extension whitelisted (kept): {file_ext}"
-
-                        # INVERSE LOGIC: If allowed_filenames is not empty, KEEP files with those names, move others
-                        elif allowed_filenames and item_name_no_ext in allowed_filenames:
-                            would_move = False
-                            reason = f"Filename whitelisted (kept): {item_name_no_ext}"
-
-                        # Check file size limit
-                        elif is_file:
-                            try:
-                                file_size = os.path.getsize(item_path)
-                                if file_size > max_size_bytes:
-                                    would_move = False
-                                    size_mb = file_size / (1024 * 1024)
-                                    reason = f"File too large: {size_mb:.1f}MB > {fm_settings.get('max_file_size_mb', 100)}MB"
-                            except:
-                                pass
-
-                        # Debug info for this file
-                        debug_info.append(f"DEBUG: File '{item}' - ext: '{file_ext}', would_move: {would_move}, reason: '{reason}'")
+                        would_move = entry.action == PlanAction.MOVE
+                        debug_info.append(f"DEBUG: File '{entry.name}' - ext: '{entry.ext}', action: {entry.action}, reason: '{entry.reason}'")
 
                         # Determine target directory based on file type
                         if would_move:
-                            # Categorize based on common file types
-                            document_exts = ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.xls', '.xlsx', '.ppt', '.pptx']
-                            image_exts = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp']
-                            video_exts = ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v']
-                            archive_exts = ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2']
-                            program_exts = ['.exe', '.msi', '.deb', '.rpm', '.dmg', '.pkg']
-                            shortcut_exts = ['.lnk', '.url', '.webloc']
-
-                            if file_ext in document_exts:
-                                target_dir = 'Documents'
-                            elif file_ext in image_exts:
-                                target_dir = 'Images'
-                            elif file_ext in video_exts:
-                                target_dir = 'Videos'
-                            elif file_ext in archive_exts:
-                                target_dir = 'Archives'
-                            elif file_ext in program_exts:
-                                target_dir = 'Programs'
-                            elif file_ext in shortcut_exts:
-                                target_dir = 'Shortcuts'
-                            else:
-                                target_dir = 'Other'
+                            target_dir = next((category for category, exts in category_exts.items()
+                                               if entry.ext in exts), 'Other')
+                            target_dir_name = simulated_dirs.get(target_dir, target_dir)
 
-                            # Add Shortcuts to simulated structure if needed
-                            if target_dir == 'Shortcuts':
-                                target_dir_name = simulated_dirs.get('Shortcuts', 'Ярлики')
+                            simulated_moves += 1
+                            if entry.is_dir:
+                                # Simulate directory move (no actual directory creation)
+                                simulated_copies.append(f"📁 {entry.name} → {target_dir_name}/")
+                                debug_info.append(f"SIMULATION: Would move directory '{entry.name}' to '{target_dir_name}/' - {entry.reason}")
                             else:
-                                target_dir_name = simulated_dirs.get(target_dir, target_dir)
-
-                            if is_file:
                                 # Simulate file move (no actual file creation)
-                                file_size = os.path.getsize(item_path) if os.path.exists(item_path) else 0
-                                simulated_moves += 1
-                                simulated_copies.append(f"📄 {item} → {target_dir_name}/")
-                                debug_info.append(f"SIMULATION: Would move file '{item}' ({file_size} bytes) to '{target_dir_name}/' - {reason}")
-                            else:
-                                # Simulate directory move (no actual directory creation)
-                                simulated_moves += 1
-                                simulated_copies.append(f"📁 {item} → {target_dir_name}/")
-                                debug_info.append(f"SIMULATION: Would move directory '{item}' to '{target_dir_name}/' - {reason}")
+                                simulated_copies.append(f"📄 {entry.name} → {target_dir_name}/")
+                                debug_info.append(f"SIMULATION: Would move file '{entry.name}' ({entry.size} bytes) to '{target_dir_name}/' - {entry.reason}")
 
                         # Update progress
-                        progress_value = 70 + int(30 * processed_files / max(total_files, 1))
-                        progress.setLabelText(f"Обробка {processed_files}/{total_files} елементів (симульовано переміщень: {simulated_moves})...")
+                        progress_value = 70 + int(30 * processed_files / max(file_count, 1))
+                        progress.setLabelText(f"Обробка {processed_files}/{file_count} елементів (симульовано переміщень: {simulated_moves})...")
                         progress.setValue(progress_value)
                         QApplication.processEvents()
 
@@ -6430,22 +6265,29 @@ class FileMover(QThread):
     update_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(int, int, str)
 
-    def __init__(self, target_drive, fallback_drive, settings):
+    def __init__(self, target_drive, fallback_drive, settings, recovery_journal=None, rollback=False, plan=None):
         super().__init__()
         self.target_drive = target_drive
         self.fallback_drive = fallback_drive
         self.settings = settings
-        self.base_folder_name = "Робочі столи"
+        # Pre-built plan from DesktopWatcher; planned here when not given
+        self.plan = plan
+        self.base_folder_name = ARCHIVE_FOLDER_NAME
+        self.engine = None
+        # When set, the thread finishes (or rolls back) an interrupted run instead of starting a new one
+        self.recovery_journal = recovery_journal
+        self.rollback = rollback
 
     def run(self):
+        if self.recovery_journal:
+            self._run_recovery()
+            return
         try:
             desktop = os.path.join(os.path.expanduser("~"), "Desktop")
             now = datetime.now()
 
             fm_settings = self.settings.get('file_manager', DEFAULT_SETTINGS['file_manager'])
-            allowed_extensions = {ext.lower() for ext in fm_settings.get('allowed_extensions', [])}
-            allowed_filenames = {name for name in fm_settings.get('allowed_filenames', [])}
-            max_size_bytes = fm_settings.get('max_file_size_mb', 100) * 1024 * 1024
+            rules = FilterRules.from_settings(fm_settings)
 
             target_base_path = os.path.join(f"{self.target_drive}:\\", self.base_folder_name)
             fallback_base_path = os.path.join(f"{self.fallback_drive}:\\", self.base_folder_name)
@@ -6461,9 +6303,7 @@ class FileMover(QThread):
                 self.finished_signal.emit(0, 0, "Помилка: Немає доступних дисків")
                 return
 
-            year = now.strftime("%Y")
-            timestamp = now.strftime("%d-%m-%Y %H-%M")
-            dest_path = os.path.join(effective_base_path, f"Робочий стіл {year}", f"Робочий стіл {timestamp}")
+            dest_path = snapshot_destination(effective_base_path, now)
 
             os.makedirs(dest_path, exist_ok=True)
             self.update_signal.emit(f"📁 Цільова папка: {dest_path}")
@@ -6474,43 +6314,24 @@ class FileMover(QThread):
                 self.finished_signal.emit(0, 0, dest_path)
                 return
 
-            items_to_move = os.listdir(desktop)
-            if not items_to_move:
+            # Plan the whole batch with a single scandir pass, then hand it to the engine
+            if self.plan is not None:
+                plan = self.plan
+                self.update_signal.emit(f"⚡ Використано план спостерігача робочого столу ({len(plan.entries)} елементів)")
+            else:
+                plan = plan_directory(desktop, rules)
+            if not plan.entries:
                  self.update_signal.emit("ℹ️ Робочий стіл порожній. Немає чого переміщувати.")
 
-            for item in items_to_move:
-                src = os.path.join(desktop, item)
-                item_name_no_ext, item_ext = os.path.splitext(item)
-                item_ext_lower = item_ext.lower()
-
-                # INVERSE LOGIC: If allowed_extensions is not empty, KEEP files with those extensions, move others
-                if allowed_extensions and item_ext_lower in allowed_extensions:
-                    self.update_signal.emit(f"⏭️ Збережено за розширенням (у whitelist): {item}")
-                    continue
-
-                # INVERSE LOGIC: If allowed_filenames is not empty, KEEP files with those names, move others
-                if allowed_filenames and item_name_no_ext in allowed_filenames:
-                    self.update_signal.emit(f"⏭️ Збережено за ім'ям файлу (у whitelist): {item}")
-                    continue
-
-                if os.path.isfile(src):
-                    try:
-                        file_size = os.path.getsize(src)
-                        if file_size > max_size_bytes:
-                            self.update_signal.emit(f"⏭️ Пропущено за розміром ({file_size / (1024*1024):.1f}MB): {item}")
-                            continue
-                    except OSError as e:
-                         self.update_signal.emit(f"⚠️ Не вдалося отримати розмір {item}: {e}")
-                         continue
+            skipped_lines = [f"⏭️ {e.reason}: {e.name}"
+                             for e in plan.entries if e.action != PlanAction.MOVE]
+            if skipped_lines:
+                self.update_signal.emit("\n".join(skipped_lines))
 
-                try:
-                    final_dest = os.path.join(dest_path, item)
-                    shutil.move(src, final_dest)
-                    success += 1
-                    self.update_signal.emit(f"✅ Переміщено: {item}")
-                except Exception as e:
-                    errors += 1
-                    self.update_signal.emit(f"❌ Помилка переміщення '{item}': {str(e)}")
+            self.engine = self._create_engine()
+            result = execute_plan(plan, dest_path, self.engine)
+            self._write_manifest(desktop, dest_path, result.succeeded)
+            success, errors = result.moved, result.errors
 
             self.finished_signal.emit(success, errors, dest_path)
 
@@ -6518,6 +6339,51 @@ class FileMover(QThread):
             self.update_signal.emit(f"❌ Критична помилка потоку: {str(e)}")
             self.finished_signal.emit(0, 0, "Помилка в потоці")
 
+    def _create_engine(self):
+        return engine_from_settings(self.settings, self._on_engine_progress)
+
+    def _run_recovery(self):
+        """Resume or roll back the run recorded in self.recovery_journal"""
+        try:
+            state = load_journal(self.recovery_journal)
+            self.engine = self._create_engine()
+            if self.rollback:
+                self.update_signal.emit(f"↩️ Відкат незавершеного запуску: {state.dest} ({len(state.completed)} елементів)")
+                result = rollback_journal(state, self.engine)
+                if result.errors == 0 and os.path.exists(manifest_path_for(state.dest)):
+                    os.remove(manifest_path_for(state.dest))
+                self.finished_signal.emit(result.moved, result.errors, state.source)
+            else:
+                self.update_signal.emit(f"♻️ Відновлення незавершеного запуску: {state.dest} ({len(state.remaining)} елементів залишилось)")
+                with_hash = self.settings.get('mover', DEFAULT_SETTINGS['mover']).get('manifest_hash', False)
+                result = resume_with_manifest(
+                    state, self.engine, with_hash=with_hash,
+                    on_manifest_error=lambda e: self.update_signal.emit(f"⚠️ Не вдалося записати маніфест відновлення: {e}"))
+                self.finished_signal.emit(result.moved, result.errors, state.dest)
+        except Exception as e:
+            self.update_signal.emit(f"❌ Помилка відновлення з журналу {self.recovery_journal}: {str(e)}")
+            self.finished_signal.emit(0, 0, "Помилка в потоці")
+
+    def _write_manifest(self, source_dir, dest_dir, tasks):
+        """Write the restore manifest for the items archived by this run"""
+        if not tasks:
+            return
+        try:
+            with_hash = self.settings.get('mover', DEFAULT_SETTINGS['mover']).get('manifest_hash', False)
+            write_manifest(source_dir, dest_dir, tasks, with_hash=with_hash)
+        except Exception as e:
+            self.update_signal.emit(f"⚠️ Не вдалося записати маніфест відновлення: {e}")
+
+    def _on_engine_progress(self, progress):
+        """Forward one aggregated progress report as a single log entry"""
+        lines = list(progress.messages)
+        lines.append(format_progress(progress))
+        self.update_signal.emit("\n".join(lines))
+
+    def stop(self):
+        if self.engine:
+            self.engine.cancel()
+
     def check_drive_exists(self, drive_letter):
         drive = f"{drive_letter}:\\"
         return os.path.exists(drive)
@@ -7471,289 +7337,6 @@ class VirtualEnvironmentDialog(QDialog):
 # --- Main Window ---
 # --- End of content ---
 
-def _merge_dicts(base, updates):
-    for key, value in updates.items():
-        if isinstance(value, dict) and key in base and isinstance(base[key], dict):
-            _merge_dicts(base[key], value)
-        else:
-            base[key] = value
-    return base
-
-def load_settings():
-    try:
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            loaded_settings = yaml.safe_load(f)
-            if loaded_settings:
-                merged = _merge_dicts(DEFAULT_SETTINGS.copy(), loaded_settings)
-                return merged
-            else:
-                return DEFAULT_SETTINGS.copy()
-    except FileNotFoundError:
-        print(f"Файл конфігурації не знайдено за шляхом {CONFIG_FILE}. Використовуються стандартні налаштування.")
-        return DEFAULT_SETTINGS.copy()
-    except yaml.YAMLError as e:
-        print(f"Помилка розбору файлу конфігурації {CONFIG_FILE}: {e}. Використовуються стандартні налаштування.")
-        return DEFAULT_SETTINGS.copy()
-    except Exception as e:
-        print(f"Неочікувана помилка завантаження конфігурації {CONFIG_FILE}: {e}. Використовуються стандартні налаштування.")
-        return DEFAULT_SETTINGS.copy()
-
-def save_settings(settings):
-    """Save settings to the configuration file"""
-    try:
-        # Ensure the config directory exists
-        os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            yaml.dump(settings, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
-
-        print(f"✅ Settings saved to {CONFIG_FILE}")
-
-    except Exception as e:
-        print(f"❌ Error saving settings to {CONFIG_FILE}: {e}")
-
-def find_next_available_drive():
-    """Find the available drive with the most free space"""
-    try:
-        import shutil
-
-        available_drives = []
-        drive_spaces = {}
-
-        partitions = psutil.disk_partitions(all=False)
-        for p in partitions:
-            if platform.system() == "Windows" and re.match("^[A-Z]:\\?$", p.mountpoint) and p.mountpoint[0] != 'C':
-                if p.fstype and 'cdrom' not in p.opts.lower():
-                     if 'removable' not in p.opts.lower():
-                         if os.path.exists(p.mountpoint):
-                              drive_letter = p.mountpoint[0]
-                              available_drives.append(drive_letter)
-
-                              # Get free space for this drive
-                              try:
-                                  usage = shutil.disk_usage(f"{drive_letter}:\\")
-                                  free_gb = usage.free // (1024**3)
-                                  drive_spaces[drive_letter] = free_gb
-                              except:
-                                  drive_spaces[drive_letter] = 0
-
-        if available_drives:
-            # Sort drives by free space (descending) and return the one with most space
-            sorted_drives = sorted(available_drives, key=lambda x: drive_spaces.get(x, 0), reverse=True)
-            best_drive = sorted_drives[0]
-            free_space = drive_spaces.get(best_drive, 0)
-            print(f"✅ Автовибір: {best_drive}: - Вільно: {free_space}GB (найбільше)")
-            return best_drive
-
-        return None
-    except Exception as e:
-        print(f"⚠️ Помилка визначення дисків: {e}. Використовується резервний варіант.")
-        return None
-
-def is_scheduled_day(schedule_cfg):
-    now = datetime.now()
-    schedule_type = schedule_cfg.get('type', 'disabled')
-
-    if schedule_type == 'daily':
-        return True
-    elif schedule_type == 'weekly':
-        return now.isoweekday() == schedule_cfg.get('day_of_week', 1)
-    elif schedule_type == 'monthly':
-        target_day = schedule_cfg.get('day_of_month', 1)
-        # Get last day of current month
-        import calendar
-        last_day_of_month = calendar.monthrange(now.year, now.month)[1]
-        # If target day exceeds last day, run on last day of month
-        effective_day = min(target_day, last_day_of_month)
-        return now.day == effective_day
-    elif schedule_type == 'quarterly':
-        quarter_month = schedule_cfg.get('quarter_month', 1)  # 1=Jan,Apr,Jul,Oct / 2=Feb,May,Aug,Nov / 3=Mar,Jun,Sep,Dec
-        quarter_day = schedule_cfg.get('quarter_day', 1)
-
-        # Calculate which months match: quarter_month (1-3) in each quarter
-        # Q1: months 1,2,3  Q2: months 4,5,6  Q3: months 7,8,9  Q4: months 10,11,12
-        target_months = [quarter_month, quarter_month + 3, quarter_month + 6, quarter_month + 9]
-
-        if now.month not in target_months:
-            return False
-
-        # Get last day of current month
-        import calendar
-        last_day_of_month = calendar.monthrange(now.year, now.month)[1]
-        # If target day exceeds last day, run on last day of month
-        effective_day = min(quarter_day, last_day_of_month)
-        return now.day == effective_day
-    return False
-
-
-def was_scheduled_day(schedule_cfg, check_date):
-    """Check if a specific date was a scheduled day"""
-    schedule_type = schedule_cfg.get('type', 'disabled')
-
-    if schedule_type == 'daily':
-        return True
-    elif schedule_type == 'weekly':
-        # check_date is a date object, convert to check weekday
-        return check_date.isoweekday() == schedule_cfg.get('day_of_week', 1)
-    elif schedule_type == 'monthly':
-        target_day = schedule_cfg.get('day_of_month', 1)
-        import calendar
-        last_day_of_month = calendar.monthrange(check_date.year, check_date.month)[1]
-        effective_day = min(target_day, last_day_of_month)
-        return check_date.day == effective_day
-    elif schedule_type == 'quarterly':
-        quarter_month = schedule_cfg.get('quarter_month', 1)
-        quarter_day = schedule_cfg.get('quarter_day', 1)
-        target_months = [quarter_month, quarter_month + 3, quarter_month + 6, quarter_month + 9]
-
-        if check_date.month not in target_months:
-            return False
-
-        import calendar
-        last_day_of_month = calendar.monthrange(check_date.year, check_date.month)[1]
-        effective_day = min(quarter_day, last_day_of_month)
-        return check_date.day == effective_day
-    return False
-
-
-# --- Background Task Runner ---
-class BackgroundTaskRunner:
-    def __init__(self):
-        self.settings = load_settings()
-        self.mover_thread = None
-        self.selected_drive = 'C'
-        self.auto_configure_drive()
-
-    def log_message(self, message):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] {message}")
-
-    def load_last_run_date(self):
-        try:
-            with open(LAST_RUN_FILE, 'r') as f:
-                date_str = f.read().strip()
-                return datetime.strptime(date_str, '%Y-%m-%d').date()
-        except (FileNotFoundError, ValueError):
-            return None
-
-    def save_last_run_date(self, date):
-        try:
-            with open(LAST_RUN_FILE, 'w') as f:
-                f.write(date.strftime('%Y-%m-%d'))
-        except Exception as e:
-            self.log_message(f"❌ Помилка збереження дати останнього запуску: {e}")
-
-    def auto_configure_drive(self):
-        policy = self.settings.get('drives', {}).get('main_drive_policy', 'D')
-        initial_drive = None
-        d_exists = os.path.exists("D:\\")
-        e_exists = os.path.exists("E:\\")
-
-        if policy == 'D' and d_exists:
-            initial_drive = 'D'
-        elif policy == 'auto':
-            detected_drive = find_next_available_drive()
-            if detected_drive:
-                initial_drive = detected_drive
-            elif d_exists:
-                self.log_message("ℹ️ Автовизначення не вдалося, використовується диск D:")
-                initial_drive = 'D'
-        elif policy == 'D' and not d_exists and e_exists:
-            self.log_message("ℹ️ Встановлено політику 'D', але диск D: не знайдено. Використовується диск E:")
-            initial_drive = 'E'
-        elif e_exists and not initial_drive:
-            self.log_message(f"ℹ️ Політика '{policy}' не спрацювала, використовується диск E:")
-            initial_drive = 'E'
-
-        if initial_drive:
-            self.selected_drive = initial_drive
-        else:
-            self.selected_drive = 'C'
-            if policy != 'C':
-                self.log_message("⚠️ Не знайдено відповідного диска. Використовується диск C:")
-        self.log_message(f"⚙️ Основний диск встановлено на: {self.selected_drive}:")
-
-    def check_and_run(self):
-        schedule_cfg = self.settings.get('schedule', DEFAULT_SETTINGS['schedule'])
-        schedule_type = schedule_cfg.get('type', 'disabled')
-
-        if schedule_type == 'disabled':
-            self.log_message("ℹ️ Розклад вимкнено. Вихід.")
-            return False
-
-        now = datetime.now()
-        today = now.date()
-        last_run_date = self.load_last_run_date()
-
-        if not is_scheduled_day(schedule_cfg):
-            self.log_message("ℹ️ Не запланований день. Вихід.")
-            return False
-
-        if last_run_date == today:
-            self.log_message("ℹ️ Заплановане завдання вже виконано сьогодні. Вихід.")
-            return False
-
-        start_time = QTime.fromString(schedule_cfg.get('time_start', '22:00'), "HH:mm")
-        end_time = QTime.fromString(schedule_cfg.get('time_end', '23:00'), "HH:mm")
-        current_time = QTime.currentTime()
-
-        run_now = False
-        if start_time <= current_time <= end_time:
-            cpu_usage = psutil.cpu_percent(interval=1)
-            self.log_message(f"ℹ️ У вікні розкладу. ЦП: {cpu_usage}%.")
-            if cpu_usage < 15.0:
-                self.log_message("⏰ Низьке завантаження ЦП. Запуск запланованого завдання.")
-                run_now = True
-        elif current_time > end_time:
-            self.log_message("⚠️ Вікно розкладу пропущено. Запуск завдання зараз.")
-            run_now = True
-
-        if run_now:
-            self.launch_gui_app() # Call the new method to launch GUI
-            self.save_last_run_date(today)
-            return True
-        else:
-            self.log_message("ℹ️ Умови для запуску завдання зараз не виконані. Вихід.")
-            return False
-
-    def launch_gui_app(self):
-        self.log_message("🚀 Запуск графічного інтерфейсу для виконання запланованого завдання...")
-        try:
-            # Determine the path to the current script
-            script_path = os.path.abspath(sys.argv[0])
-            
-            # Use sys.executable to ensure the same Python interpreter is used
-            # Pass a special argument to indicate it's a scheduled run
-            popen_subprocess_silent([sys.executable, script_path, '--scheduled-run'])
-            
-            # Since we are launching a new process, the background runner can exit
-            QCoreApplication.instance().quit()
-        except Exception as e:
-            self.log_message(f"❌ Помилка запуску графічного інтерфейсу: {e}")
-
-    def start_process(self):
-        if self.mover_thread and self.mover_thread.isRunning():
-            self.log_message("⚠️ Процес вже запущено.")
-            return
-
-        self.log_message(f"\n🚀 Початок переміщення файлів на диск {self.selected_drive}:...")
-        self.mover_thread = FileMover(target_drive=self.selected_drive, fallback_drive='C', settings=self.settings.copy())
-        self.mover_thread.update_signal.connect(self.log_message)
-        self.mover_thread.finished_signal.connect(self.process_finished)
-        self.mover_thread.start()
-
-    def process_finished(self, success, errors, path):
-        self.log_message("\n🏁 Результат:")
-        self.log_message(f"✅ Успішно: {success}")
-        if errors > 0:
-            self.log_message(f"❌ Помилок: {errors}")
-        if not path.startswith("Error"):
-            self.log_message(f"📁 Збережено до: {path}")
-        else:
-            self.log_message(f"❌ {path}")
-        QCoreApplication.instance().quit()
-
-
 # --- Main Window ---
 class MainWindow(QMainWindow):
     def __init__(self, is_scheduled_run=False):
@@ -7814,6 +7397,14 @@ class MainWindow(QMainWindow):
         QTimer.singleShot(500, self.auto_configure_start)  # Existing delayed config
         self.schedule_timer.start(60000) # Check every minute
 
+        # Optional background watcher that keeps the move plan up to date
+        self.desktop_watcher = None
+        self.update_desktop_watcher()
+
+        # Offer to finish runs interrupted by a crash (after the drive is configured)
+        self._recovery_queue = []
+        QTimer.singleShot(1500, self.check_incomplete_runs)
+
         # Check for missed scheduled runs on startup
         QTimer.singleShot(2000, self.check_and_run_missed_schedule)  # Check after 2 seconds
 
@@ -9397,6 +8988,7 @@ class MainWindow(QMainWindow):
         self.save_settings()
         self.apply_settings_to_ui()
         self.log_message("⚙️ Налаштування застосовано.")
+        self.update_desktop_watcher()
 
         # Log schedule settings
         schedule_cfg = self.settings.get('schedule', DEFAULT_SETTINGS['schedule'])
@@ -9642,6 +9234,59 @@ class MainWindow(QMainWindow):
             self.last_scheduled_run_date = today
             self.save_last_run_date(today)
 
+    def check_incomplete_runs(self):
+        """Detect journals of interrupted runs and resume or roll them back"""
+        if self.mover_thread and self.mover_thread.isRunning():
+            return
+
+        journals = get_incomplete_run_journals([self.selected_drive, 'C'])
+        if not journals:
+            return
+
+        self.log_message(f"⚠️ Виявлено незавершені запуски організації: {len(journals)}")
+        rollback = False
+
+        # Without a visible window there is nobody to ask, so simply resume
+        if self.isVisible():
+            box = QMessageBox(self)
+            box.setIcon(QMessageBox.Warning)
+            box.setWindowTitle("Незавершений запуск")
+            box.setText(
+                f"Знайдено {len(journals)} незавершених запусків організації робочого столу.\n\n"
+                "Відновити — перемістити решту файлів у ту саму папку.\n"
+                "Відкотити — повернути вже переміщені файли на робочий стіл."
+            )
+            resume_btn = box.addButton("♻️ Відновити", QMessageBox.AcceptRole)
+            rollback_btn = box.addButton("↩️ Відкотити", QMessageBox.DestructiveRole)
+            box.addButton("Пізніше", QMessageBox.RejectRole)
+            box.exec_()
+
+            if box.clickedButton() == rollback_btn:
+                rollback = True
+            elif box.clickedButton() != resume_btn:
+                self.log_message("ℹ️ Відновлення відкладено до наступного запуску.")
+                return
+
+        self._recovery_queue = [(journal_path, rollback) for journal_path in journals]
+        self._start_next_recovery()
+
+    def _start_next_recovery(self):
+        if not self._recovery_queue:
+            return
+        journal_path, rollback = self._recovery_queue.pop(0)
+        self.mover_thread = FileMover(target_drive=self.selected_drive, fallback_drive='C',
+                                      settings=self.settings.copy(),
+                                      recovery_journal=journal_path, rollback=rollback)
+        self.mover_thread.update_signal.connect(self.log_message)
+        self.mover_thread.finished_signal.connect(self.recovery_finished)
+        # Next journal starts only after this thread has fully stopped
+        self.mover_thread.finished.connect(self._start_next_recovery)
+        self.mover_thread.start()
+
+    def recovery_finished(self, success, errors, path):
+        self.log_message(f"🏁 Відновлення завершено. ✅ Успішно: {success}, ❌ Помилок: {errors}")
+        self.log_message(f"📁 {path}")
+
     def format_time(self):
         mins, secs = divmod(self.remaining_time, 60)
         return f"{mins:02}:{secs:02}"
@@ -9684,6 +9329,7 @@ class MainWindow(QMainWindow):
 
         # If we are within the execution window, check for idle
         if start_time <= current_time <= end_time:
+            import psutil
             cpu_usage = psutil.cpu_percent(interval=1)
             self.log_message(f"ℹ️ У вікні розкладу. ЦП: {cpu_usage}%.")
             if cpu_usage < 15.0:
@@ -9719,12 +9365,37 @@ class MainWindow(QMainWindow):
         self.btn_drive_d.setEnabled(False)
         self.btn_drive_e.setEnabled(False)
 
-        self.mover_thread = FileMover(target_drive=self.selected_drive, fallback_drive='C', settings=self.settings.copy())
+        # Rescanned now: the watcher's last poll may be up to watcher_poll_s old
+        plan = self.desktop_watcher.plan_now() if self.desktop_watcher else None
+        self.mover_thread = FileMover(target_drive=self.selected_drive, fallback_drive='C',
+                                      settings=self.settings.copy(), plan=plan)
         self.mover_thread.update_signal.connect(self.log_message)
         self.mover_thread.finished_signal.connect(self.process_finished)
         self.mover_thread.start()
 
 
+    def update_desktop_watcher(self):
+        """Start, restart or stop the desktop watcher according to the 'mover' settings"""
+        mover_settings = self.settings.get('mover', DEFAULT_SETTINGS['mover'])
+        desktop = os.path.join(os.path.expanduser("~"), "Desktop")
+
+        if self.desktop_watcher:
+            self.desktop_watcher.stop()
+            self.desktop_watcher = None
+
+        if not mover_settings.get('watcher_enabled', False) or not os.path.isdir(desktop):
+            return
+
+        rules = FilterRules.from_settings(self.settings.get('file_manager', DEFAULT_SETTINGS['file_manager']))
+        self.desktop_watcher = DesktopWatcher(
+            desktop, rules,
+            debounce=mover_settings.get('watcher_debounce_s', 2.0),
+            poll_interval=mover_settings.get('watcher_poll_s', 5.0),
+        )
+        self.desktop_watcher.start()
+        self.log_message(f"👁️ Спостерігач робочого столу запущено ({self.desktop_watcher.backend})")
+
+
     def log_message(self, message):
         timestamp = datetime.now().strftime("%H:%M:%S")
         self.log.append(f"[{timestamp}] {message}")
@@ -9792,6 +9463,14 @@ class MainWindow(QMainWindow):
             if global_splash and hasattr(global_splash, 'cleanup'):
                 global_splash.cleanup()
 
+            if self.desktop_watcher:
+                self.desktop_watcher.stop()
+
+            # Cancel a running move; its journal stays on disk so the run can be resumed
+            if self.mover_thread and self.mover_thread.isRunning():
+                self.mover_thread.stop()
+                self.mover_thread.wait(5000)
+
             # Stop all timers before quitting
             if self.schedule_timer.isActive():
                 self.schedule_timer.stop()
@@ -9813,83 +9492,74 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
-    # If started with --background-run, execute headless task check
-    if '--background-run' in sys.argv:
-        from PyQt5.QtCore import QCoreApplication
-
-        def run_background_task():
-            app = QCoreApplication(sys.argv)
-            runner = BackgroundTaskRunner()
-            if not runner.check_and_run():
-                # If no task was started, quit immediately.
-                QCoreApplication.instance().quit()
-            sys.exit(app.exec_())
-
-        run_background_task()
-
-    else:  # Otherwise, start the GUI with splash screen
-        app = QApplication(sys.argv)
-
-        # Create and show splash screen
-        splash = SplashScreen()
-        globals()['global_splash'] = splash
-        splash.show()
-        QApplication.processEvents()  # Ensure splash is displayed immediately
-
-        is_scheduled_run = '--scheduled-run' in sys.argv
-        start_minimized = '--start-minimized' in sys.argv
-        startup_to_tray = '--startup-to-tray' in sys.argv
-
-        # Add startup messages to splash
-        splash.add_message("⚙️ Ініціалізація програми...")
-        splash.add_message("📚 Завантаження налаштувань...")
-
-        # Create main window (this may take time)
-        window = MainWindow(is_scheduled_run=is_scheduled_run)
-
-        splash.add_message("🖥️ Вікно створено...")
-
-        # Add a small delay to show the final message, then fade out
-        QTimer.singleShot(1500, lambda: splash.fade_out_and_close(800))
-
-        # Determine if we should show the window or start minimized
-        show_window = True
-
-        if startup_to_tray:
-            # Windows startup - start minimized to tray
-            show_window = False
-            # Stop schedule timer for tray mode - only runs when window is visible
-            if window.schedule_timer.isActive():
-                window.schedule_timer.stop()
-            splash.add_message("🔄 Згортання в трей...")
-        elif start_minimized:
-            # Manual start minimized request
-            show_window = False
-            splash.add_message("🔄 Запуск згорнутого...")
-        elif is_scheduled_run:
-            # Scheduled run - don't show UI
-            show_window = False
-            splash.add_message("🔄 Запуск запланованого завдання...")
-
-        if show_window:
-            window.show()
+    # --cli and --background-run are dispatched at the top of this file, before the GUI imports
+    startup_profiler.mark("imports finished")
+    app = QApplication(sys.argv)
+
+    # Create and show splash screen
+    splash = SplashScreen()
+    globals()['global_splash'] = splash
+    splash.show()
+    QApplication.processEvents()  # Ensure splash is displayed immediately
+
+    is_scheduled_run = '--scheduled-run' in sys.argv
+    start_minimized = '--start-minimized' in sys.argv
+    startup_to_tray = '--startup-to-tray' in sys.argv
+
+    # Add startup messages to splash
+    splash.add_message("⚙️ Ініціалізація програми...")
+    splash.add_message("📚 Завантаження налаштувань...")
+
+    # Create main window (this may take time)
+    window = MainWindow(is_scheduled_run=is_scheduled_run)
+    startup_profiler.mark("main window created")
+
+    splash.add_message("🖥️ Вікно створено...")
+
+    # Add a small delay to show the final message, then fade out
+    QTimer.singleShot(1500, lambda: splash.fade_out_and_close(800))
+
+    # Determine if we should show the window or start minimized
+    show_window = True
+
+    if startup_to_tray:
+        # Windows startup - start minimized to tray
+        show_window = False
+        # Stop schedule timer for tray mode - only runs when window is visible
+        if window.schedule_timer.isActive():
+            window.schedule_timer.stop()
+        splash.add_message("🔄 Згортання в трей...")
+    elif start_minimized:
+        # Manual start minimized request
+        show_window = False
+        splash.add_message("🔄 Запуск згорнутого...")
+    elif is_scheduled_run:
+        # Scheduled run - don't show UI
+        show_window = False
+        splash.add_message("🔄 Запуск запланованого завдання...")
+
+    if show_window:
+        window.show()
+    else:
+        # Start minimized - ensure tray is available and hide window
+        if window.tray_icon:
+            window.hide()
+            # Show a brief notification that we're running in tray
+            window.tray_icon.showMessage(
+                "Desktop Organizer",
+                "Програма запущена і працює у фоновому режимі. Двічі клацніть на іконку для відновлення.",
+                QSystemTrayIcon.Information,
+                4000
+            )
         else:
-            # Start minimized - ensure tray is available and hide window
-            if window.tray_icon:
-                window.hide()
-                # Show a brief notification that we're running in tray
-                window.tray_icon.showMessage(
-                    "Desktop Organizer",
-                    "Програма запущена і працює у фоновому режимі. Двічі клацніть на іконку для відновлення.",
-                    QSystemTrayIcon.Information,
-                    4000
-                )
-            else:
-                # Fallback - show window if tray is not available
-                window.show()
-                splash.add_message("⚠️ Трей недоступний, показуємо вікно...")
+            # Fallback - show window if tray is not available
+            window.show()
+            splash.add_message("⚠️ Трей недоступний, показуємо вікно...")
+
+    # Report once the event loop has started, i.e. after the first paint
+    QTimer.singleShot(0, lambda: (startup_profiler.mark("event loop started"), startup_profiler.report()))
 
-        # Clear global reference after splash is closed
-        QTimer.singleShot(2500, lambda: globals().__setitem__('global_splash', None))
+    # Clear global reference after splash is closed
+    QTimer.singleShot(2500, lambda: globals().__setitem__('global_splash', None))
 
-        sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
\ No newline at end of file
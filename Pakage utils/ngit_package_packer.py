@@ -25,6 +25,14 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 import importlib.util
 
+# Digest cache of the main application (one level up, next to "Desctop organiser.py")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from hash_cache import HashCache
+    HASH_CACHE_AVAILABLE = True
+except ImportError:
+    HASH_CACHE_AVAILABLE = False
+
 
 # NGIT Package Specification
 class NGITPackageSpec:
@@ -309,8 +317,9 @@ class PackageCreator:
                 with open(manifest_path, 'w', encoding='utf-8') as f:
                     json.dump(package_manifest, f, indent=2)
 
-                # Calculate checksums
-                checksums = self._calculate_checksums(temp_dir)
+                # Calculate checksums (module files are looked up by their source path in the hash cache)
+                sources = {"module": module_path if os.path.isdir(module_path) else os.path.dirname(module_path)}
+                checksums = self._calculate_checksums(temp_dir, sources)
                 checksum_path = os.path.join(temp_dir, NGITPackageSpec.CHECKSUM_FILE)
                 with open(checksum_path, 'w', encoding='utf-8') as f:
                     json.dump(checksums, f, indent=2)
@@ -358,29 +367,59 @@ class PackageCreator:
 
         return package_manifest
 
-    def _calculate_checksums(self, directory: str) -> Dict[str, str]:
-        """Calculate SHA256 checksums for all files"""
+    def _calculate_checksums(self, directory: str, sources: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Calculate SHA256 checksums for all files
+
+        sources maps a top-level folder of directory to the folder it was copied
+        from; those files are hashed through the shared hash cache under their
+        source path, so repacking an unchanged module reads nothing.
+        """
         checksums = {}
+        cache = None
+        if sources and HASH_CACHE_AVAILABLE:
+            try:
+                cache = HashCache()
+            except Exception as e:
+                print(f"    Warning: Hash cache unavailable: {e}")
 
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if file == NGITPackageSpec.CHECKSUM_FILE:
-                    continue  # Skip checksum file itself
+        try:
+            for root, dirs, files in os.walk(directory):
+                for file in files:
+                    if file == NGITPackageSpec.CHECKSUM_FILE:
+                        continue  # Skip checksum file itself
 
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, directory)
-                # Convert to forward slashes for consistent zip paths
-                rel_path = rel_path.replace(os.sep, '/')
+                    file_path = os.path.join(root, file)
+                    rel_path = os.path.relpath(file_path, directory)
+                    # Convert to forward slashes for consistent zip paths
+                    rel_path = rel_path.replace(os.sep, '/')
 
-                try:
-                    with open(file_path, 'rb') as f:
-                        file_hash = hashlib.sha256(f.read()).hexdigest()
+                    try:
+                        top, _, rest = rel_path.partition('/')
+                        if cache is not None and rest and top in sources:
+                            source_path = os.path.join(sources[top], *rest.split('/'))
+                            file_hash = cache.digest(source_path, "sha256", self._sha256_file)
+                            if file_hash is None or os.path.getsize(source_path) != os.path.getsize(file_path):
+                                file_hash = self._sha256_file(file_path)
+                        else:
+                            file_hash = self._sha256_file(file_path)
                         checksums[rel_path] = file_hash
-                except Exception as e:
-                    print(f"    Warning: Could not calculate checksum for {rel_path}: {e}")
+                    except Exception as e:
+                        print(f"    Warning: Could not calculate checksum for {rel_path}: {e}")
+        finally:
+            if cache is not None:
+                cache.close()
 
         return checksums
 
+    @staticmethod
+    def _sha256_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        """SHA256 of a file, read in chunks"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
     def _verify_package(self, package_path: str) -> bool:
         """Verify created package"""
         try:
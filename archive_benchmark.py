@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Archive Benchmark - search and tree layout harness for the archive browser
+
+Generates a synthetic "Робочі столи" archive (years -> runs -> files) as
+index rows and runs it through the archive browser's own code path:
+
+  load    FileTable.from_index_rows: file table, trigram name index and
+          children lists, built once per archive refresh
+  search  CleanupHelperWidget._archive_visible_rows: matching rows plus their
+          parent folders
+  layout  ArchiveTreeModel._visible_children for every folder, as the view
+          fetches rows when the tree is fully expanded
+
+The search is also repeated as a plain scan of every name through
+_matches_search_term (what the lookup costs without the name index). The
+indexed search must keep every name containing the term and select nothing
+the scan would not; its fuzzy pass only sees the best index candidates, so
+it may find fewer loose matches. No widgets or views are created, so only
+the data work is measured.
+
+Usage:
+    python archive_benchmark.py
+    python archive_benchmark.py --files 100000 --search doc_1
+    python archive_benchmark.py --files 1000000 --search "" --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# The archive browser lives in the modules directory next to this script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "modules"))
+from desktop_cleanup_helper import FileTable, ArchiveTreeModel, CleanupHelperWidget  # noqa: E402
+
+ROOT = os.path.join(os.sep, "archive", "Робочі столи")
+EXTENSIONS = ['.pdf', '.txt', '.png', '.docx', '.xlsx', '.zip', '.lnk']
+
+
+class ArchiveView:
+    """The archive state of CleanupHelperWidget with its search methods, without the widget"""
+    _archive_visible_rows = CleanupHelperWidget._archive_visible_rows
+    _matches_search_term = CleanupHelperWidget._matches_search_term
+
+    def __init__(self, rows: List[Tuple]):
+        self._file_table, self._name_index = FileTable.from_index_rows(ROOT, rows)
+
+
+def build_rows(files: int, years: int, runs_per_year: int, seed: int = 42) -> List[Tuple]:
+    """ArchiveIndex-style rows (path, parent, name, is_dir, size, mtime), parents first"""
+    rng = random.Random(seed)
+    rows = []
+    run_dirs = []
+    for y in range(years):
+        year_name = f"Робочий стіл {2020 + y}"
+        year_path = os.path.join(ROOT, year_name)
+        rows.append((year_path, ROOT, year_name, 1, 4096, 1.6e9))
+        for r in range(runs_per_year):
+            run_name = f"Робочий стіл {r % 28 + 1:02d}-{r % 12 + 1:02d}-{2020 + y} 15-{r % 60:02d}"
+            run_path = os.path.join(year_path, run_name)
+            rows.append((run_path, year_path, run_name, 1, 4096, 1.6e9))
+            run_dirs.append(run_path)
+    for i in range(files):
+        parent = run_dirs[i % len(run_dirs)]
+        name = f"doc_{rng.randrange(10 ** 7)}{rng.choice(EXTENSIONS)}"
+        rows.append((os.path.join(parent, name), parent, name, 0, rng.randrange(10 ** 8), 1.6e9 + rng.random() * 1e8))
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
+def scan_visible_rows(view: ArchiveView, term: str, match) -> set:
+    """Visible rows from a check of every name with match(term, name), without the name index"""
+    term = term.strip()
+    table = view._file_table
+    visible_rows = set()
+    for row in range(len(table)):
+        if match(term, table.names[row]):
+            while row != -1 and row not in visible_rows:
+                visible_rows.add(row)
+                row = table.parents[row]
+    return visible_rows
+
+
+def contains_term(term: str, name: str) -> bool:
+    return term.lower() in name.lower()
+
+
+def model_layout(table: FileTable, visible_rows: Optional[set]) -> int:
+    """Rows of the fully expanded tree, taken from the model's children lists"""
+    model = ArchiveTreeModel(table, visible_rows)
+    count = 0
+    pending = [-1]
+    while pending:
+        children = model._visible_children(pending.pop())
+        count += len(children)
+        pending.extend(child for child in children if table.is_dir(child))
+    return count
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_scenario(rows: List[Tuple], search: str, skip_scan: bool) -> Dict:
+    view, load_seconds = timed(ArchiveView, rows)
+    visible_rows, search_seconds = timed(view._archive_visible_rows, search)
+    visible, layout_seconds = timed(model_layout, view._file_table, visible_rows)
+    result = {
+        'entries': len(rows),
+        'search': search or None,
+        'visible': visible,
+        'load_seconds': round(load_seconds, 4),
+        'search_seconds': round(search_seconds, 4),
+        'layout_seconds': round(layout_seconds, 4),
+        'scan_seconds': None,
+        'speedup': None,
+    }
+    if search.strip() and not skip_scan:
+        scanned, scan_seconds = timed(scan_visible_rows, view, search, view._matches_search_term)
+        if not scan_visible_rows(view, search, contains_term) <= visible_rows <= scanned:
+            raise RuntimeError("Indexed search missed a matching name or selected a row the full scan did not")
+        result['scan_seconds'] = round(scan_seconds, 4)
+        result['speedup'] = round(scan_seconds / max(search_seconds, 1e-9), 1)
+    return result
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Archive Benchmark - search and tree layout harness for the archive browser",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--files', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Number of archived files per scenario')
+    parser.add_argument('--years', type=int, default=5, help='Year folders in the synthetic archive')
+    parser.add_argument('--runs', type=int, default=40, help='Run folders per year')
+    parser.add_argument('--search', default="doc_12", help='Name search term ("" for the whole archive)')
+    parser.add_argument('--skip-scan', action='store_true', help='Do not time the search without the name index')
+    parser.add_argument('--output', help='JSON results file')
+    args = parser.parse_args()
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [],
+    }
+    for files in args.files:
+        r = run_scenario(build_rows(files, args.years, args.runs), args.search, args.skip_scan)
+        report['results'].append(r)
+        scan = f"  full scan {r['scan_seconds']:.3f} s (x{r['speedup']})" if r['scan_seconds'] is not None else ""
+        print(f"{r['entries']:>8} entries, {r['visible']:>8} visible: load {r['load_seconds']:>7.3f} s  "
+              f"search {r['search_seconds']:>7.3f} s  layout {r['layout_seconds']:>7.3f} s{scan}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nResults saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1303 @@
+"""Desktop mover engine used by FileMover.
+
+Pure-Python core of the desktop organisation run: it classifies the desktop
+into a typed move plan with one os.scandir pass and executes the planned
+batch on a bounded thread pool. Same-volume moves are a
+plain rename, cross-volume moves are copied in parallel. Progress is
+aggregated and reported at a fixed rate instead of once per file, so the
+GUI log is never the bottleneck. Also runnable as a headless CLI
+(`python desktop_mover.py --help`). This module must not import PyQt5.
+"""
+
+import copy
+import errno
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_PROGRESS_INTERVAL = 0.25  # seconds between aggregated progress reports
+DEFAULT_COPY_BUFFER = 4 * 1024 * 1024  # cross-volume copy chunk size
+LARGE_FILE_BYTES = 64 * 1024 * 1024  # files above this get a throughput line in the log
+
+ARCHIVE_FOLDER_NAME = "Робочі столи"
+
+# Defaults of the 'file_manager' and 'mover' settings sections (shared with DEFAULT_SETTINGS)
+DEFAULT_FILE_MANAGER_SETTINGS = {
+    'max_file_size_mb': 100,
+    'allowed_extensions': ['.lnk'],
+    'allowed_filenames': []
+}
+
+DEFAULT_MOVER_SETTINGS = {
+    'max_workers': DEFAULT_MAX_WORKERS,
+    'progress_interval_ms': 250,
+    'copy_buffer_mb': 4,  # chunk size for cross-volume copies
+    'zero_copy': True,  # use copy_file_range/sendfile where the OS provides them
+    'manifest_hash': False,  # store SHA-256 of archived files in the restore manifest
+    'watcher_enabled': False,  # keep a live move plan of the desktop between runs
+    'watcher_debounce_s': 2.0,
+    'watcher_poll_s': 5.0,
+}
+
+
+@dataclass
+class MoveTask:
+    """A single planned move of a desktop item"""
+    name: str
+    src: str
+    dst: str
+    size: int = 0
+    is_dir: bool = False
+    mtime: float = 0.0
+
+
+@dataclass
+class MoveProgress:
+    """Aggregated progress snapshot delivered to the progress callback"""
+    total: int
+    completed: int = 0
+    moved: int = 0
+    errors: int = 0
+    bytes_total: int = 0
+    bytes_done: int = 0
+    elapsed: float = 0.0
+    messages: List[str] = field(default_factory=list)
+    final: bool = False
+
+
+@dataclass
+class MoveResult:
+    """Outcome of an engine run"""
+    moved: int = 0
+    errors: int = 0
+    cancelled: bool = False
+    bytes_moved: int = 0
+    elapsed: float = 0.0
+    copy_bytes: int = 0  # bytes physically copied across volumes
+    copy_seconds: float = 0.0
+    failed: List[str] = field(default_factory=list)
+    succeeded: List[MoveTask] = field(default_factory=list)
+
+
+def same_device(path_a: str, path_b: str) -> bool:
+    """Return True if both paths live on the same volume"""
+    try:
+        return os.stat(path_a).st_dev == os.stat(path_b).st_dev
+    except OSError:
+        return False
+
+
+# --- Cross-volume transfer ---
+
+class TransferCancelled(Exception):
+    """Raised inside a copy when the engine was cancelled; partial output is removed"""
+
+
+@dataclass
+class TransferStats:
+    """Per-file (or per-tree) copy statistics"""
+    bytes: int = 0
+    seconds: float = 0.0
+    method: str = "buffered"
+
+    @property
+    def throughput_mbps(self) -> float:
+        return self.bytes / (1024 * 1024) / self.seconds if self.seconds > 0 else 0.0
+
+    def add(self, other: "TransferStats"):
+        self.bytes += other.bytes
+        self.seconds += other.seconds
+        if other.method != "buffered":
+            self.method = other.method
+
+
+def _copy_file_range_chunk(src_fd, dst_fd, offset, count):
+    return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+
+
+def _sendfile_chunk(src_fd, dst_fd, offset, count):
+    # The destination position is kept at `offset` by the caller
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+def _zero_copy_methods():
+    """Kernel-side copy primitives available on this platform, fastest first"""
+    methods = []
+    if hasattr(os, 'copy_file_range'):
+        methods.append(("copy_file_range", _copy_file_range_chunk))
+    # sendfile only accepts a regular file as output on Linux
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        methods.append(("sendfile", _sendfile_chunk))
+    return methods
+
+
+def _check_cancel(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise TransferCancelled()
+
+
+def stream_copy_file(src: str, dst: str, buffer_size: int = DEFAULT_COPY_BUFFER,
+                     on_bytes: Optional[Callable[[int], None]] = None,
+                     cancel_event: Optional[threading.Event] = None,
+                     zero_copy: bool = True) -> TransferStats:
+    """Copy one file in chunks with byte progress and cancellation.
+
+    Tries copy_file_range/sendfile first and falls back to a buffered
+    readinto loop from wherever the fast path stopped. Metadata is copied
+    like shutil.copy2. A partially written destination is removed on error.
+    """
+    start = time.monotonic()
+    stats = TransferStats()
+    size = os.stat(src).st_size
+    offset = 0
+    try:
+        with open(src, 'rb', buffering=0) as fsrc, open(dst, 'wb', buffering=0) as fdst:
+            src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+
+            if zero_copy and size:
+                for name, chunk_fn in _zero_copy_methods():
+                    os.lseek(dst_fd, offset, os.SEEK_SET)
+                    start_offset = offset
+                    try:
+                        while offset < size:
+                            _check_cancel(cancel_event)
+                            sent = chunk_fn(src_fd, dst_fd, offset, min(buffer_size, size - offset))
+                            if sent == 0:
+                                break
+                            offset += sent
+                            if on_bytes:
+                                on_bytes(sent)
+                    except OSError:
+                        # Not supported for this pair of files; continue with the next method
+                        pass
+                    if offset > start_offset:
+                        stats.method = name
+                    if offset >= size:
+                        break
+
+            # Buffered path, also picks up whatever the fast path did not copy (or appended data)
+            os.lseek(src_fd, offset, os.SEEK_SET)
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            buf = memoryview(bytearray(buffer_size))
+            while True:
+                _check_cancel(cancel_event)
+                n = fsrc.readinto(buf)
+                if not n:
+                    break
+                view = buf[:n]
+                while view:
+                    written = fdst.write(view)
+                    view = view[written:]
+                offset += n
+                if on_bytes:
+                    on_bytes(n)
+        shutil.copystat(src, dst)
+    except BaseException:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        raise
+
+    stats.bytes = offset
+    stats.seconds = time.monotonic() - start
+    return stats
+
+
+def stream_copy_tree(src: str, dst: str, **copy_kwargs) -> TransferStats:
+    """Copy a directory tree with stream_copy_file, keeping symlinks as links"""
+    stats = TransferStats()
+    copied_dirs = []
+    try:
+        for root, dirs, files in os.walk(src):
+            rel = os.path.relpath(root, src)
+            target_root = dst if rel == os.curdir else os.path.join(dst, rel)
+            os.makedirs(target_root, exist_ok=True)
+            copied_dirs.append((root, target_root))
+
+            for name in list(dirs):
+                path = os.path.join(root, name)
+                if os.path.islink(path):
+                    os.symlink(os.readlink(path), os.path.join(target_root, name))
+                    dirs.remove(name)
+            for name in files:
+                path = os.path.join(root, name)
+                if os.path.islink(path):
+                    os.symlink(os.readlink(path), os.path.join(target_root, name))
+                else:
+                    stats.add(stream_copy_file(path, os.path.join(target_root, name), **copy_kwargs))
+
+        # Directory timestamps are restored last, after their contents were written
+        for source_dir, target_dir in reversed(copied_dirs):
+            shutil.copystat(source_dir, target_dir)
+    except BaseException:
+        shutil.rmtree(dst, ignore_errors=True)
+        raise
+    return stats
+
+
+def move_across_devices(src: str, dst: str, **copy_kwargs) -> TransferStats:
+    """Copy src to dst on another volume, then delete the source"""
+    if os.path.islink(src):
+        os.symlink(os.readlink(src), dst)
+        os.unlink(src)
+        return TransferStats()
+    if os.path.isdir(src):
+        stats = stream_copy_tree(src, dst, **copy_kwargs)
+        shutil.rmtree(src)
+    else:
+        stats = stream_copy_file(src, dst, **copy_kwargs)
+        os.unlink(src)
+    return stats
+
+
+class MoverEngine:
+    """Executes a batch of MoveTask objects on a bounded thread pool"""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+                 progress_callback: Optional[Callable[[MoveProgress], None]] = None,
+                 copy_buffer: int = DEFAULT_COPY_BUFFER,
+                 zero_copy: bool = True):
+        self.max_workers = max(1, int(max_workers or 1))
+        self.progress_interval = max(0.01, float(progress_interval))
+        self.progress_callback = progress_callback
+        self.copy_buffer = max(64 * 1024, int(copy_buffer))
+        self.zero_copy = zero_copy
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._progress = None
+        self._pending_messages = []
+
+    def cancel(self):
+        """Request cancellation; tasks already running are allowed to finish"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def run(self, tasks: List[MoveTask], dest_dir: str, journal: "Optional[MoveJournal]" = None) -> MoveResult:
+        """Run all tasks into dest_dir and return the aggregated result"""
+        start = time.monotonic()
+        result = MoveResult()
+        self._progress = MoveProgress(total=len(tasks), bytes_total=sum(t.size for t in tasks))
+        self._pending_messages = []
+
+        if not tasks:
+            self._report(start, final=True)
+            return result
+
+        # Device check is done once per source directory, not per item
+        device_cache = {}
+
+        def is_same_device(src: str) -> bool:
+            src_dir = os.path.dirname(src)
+            if src_dir not in device_cache:
+                device_cache[src_dir] = same_device(src_dir, dest_dir)
+            return device_cache[src_dir]
+
+        # Imported here: the scheduled check imports this module but rarely moves anything
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+        last_report = start
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="mover") as pool:
+            pending = set()
+            task_iter = iter(tasks)
+            exhausted = False
+
+            while True:
+                # Keep the queue bounded so cancellation takes effect quickly
+                while not exhausted and len(pending) < self.max_workers * 4 and not self.cancelled:
+                    task = next(task_iter, None)
+                    if task is None:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(self._move_one, task, is_same_device(task.src)))
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, timeout=self.progress_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, error, stats = future.result()
+                    if error is TransferCancelled:
+                        continue  # source untouched, the journal keeps it pending
+                    self._record(result, task, error, stats)
+                    if journal is not None:
+                        journal.record(task, error)
+
+                now = time.monotonic()
+                if now - last_report >= self.progress_interval:
+                    self._report(start)
+                    last_report = now
+
+        result.cancelled = self.cancelled and result.moved + result.errors < len(tasks)
+        result.elapsed = time.monotonic() - start
+        self._report(start, final=True)
+        return result
+
+    def _add_bytes(self, count: int, grow_total: bool = False):
+        with self._lock:
+            self._progress.bytes_done += count
+            if grow_total:
+                # Folder sizes are not known at planning time
+                self._progress.bytes_total += count
+
+    def _move_one(self, task: MoveTask, on_same_device: bool):
+        """Move one item; returns (task, error_message_or_None, TransferStats_or_None)"""
+        copied = 0
+
+        def on_bytes(count):
+            nonlocal copied
+            copied += count
+            self._add_bytes(count, grow_total=task.is_dir)
+
+        try:
+            if on_same_device:
+                try:
+                    os.rename(task.src, task.dst)
+                    self._add_bytes(task.size)
+                    return task, None, None
+                except OSError as e:
+                    # Checked per source directory: a junction or mount point inside it is another volume
+                    if e.errno != errno.EXDEV:
+                        raise
+            stats = move_across_devices(task.src, task.dst, buffer_size=self.copy_buffer,
+                                        on_bytes=on_bytes, cancel_event=self._cancel_event,
+                                        zero_copy=self.zero_copy)
+            return task, None, stats
+        except TransferCancelled:
+            self._add_bytes(-copied, grow_total=task.is_dir)
+            return task, TransferCancelled, None
+        except Exception as e:
+            self._add_bytes(-copied, grow_total=task.is_dir)
+            return task, str(e), None
+
+    def _record(self, result: MoveResult, task: MoveTask, error: Optional[str],
+                stats: Optional[TransferStats] = None):
+        with self._lock:
+            self._progress.completed += 1
+            if error is None:
+                result.moved += 1
+                result.succeeded.append(task)
+                result.bytes_moved += stats.bytes if stats is not None else task.size
+                self._progress.moved += 1
+                if stats is not None:
+                    result.copy_bytes += stats.bytes
+                    result.copy_seconds += stats.seconds
+                    if stats.bytes >= LARGE_FILE_BYTES:
+                        self._pending_messages.append(
+                            f"📦 {task.name}: {stats.bytes / (1024 * 1024):.0f} MB за {stats.seconds:.1f} с "
+                            f"({stats.throughput_mbps:.1f} MB/s, {stats.method})")
+            else:
+                result.errors += 1
+                result.failed.append(task.name)
+                self._progress.errors += 1
+                self._pending_messages.append(f"❌ Помилка переміщення '{task.name}': {error}")
+
+    def _report(self, start: float, final: bool = False):
+        if not self.progress_callback:
+            return
+        with self._lock:
+            snapshot = MoveProgress(
+                total=self._progress.total,
+                completed=self._progress.completed,
+                moved=self._progress.moved,
+                errors=self._progress.errors,
+                bytes_total=self._progress.bytes_total,
+                bytes_done=self._progress.bytes_done,
+                elapsed=time.monotonic() - start,
+                messages=self._pending_messages,
+                final=final,
+            )
+            self._pending_messages = []
+        self.progress_callback(snapshot)
+
+
+def engine_from_settings(settings: dict, progress_callback: Optional[Callable[[MoveProgress], None]] = None) -> MoverEngine:
+    """Build a MoverEngine from the 'mover' settings section"""
+    mover_settings = settings.get('mover', DEFAULT_MOVER_SETTINGS)
+    return MoverEngine(
+        max_workers=mover_settings.get('max_workers', DEFAULT_MAX_WORKERS),
+        progress_interval=mover_settings.get('progress_interval_ms', 250) / 1000.0,
+        progress_callback=progress_callback,
+        copy_buffer=int(mover_settings.get('copy_buffer_mb', 4) * 1024 * 1024),
+        zero_copy=mover_settings.get('zero_copy', True),
+    )
+
+
+def snapshot_destination(base_path: str, now: Optional[datetime] = None) -> str:
+    """'<base>/Робочий стіл <year>/Робочий стіл <dd-mm-YYYY HH-MM>' for a new run.
+
+    Folder names go down to the minute; when an earlier run of the same minute
+    already used the folder, a counter is added ('..._1') so each run keeps
+    its own folder, journal and manifest.
+    """
+    now = now or datetime.now()
+    folder = os.path.join(base_path, f"Робочий стіл {now.strftime('%Y')}",
+                          f"Робочий стіл {now.strftime('%d-%m-%Y %H-%M')}")
+    candidate, counter = folder, 1
+    while not _snapshot_folder_free(candidate):
+        candidate = f"{folder}_{counter}"
+        counter += 1
+    return candidate
+
+
+def _snapshot_folder_free(dest_dir: str) -> bool:
+    """No run has used dest_dir: no journal or manifest and no (or an empty) folder"""
+    if os.path.lexists(dest_dir + JOURNAL_SUFFIX) or os.path.lexists(dest_dir + MANIFEST_SUFFIX):
+        return False
+    try:
+        with os.scandir(dest_dir) as it:
+            return next(it, None) is None
+    except FileNotFoundError:
+        return True
+    except OSError:
+        return False
+
+
+def format_progress(progress: MoveProgress) -> str:
+    """Human readable one-line summary of a progress snapshot"""
+    mb_done = progress.bytes_done / (1024 * 1024)
+    mb_total = progress.bytes_total / (1024 * 1024)
+    line = f"🔄 Переміщено {progress.moved}/{progress.total} ({mb_done:.1f}/{mb_total:.1f} MB)"
+    if progress.errors:
+        line += f", помилок: {progress.errors}"
+    return line
+
+
+# --- Planning ---
+
+class PlanAction:
+    """Decision taken for a desktop entry"""
+    KEEP = "keep"   # whitelisted, stays on the desktop
+    SKIP = "skip"   # not moved because of a limit or an error
+    MOVE = "move"
+
+
+@dataclass
+class FilterRules:
+    """Whitelist and size rules from the 'file_manager' settings section"""
+    allowed_extensions: frozenset = frozenset()
+    allowed_filenames: frozenset = frozenset()
+    max_size_bytes: int = 100 * 1024 * 1024
+
+    @classmethod
+    def from_settings(cls, fm_settings: dict) -> "FilterRules":
+        return cls(
+            allowed_extensions=frozenset(ext.lower() for ext in fm_settings.get('allowed_extensions', [])),
+            allowed_filenames=frozenset(fm_settings.get('allowed_filenames', [])),
+            max_size_bytes=fm_settings.get('max_file_size_mb', 100) * 1024 * 1024,
+        )
+
+
+@dataclass
+class PlanEntry:
+    """Classification result for one desktop entry"""
+    name: str
+    path: str
+    action: str
+    reason: str
+    size: int = 0
+    is_dir: bool = False
+    ext: str = ""
+    mtime: float = 0.0
+
+
+@dataclass
+class MovePlan:
+    """Typed plan shared by the real run and the dry run"""
+    source_dir: str
+    entries: List[PlanEntry] = field(default_factory=list)
+
+    def by_action(self, action: str) -> List[PlanEntry]:
+        return [e for e in self.entries if e.action == action]
+
+    @property
+    def moves(self) -> List[PlanEntry]:
+        return self.by_action(PlanAction.MOVE)
+
+    def to_tasks(self, dest_dir: str) -> List[MoveTask]:
+        """Convert the MOVE entries into engine tasks targeting dest_dir.
+
+        A rename replaces an existing file on POSIX, so names already taken in
+        dest_dir get a counter suffix here instead of being overwritten.
+        """
+        taken = _existing_names(dest_dir)
+        return [MoveTask(name=e.name, src=e.path, dst=os.path.join(dest_dir, _free_name(e.name, taken)),
+                         size=e.size, is_dir=e.is_dir, mtime=e.mtime)
+                for e in self.moves]
+
+
+def _existing_names(directory: str) -> set:
+    """Lower-cased names in directory, read once (empty when it cannot be listed)"""
+    try:
+        return {name.lower() for name in os.listdir(directory)}
+    except OSError:
+        return set()
+
+
+def _free_name(name: str, taken: set) -> str:
+    """name, or 'stem_N.ext' when taken already has it; the result is added to taken"""
+    stem, ext = os.path.splitext(name)
+    candidate, counter = name, 1
+    while candidate.lower() in taken:
+        candidate = f"{stem}_{counter}{ext}"
+        counter += 1
+    taken.add(candidate.lower())
+    return candidate
+
+
+def classify_entry(entry: os.DirEntry, rules: FilterRules) -> PlanEntry:
+    """Classify a DirEntry using only its cached type and stat information"""
+    name = entry.name
+    stem, ext = os.path.splitext(name)
+    ext = ext.lower()
+
+    try:
+        is_file = entry.is_file()
+    except OSError:
+        is_file = False
+    plan_entry = PlanEntry(name=name, path=entry.path, action=PlanAction.MOVE,
+                           reason="Буде переміщено", is_dir=not is_file, ext=ext)
+
+    # INVERSE LOGIC: whitelisted extensions and filenames are KEPT, everything else moves
+    if rules.allowed_extensions and ext in rules.allowed_extensions:
+        plan_entry.action = PlanAction.KEEP
+        plan_entry.reason = f"Збережено за розширенням (у whitelist): {ext}"
+        return plan_entry
+
+    if rules.allowed_filenames and stem in rules.allowed_filenames:
+        plan_entry.action = PlanAction.KEEP
+        plan_entry.reason = f"Збережено за ім'ям файлу (у whitelist): {stem}"
+        return plan_entry
+
+    try:
+        stat_result = entry.stat()
+    except OSError as e:
+        if is_file:
+            plan_entry.action = PlanAction.SKIP
+            plan_entry.reason = f"Не вдалося отримати розмір: {e}"
+        return plan_entry
+    plan_entry.mtime = stat_result.st_mtime
+
+    if is_file:
+        plan_entry.size = stat_result.st_size
+        if plan_entry.size > rules.max_size_bytes:
+            plan_entry.action = PlanAction.SKIP
+            plan_entry.reason = f"Пропущено за розміром ({plan_entry.size / (1024*1024):.1f}MB)"
+
+    return plan_entry
+
+
+def plan_directory(source_dir: str, rules: FilterRules) -> MovePlan:
+    """Build a move plan for source_dir with a single os.scandir pass"""
+    plan = MovePlan(source_dir=source_dir)
+    with os.scandir(source_dir) as it:
+        for entry in it:
+            plan.entries.append(classify_entry(entry, rules))
+    return plan
+
+
+# --- Crash-safe move journal ---
+
+JOURNAL_SUFFIX = ".journal"
+
+
+class MoveJournal:
+    """Append-only JSON-lines journal of a run, written next to its destination folder.
+
+    The plan is fsynced before the first move; completion records are
+    fsynced in batches. A journal that still exists on disk belongs to a run
+    that did not finish, because a finished run removes its journal.
+    """
+
+    def __init__(self, path: str, sync_every: int = 64, sync_interval: float = 1.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.rollback = False
+        self._file = open(path, 'a', encoding='utf-8')
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @classmethod
+    def for_destination(cls, source_dir: str, dest_dir: str, tasks: List[MoveTask]) -> "MoveJournal":
+        """Create a journal for a new run and durably record its plan"""
+        journal = cls(dest_dir.rstrip("\\/") + JOURNAL_SUFFIX)
+        journal._write({'op': 'begin', 'source': source_dir, 'dest': dest_dir, 'time': time.time()})
+        for task in tasks:
+            journal._write({'op': 'plan', 'name': task.name, 'src': task.src, 'dst': task.dst,
+                            'size': task.size, 'is_dir': task.is_dir, 'mtime': task.mtime})
+        journal.sync()
+        return journal
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._unsynced += 1
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def record(self, task: MoveTask, error: Optional[str]):
+        """Record the outcome of one move (or of one rollback move)"""
+        if error is not None:
+            self._write({'op': 'error', 'name': task.name, 'error': error})
+        else:
+            self._write({'op': 'undone' if self.rollback else 'done', 'name': task.name})
+        if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def close(self, complete: bool = True):
+        """Sync and close; a complete journal is removed since nothing is left to resume"""
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+        if complete:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+@dataclass
+class JournalState:
+    """Replayed contents of a journal file"""
+    path: str
+    source: str = ""
+    dest: str = ""
+    planned: List[MoveTask] = field(default_factory=list)
+    done: set = field(default_factory=set)
+
+    @property
+    def remaining(self) -> List[MoveTask]:
+        return [t for t in self.planned if t.name not in self.done]
+
+    @property
+    def completed(self) -> List[MoveTask]:
+        return [t for t in self.planned if t.name in self.done]
+
+
+def load_journal(path: str) -> JournalState:
+    """Replay a journal; a torn last line from a crash is ignored"""
+    state = JournalState(path=path)
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            op = record.get('op')
+            if op == 'begin':
+                state.source = record.get('source', '')
+                state.dest = record.get('dest', '')
+            elif op == 'plan':
+                state.planned.append(MoveTask(name=record['name'], src=record['src'], dst=record['dst'],
+                                              size=record.get('size', 0), is_dir=record.get('is_dir', False),
+                                              mtime=record.get('mtime', 0.0)))
+            elif op == 'done':
+                state.done.add(record['name'])
+            elif op == 'undone':
+                state.done.discard(record['name'])
+    return state
+
+
+def execute_plan(plan: MovePlan, dest_dir: str, engine: MoverEngine) -> MoveResult:
+    """Run the MOVE entries of a plan into dest_dir under a crash-safe journal"""
+    tasks = plan.to_tasks(dest_dir)
+    journal = MoveJournal.for_destination(plan.source_dir, dest_dir, tasks)
+    result = engine.run(tasks, dest_dir, journal=journal)
+    # A cancelled run keeps its journal so it can be resumed later
+    journal.close(complete=not result.cancelled)
+    return result
+
+
+def find_incomplete_journals(base_paths: List[str]) -> List[str]:
+    """Find leftover journals under '<base>/<year folder>/' for each base path"""
+    found = []
+    for base in base_paths:
+        try:
+            with os.scandir(base) as years:
+                year_dirs = [e.path for e in years if e.is_dir()]
+        except OSError:
+            continue
+        for year_dir in year_dirs:
+            try:
+                with os.scandir(year_dir) as it:
+                    found.extend(e.path for e in it if e.name.endswith(JOURNAL_SUFFIX) and e.is_file())
+            except OSError:
+                continue
+    return sorted(found)
+
+
+def resume_journal(state: JournalState, engine: MoverEngine) -> MoveResult:
+    """Finish an interrupted run into its original destination, skipping completed entries"""
+    os.makedirs(state.dest, exist_ok=True)
+    tasks = []
+    for task in state.remaining:
+        # A move whose completion record was lost in the crash has already happened
+        if not os.path.lexists(task.src) and os.path.lexists(task.dst):
+            state.done.add(task.name)
+            continue
+        tasks.append(task)
+
+    journal = MoveJournal(state.path)
+    result = engine.run(tasks, state.dest, journal=journal)
+    journal.close(complete=not result.cancelled)
+    return result
+
+
+def rollback_journal(state: JournalState, engine: MoverEngine) -> MoveResult:
+    """Move the already completed entries of an interrupted run back to the source"""
+    # Planned entries are checked on disk too: completion records of the last batch may be lost
+    tasks = [MoveTask(name=t.name, src=t.dst, dst=t.src, size=t.size, is_dir=t.is_dir)
+             for t in state.planned
+             if os.path.lexists(t.dst) and not os.path.lexists(t.src)]
+
+    journal = MoveJournal(state.path)
+    journal.rollback = True
+    result = engine.run(tasks, state.source, journal=journal)
+    journal.close(complete=not result.cancelled and result.errors == 0)
+
+    if result.errors == 0:
+        try:
+            os.rmdir(state.dest)  # only succeeds when nothing is left in it
+        except OSError:
+            pass
+    return result
+
+
+# --- Snapshot manifest and restore ---
+
+MANIFEST_SUFFIX = ".manifest.jsonl"
+
+
+@dataclass
+class ManifestEntry:
+    """One archived desktop item and where it came from"""
+    name: str
+    original: str
+    archived: str
+    size: int = 0
+    mtime: float = 0.0
+    is_dir: bool = False
+    hash: Optional[str] = None
+
+
+def manifest_path_for(dest_dir: str) -> str:
+    return dest_dir.rstrip("\\/") + MANIFEST_SUFFIX
+
+
+# Bookkeeping files next to the snapshot folders; archive views leave them out (fs_walker patterns)
+SNAPSHOT_METADATA_PATTERNS = (
+    f"Робочий стіл *{JOURNAL_SUFFIX}",
+    f"Робочий стіл *{MANIFEST_SUFFIX}",
+    f"Робочий стіл *{MANIFEST_SUFFIX}.tmp",
+)
+
+
+def is_snapshot_metadata(name: str) -> bool:
+    """Whether a file name is a journal or manifest of a snapshot folder"""
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, pattern.lower()) for pattern in SNAPSHOT_METADATA_PATTERNS)
+
+
+def remove_snapshot_metadata(dest_dir: str) -> List[str]:
+    """Remove the manifest and journal of a deleted snapshot folder; returns the removed paths"""
+    base = dest_dir.rstrip("\\/")
+    removed = []
+    for path in (base + MANIFEST_SUFFIX, base + MANIFEST_SUFFIX + ".tmp", base + JOURNAL_SUFFIX):
+        try:
+            os.remove(path)
+            removed.append(path)
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def hash_file(path: str, buffer_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(buffer_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(source_dir: str, dest_dir: str, tasks: List[MoveTask], with_hash: bool = False) -> str:
+    """Write the manifest of a finished run next to its destination folder"""
+    path = manifest_path_for(dest_dir)
+    tmp_path = path + ".tmp"
+    cache = _open_hash_cache() if with_hash else None
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'op': 'snapshot', 'source': source_dir, 'dest': dest_dir,
+                                'time': time.time()}, ensure_ascii=False) + "\n")
+            for task in tasks:
+                record = {'name': task.name, 'original': task.src, 'archived': task.dst,
+                          'size': task.size, 'mtime': task.mtime, 'is_dir': task.is_dir}
+                if with_hash and not task.is_dir:
+                    try:
+                        if cache is not None:
+                            # A same-volume move keeps size, mtime and inode, so a digest of the desktop file is reused
+                            digest = cache.digest(task.dst, "sha256", hash_file, also_known_as=task.src)
+                        else:
+                            digest = hash_file(task.dst)
+                        if digest:
+                            record['hash'] = digest
+                    except OSError:
+                        pass
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    finally:
+        if cache is not None:
+            try:
+                cache.close()
+            except Exception:
+                pass
+    os.replace(tmp_path, path)
+    return path
+
+
+def resume_with_manifest(state: JournalState, engine: MoverEngine, with_hash: bool = False,
+                         on_manifest_error: Optional[Callable[[Exception], None]] = None) -> MoveResult:
+    """Resume an interrupted run, then write the restore manifest of its snapshot.
+
+    The manifest lists every planned item that is now in the archive, including
+    the ones moved before the interruption. A manifest that cannot be written
+    is passed to on_manifest_error (raised without one); the moves stand.
+    """
+    result = resume_journal(state, engine)
+    archived = [t for t in state.planned if os.path.lexists(t.dst) and not os.path.lexists(t.src)]
+    if archived:
+        try:
+            write_manifest(state.source, state.dest, archived, with_hash=with_hash)
+        except Exception as e:
+            if on_manifest_error is None:
+                raise
+            on_manifest_error(e)
+    return result
+
+
+def _open_hash_cache():
+    """Shared digest cache, or None when it cannot be opened (hashes are then computed directly)"""
+    try:
+        # Imported here: the scheduled check imports this module but rarely writes hashed manifests
+        from hash_cache import HashCache
+        return HashCache()
+    except Exception:
+        return None
+
+
+def load_manifest(path: str) -> List[ManifestEntry]:
+    """Entries of a manifest that have not been restored yet"""
+    entries = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            op = record.get('op')
+            if op == 'restored':
+                entries.pop(record.get('name'), None)
+            elif op is None and 'name' in record:
+                entries[record['name']] = ManifestEntry(
+                    name=record['name'], original=record['original'], archived=record['archived'],
+                    size=record.get('size', 0), mtime=record.get('mtime', 0.0),
+                    is_dir=record.get('is_dir', False), hash=record.get('hash'))
+    return list(entries.values())
+
+
+def find_snapshot_manifest(path: str) -> Optional[str]:
+    """Manifest of the snapshot folder that contains path, if there is one"""
+    current = os.path.abspath(path)
+    while True:
+        candidate = manifest_path_for(current)
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+class _RestoreLog:
+    """Engine journal hook that appends 'restored' records to a manifest"""
+
+    def __init__(self, manifest_path: str):
+        self._file = open(manifest_path, 'a', encoding='utf-8')
+
+    def record(self, task: MoveTask, error: Optional[str]):
+        if error is None:
+            self._file.write(json.dumps({'op': 'restored', 'name': task.name}, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+def plan_restore(entries: List[ManifestEntry], target_dir: Optional[str] = None) -> List[MoveTask]:
+    """Restore tasks back to the original (or target_dir) with conflict-free names.
+
+    Existing names are read once per target directory instead of probing
+    os.path.exists for every candidate name.
+    """
+    taken = {}
+    tasks = []
+    for entry in entries:
+        if not os.path.lexists(entry.archived):
+            continue
+        dest_dir = target_dir or os.path.dirname(entry.original)
+        if dest_dir not in taken:
+            taken[dest_dir] = _existing_names(dest_dir)
+        name = _free_name(entry.name, taken[dest_dir])
+
+        tasks.append(MoveTask(name=entry.name, src=entry.archived, dst=os.path.join(dest_dir, name),
+                              size=entry.size, is_dir=entry.is_dir, mtime=entry.mtime))
+    return tasks
+
+
+def restore_snapshot(manifest_path: str, engine: MoverEngine, entries: Optional[List[ManifestEntry]] = None,
+                     target_dir: Optional[str] = None) -> MoveResult:
+    """Move a snapshot (or the given subset of its entries) back in one batch"""
+    if entries is None:
+        entries = load_manifest(manifest_path)
+    tasks = plan_restore(entries, target_dir)
+    if not tasks:
+        return MoveResult()
+
+    dest_dir = target_dir or os.path.dirname(tasks[0].dst)
+    os.makedirs(dest_dir, exist_ok=True)
+    restore_log = _RestoreLog(manifest_path)
+    try:
+        return engine.run(tasks, dest_dir, journal=restore_log)
+    finally:
+        restore_log.close()
+
+
+# --- Incremental desktop watcher ---
+
+def _start_event_observer(source_dir: str, wake_event: threading.Event):
+    """Started watchdog observer that sets wake_event on any change in source_dir.
+
+    watchdog is optional and imported here, so the --cli and --background-run
+    paths that import this module never load it; ImportError means polling only.
+    """
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+
+    class _WakeHandler(FileSystemEventHandler):
+        """Forwards any filesystem event to the watcher loop"""
+
+        def on_any_event(self, event):
+            wake_event.set()
+
+    observer = Observer()
+    observer.schedule(_WakeHandler(), source_dir, recursive=False)
+    observer.start()
+    return observer
+
+
+class DesktopWatcher:
+    """Keeps a live move plan of a directory, updated incrementally in the background.
+
+    Uses watchdog events when available and periodic os.scandir polling
+    otherwise (the poll also runs as a safety net with events). Only entries
+    whose size and mtime have been stable for `debounce` seconds are planned,
+    so a file that is still being written (e.g. a browser download) stays
+    out of the plan. No file handles are kept open between scans.
+    """
+
+    MIN_SCAN_GAP = 0.5  # seconds; coalesces event bursts into one rescan
+
+    def __init__(self, source_dir: str, rules: FilterRules, debounce: float = 2.0,
+                 poll_interval: float = 5.0, use_events: bool = True):
+        self.source_dir = source_dir
+        self.rules = rules
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_events = use_events
+        # name -> (signature, stable_since, PlanEntry)
+        self._entries: Dict[str, tuple] = {}
+        self._scanned = False
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._observer = None
+
+    @property
+    def backend(self) -> str:
+        return "events" if self._observer is not None else "polling"
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        if self.use_events:
+            try:
+                self._observer = _start_event_observer(self.source_dir, self._wake_event)
+            except Exception:  # watchdog missing or the directory cannot be watched
+                self._observer = None
+        self._thread = threading.Thread(target=self._loop, name="desktop-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+                self._observer.join(2.0)
+            except Exception:
+                pass
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+
+    def update_rules(self, rules: FilterRules):
+        """Apply new filter settings; every entry is reclassified on the next scan"""
+        with self._lock:
+            self.rules = rules
+            self._entries = {name: (None, since, plan_entry)
+                             for name, (_, since, plan_entry) in self._entries.items()}
+        self._wake_event.set()
+
+    def current_plan(self) -> Optional[MovePlan]:
+        """Plan with settled entries only, or None before the first scan finished.
+
+        An entry is settled when it has not changed for `debounce` seconds,
+        either as observed by the watcher or according to its own mtime.
+        """
+        now = time.monotonic()
+        wall_now = time.time()
+        plan = MovePlan(source_dir=self.source_dir)
+        with self._lock:
+            if not self._scanned:
+                return None
+            for signature, since, plan_entry in self._entries.values():
+                if plan_entry is None:
+                    continue
+                if now - since >= self.debounce or wall_now - plan_entry.mtime >= self.debounce:
+                    plan.entries.append(plan_entry)
+        return plan
+
+    def plan_now(self) -> Optional[MovePlan]:
+        """current_plan() after one more incremental scan, for the run that is about to start.
+
+        Entries deleted, renamed or created since the last poll are accounted
+        for; None when the directory cannot be listed (plan it from scratch then).
+        """
+        try:
+            self.scan()
+        except OSError:
+            return None
+        return self.current_plan()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.scan()
+            except OSError:
+                pass
+            # Wait for an event or the next poll, then let a burst of events settle
+            self._wake_event.wait(self.poll_interval)
+            self._wake_event.clear()
+            self._stop_event.wait(self.MIN_SCAN_GAP)
+
+    def scan(self):
+        """One incremental pass: only new or changed entries are reclassified"""
+        now = time.monotonic()
+        seen = {}
+        with os.scandir(self.source_dir) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                    signature = (st.st_size, st.st_mtime_ns, entry.is_dir())
+                except OSError:
+                    continue
+                seen[entry.name] = (entry, signature)
+
+        with self._lock:
+            rules = self.rules
+            entries = {}
+            for name, (entry, signature) in seen.items():
+                previous = self._entries.get(name)
+                if previous is not None and previous[0] == signature:
+                    entries[name] = previous
+                elif previous is not None and previous[0] is None:
+                    # Rules changed: reclassify, but the file itself has not changed
+                    entries[name] = (signature, previous[1], classify_entry(entry, rules))
+                else:
+                    entries[name] = (signature, now, classify_entry(entry, rules))
+            self._entries = entries
+            self._scanned = True
+
+
+# --- Headless command line entry point ---
+
+CLI_CONFIG_FILE = os.path.join(os.path.expanduser("~"), ".DesktopOrganizer", "config.yaml")
+
+EXIT_OK, EXIT_ERRORS, EXIT_CONFIG = 0, 1, 2
+
+
+def _merge_settings(base: dict, updates: dict) -> dict:
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge_settings(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def load_cli_settings(path: str) -> dict:
+    """Read the GUI config file (YAML) over the mover defaults; missing file means defaults"""
+    settings = {
+        'drives': {'main_drive_policy': 'D'},
+        'file_manager': copy.deepcopy(DEFAULT_FILE_MANAGER_SETTINGS),
+        'mover': dict(DEFAULT_MOVER_SETTINGS),
+    }
+    if not os.path.exists(path):
+        return settings
+    import yaml  # only needed when a config file is present
+    with open(path, 'r', encoding='utf-8') as f:
+        loaded = yaml.safe_load(f) or {}
+    return _merge_settings(settings, loaded)
+
+
+def resolve_archive_base(settings: dict) -> Optional[str]:
+    """'<drive>:\\Робочі столи' for the configured drive policy, falling back to D: then E:"""
+    if sys.platform != 'win32':
+        return None
+    policy = settings.get('drives', {}).get('main_drive_policy', 'D')
+    candidates = [policy] if len(policy) == 1 else []
+    candidates += [d for d in ('D', 'E') if d not in candidates]
+    for drive in candidates:
+        if os.path.exists(f"{drive}:\\"):
+            return os.path.join(f"{drive}:\\", ARCHIVE_FOLDER_NAME)
+    return None
+
+
+class CliReporter:
+    """Writes run events either as JSON lines or as plain log lines"""
+
+    def __init__(self, as_json: bool, stream=None):
+        self.as_json = as_json
+        self.stream = stream or sys.stdout
+
+    def emit(self, event: str, text: str = "", **fields):
+        if self.as_json:
+            record = {'event': event, 'time': round(time.time(), 3)}
+            record.update(fields)
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        elif text:
+            self.stream.write(text + "\n")
+        self.stream.flush()
+
+    def progress(self, progress: MoveProgress):
+        for message in progress.messages:
+            self.emit('message', message, message=message)
+        self.emit('progress', format_progress(progress), total=progress.total, completed=progress.completed,
+                  moved=progress.moved, errors=progress.errors, bytes_total=progress.bytes_total,
+                  bytes_done=progress.bytes_done, elapsed=round(progress.elapsed, 3), final=progress.final)
+
+
+def cli_main(argv: Optional[List[str]] = None) -> int:
+    """Run one organise pass synchronously; returns the process exit code"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Desktop Organizer - headless organise run without the GUI",
+    )
+    parser.add_argument('--cli', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--source', default=os.path.join(os.path.expanduser("~"), "Desktop"),
+                        help='Folder to organise (default: ~/Desktop)')
+    parser.add_argument('--dest-base', help=f'Archive root instead of <drive>:\\{ARCHIVE_FOLDER_NAME} from the config')
+    parser.add_argument('--settings', default=CLI_CONFIG_FILE, help='Config file (default: %(default)s)')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the plan, move nothing')
+    parser.add_argument('--json', action='store_true', help='Write JSON lines instead of text')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='Do not finish interrupted runs found in the archive first')
+    args = parser.parse_args(argv)
+
+    out = CliReporter(args.json)
+    try:
+        settings = load_cli_settings(args.settings)
+    except Exception as e:
+        out.emit('error', f"❌ Помилка читання налаштувань {args.settings}: {e}", message=str(e))
+        return EXIT_CONFIG
+
+    base_path = args.dest_base or resolve_archive_base(settings)
+    if not base_path:
+        out.emit('error', "❌ Немає доступного диска для архіву (вкажіть --dest-base)", message="no archive drive")
+        return EXIT_CONFIG
+    if not os.path.isdir(args.source):
+        out.emit('error', f"❌ Папка робочого столу не знайдена за шляхом {args.source}", message="source not found")
+        return EXIT_CONFIG
+
+    engine = engine_from_settings(settings, out.progress)
+    errors = 0
+
+    if not args.no_resume and not args.dry_run:
+        for journal_path in find_incomplete_journals([base_path]):
+            state = load_journal(journal_path)
+            out.emit('resume', f"🔁 Відновлення перерваного запуску: {state.dest}",
+                     journal=journal_path, dest=state.dest, remaining=len(state.remaining))
+            result = resume_with_manifest(
+                state, engine, with_hash=settings.get('mover', {}).get('manifest_hash', False),
+                on_manifest_error=lambda e: out.emit('warning', f"⚠️ Не вдалося записати маніфест відновлення: {e}",
+                                                     dest=state.dest, message=str(e)))
+            errors += result.errors
+
+    rules = FilterRules.from_settings(settings.get('file_manager', DEFAULT_FILE_MANAGER_SETTINGS))
+    plan = plan_directory(args.source, rules)
+    dest_path = snapshot_destination(base_path)
+    moves = plan.moves
+    out.emit('plan', f"📋 План: {len(moves)} до переміщення, {len(plan.entries) - len(moves)} пропущено",
+             source=args.source, dest=dest_path, move=len(moves),
+             keep=len(plan.by_action(PlanAction.KEEP)), skip=len(plan.by_action(PlanAction.SKIP)))
+    for entry in plan.entries:
+        if entry.action != PlanAction.MOVE or args.dry_run:
+            out.emit('entry', f"{'➡️' if entry.action == PlanAction.MOVE else '⏭️'} {entry.reason}: {entry.name}",
+                     name=entry.name, action=entry.action, reason=entry.reason, size=entry.size)
+
+    if args.dry_run or not moves:
+        out.emit('summary', "✅ Нічого не переміщено", moved=0, errors=errors, dest=None, dry_run=args.dry_run)
+        return EXIT_ERRORS if errors else EXIT_OK
+
+    os.makedirs(dest_path, exist_ok=True)
+    result = execute_plan(plan, dest_path, engine)
+    if result.succeeded:
+        write_manifest(args.source, dest_path, result.succeeded,
+                       with_hash=settings.get('mover', {}).get('manifest_hash', False))
+    errors += result.errors
+    out.emit('summary', f"✅ Переміщено: {result.moved}, помилок: {errors} → {dest_path}",
+             moved=result.moved, errors=errors, bytes=result.bytes_moved, elapsed=round(result.elapsed, 3),
+             cancelled=result.cancelled, dest=dest_path, failed=result.failed)
+    return EXIT_ERRORS if errors or result.cancelled else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(cli_main())
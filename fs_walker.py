@@ -0,0 +1,253 @@
+"""Parallel directory walker shared by the file scanner, archive index and installer search.
+
+Lists directory trees with os.scandir on a pool of threads, so the latency of
+slow disks and network shares overlaps instead of adding up one directory at a
+time. Directories are handed out through a shared LIFO work queue (depth first,
+which keeps the queue short); a directory's batch is always delivered before
+the batches of its subdirectories. Results come back on the calling thread,
+either as one batch per directory (walk) or as per-entry callbacks (run).
+This module must not import PyQt5.
+"""
+
+import fnmatch
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_WALK_WORKERS = 8
+RESULT_QUEUE_PER_WORKER = 64  # finished batches buffered per worker before listing pauses
+
+
+@dataclass
+class WalkBatch:
+    """Listing of one directory; entries keep the stat results cached by their worker"""
+    path: str
+    depth: int
+    dirs: List[os.DirEntry] = field(default_factory=list)
+    files: List[os.DirEntry] = field(default_factory=list)
+    ignored: int = 0  # entries left out by the ignore rules
+    error: Optional[OSError] = None
+
+
+@dataclass
+class WalkStats:
+    """Totals of a completed or cancelled walk"""
+    dirs: int = 0
+    files: int = 0
+    ignored: int = 0
+    errors: int = 0
+    cancelled: bool = False
+
+
+class _NamePatterns:
+    """Case-insensitive fnmatch patterns; plain names are matched with a set lookup"""
+
+    def __init__(self, patterns: Iterable[str]):
+        patterns = [p.lower() for p in patterns or ()]
+        self.names = {p for p in patterns if not any(c in p for c in '*?[')}
+        self.globs = [p for p in patterns if p not in self.names]
+
+    def __bool__(self) -> bool:
+        return bool(self.names or self.globs)
+
+    def match(self, name: str) -> bool:
+        name = name.lower()
+        return name in self.names or any(fnmatch.fnmatchcase(name, p) for p in self.globs)
+
+
+class _Done:
+    """Marks the end of the result stream"""
+
+
+class DirectoryWalker:
+    """Walks directory trees with os.scandir on a pool of threads.
+
+    ignore_dirs/ignore_files are case-insensitive names or glob patterns;
+    ignored entries are left out of the batches and not descended into.
+    max_depth limits descent (0 lists only the roots). should_descend(entry)
+    can veto single subdirectories; should_stop() cancels the walk. With
+    stat_entries the workers stat every entry, so later entry.stat() calls on
+    the consumer side are served from the DirEntry cache.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WALK_WORKERS, ignore_dirs: Iterable[str] = (),
+                 ignore_files: Iterable[str] = (), max_depth: Optional[int] = None,
+                 follow_symlinks: bool = False, stat_entries: bool = False,
+                 should_descend: Optional[Callable[[os.DirEntry], bool]] = None,
+                 should_stop: Optional[Callable[[], bool]] = None):
+        self.workers = max(1, int(workers or 1))
+        self.ignore_dirs = _NamePatterns(ignore_dirs)
+        self.ignore_files = _NamePatterns(ignore_files)
+        self.max_depth = max_depth
+        self.follow_symlinks = follow_symlinks
+        self.stat_entries = stat_entries
+        self.should_descend = should_descend
+        self.should_stop = should_stop
+        self._stop_event = threading.Event()
+        self.completed = False  # True once the last walk listed everything it was asked to
+
+    def stop(self):
+        """Cancel a running walk; batches already listed are still delivered"""
+        self._stop_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set() or bool(self.should_stop and self.should_stop())
+
+    def walk(self, *roots: str) -> Iterator[WalkBatch]:
+        """One batch per directory below the given roots, in completion order"""
+        self._stop_event.clear()
+        self.completed = False
+        work = queue.LifoQueue()
+        results = queue.Queue(maxsize=self.workers * RESULT_QUEUE_PER_WORKER)
+        pending = [0]
+        lock = threading.Lock()
+
+        def push(path: str, depth: int):
+            with lock:
+                pending[0] += 1
+            work.put((path, depth))
+
+        def put_result(item) -> bool:
+            while not self._stop_event.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker():
+            while True:
+                item = work.get()
+                if item is None:
+                    return
+                path, depth = item
+                try:
+                    if not self.stopped:
+                        batch = self._list(path, depth)
+                        # The parent's batch goes out before any of its subdirectories is queued
+                        if put_result(batch):
+                            if self.max_depth is None or depth < self.max_depth:
+                                for entry in batch.dirs:
+                                    if self._descend(entry):
+                                        push(entry.path, depth + 1)
+                finally:
+                    with lock:
+                        pending[0] -= 1
+                        finished = pending[0] == 0
+                    if finished:
+                        put_result(_Done)
+
+        roots = [os.path.normpath(root) for root in roots]
+        if not roots:
+            return
+        for root in roots:
+            push(root, 0)
+        threads = [threading.Thread(target=worker, name=f"walker-{i}", daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        completed = False
+        try:
+            while True:
+                try:
+                    item = results.get(timeout=0.1)
+                except queue.Empty:
+                    if self.stopped:
+                        break
+                    continue
+                if item is _Done:
+                    completed = not self.stopped  # workers skip listing once stopped
+                    break
+                yield item
+                if self.stopped:
+                    break
+        finally:
+            self.completed = completed
+            self._stop_event.set()
+            for _ in threads:
+                work.put(None)  # LIFO: the workers see these before any leftover directories
+            if completed:
+                for thread in threads:
+                    thread.join()
+
+    def run(self, *roots: str, on_file: Optional[Callable[[os.DirEntry, int], None]] = None,
+            on_dir: Optional[Callable[[os.DirEntry, int], None]] = None,
+            on_error: Optional[Callable[[str, OSError], None]] = None) -> WalkStats:
+        """Walk the roots and call the callbacks per entry on the calling thread"""
+        stats = WalkStats()
+        for batch in self.walk(*roots):
+            if batch.error is not None:
+                stats.errors += 1
+                if on_error:
+                    on_error(batch.path, batch.error)
+                continue
+            stats.dirs += len(batch.dirs)
+            stats.files += len(batch.files)
+            stats.ignored += batch.ignored
+            depth = batch.depth + 1
+            if on_dir:
+                for entry in batch.dirs:
+                    on_dir(entry, depth)
+            if on_file:
+                for entry in batch.files:
+                    on_file(entry, depth)
+        stats.cancelled = not self.completed
+        return stats
+
+    def _list(self, path: str, depth: int) -> WalkBatch:
+        batch = WalkBatch(path, depth)
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if self.ignore_dirs and self.ignore_dirs.match(entry.name):
+                            batch.ignored += 1
+                            continue
+                        batch.dirs.append(entry)
+                    else:
+                        if self.ignore_files and self.ignore_files.match(entry.name):
+                            batch.ignored += 1
+                            continue
+                        batch.files.append(entry)
+                    if self.stat_entries:
+                        try:
+                            entry.stat()
+                        except OSError:
+                            pass  # the consumer's own stat call reports it
+        except OSError as e:
+            batch.error = e
+        return batch
+
+    def _descend(self, entry: os.DirEntry) -> bool:
+        if not self.follow_symlinks:
+            try:
+                if entry.is_symlink():
+                    return False
+            except OSError:
+                return False
+        return self.should_descend is None or self.should_descend(entry)
+
+
+def stat_paths(paths: Iterable[str], workers: int = DEFAULT_WALK_WORKERS) -> Dict[str, Optional[os.stat_result]]:
+    """os.stat of many paths on a thread pool; None for paths that cannot be stat'ed"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _stat(path):
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    paths = list(paths)
+    if len(paths) < 2 or workers <= 1:
+        return {path: _stat(path) for path in paths}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="walker-stat") as pool:
+        return dict(zip(paths, pool.map(_stat, paths, chunksize=64)))
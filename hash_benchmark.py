@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Hash Benchmark - digest throughput of the duplicate finder on this machine
+
+Hashes one file with every digest algorithm the duplicate finder offers
+(sha256, blake2b, xxh3_128 when the xxhash package is installed) and times a
+byte-by-byte comparison of two copies, reporting MB/s for each. The file is
+read once before timing, so the numbers show CPU throughput with a warm page
+cache; disk speed is the upper bound for a real scan.
+
+Usage:
+    python hash_benchmark.py
+    python hash_benchmark.py --size-mb 1024 --runs 5
+    python hash_benchmark.py --file "D:/Архів/video.mp4" --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from typing import Dict
+
+# The duplicate finder lives in the modules directory next to this script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "modules"))
+from desktop_cleanup_helper import (  # noqa: E402
+    DIGEST_ALGORITHMS, HASH_BUFFER_SIZE, XXHASH_AVAILABLE, hash_file_content
+)
+from link_dedupe import same_content  # noqa: E402
+
+
+def best_of(runs: int, func, *args) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def write_sample(path: str, size_mb: int):
+    """Random content, so no algorithm gets an easy input"""
+    chunk = os.urandom(1024 * 1024)
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(chunk)
+
+
+def run_benchmark(path: str, runs: int) -> Dict:
+    size = os.path.getsize(path)
+    mb = size / (1024 * 1024)
+    results = {}
+
+    hash_file_content(path, DIGEST_ALGORITHMS['sha256'])  # warm the page cache
+    for name, new_digest in DIGEST_ALGORITHMS.items():
+        seconds = best_of(runs, hash_file_content, path, new_digest)
+        results[name] = {'seconds': round(seconds, 4), 'mb_per_s': round(mb / max(seconds, 1e-9), 1)}
+
+    # Byte comparison reads two files; MB/s is given per compared file, like the digests
+    with tempfile.TemporaryDirectory() as temp_dir:
+        copy_path = os.path.join(temp_dir, "copy.bin")
+        shutil.copyfile(path, copy_path)
+        same_content(path, copy_path, HASH_BUFFER_SIZE)
+        seconds = best_of(runs, same_content, path, copy_path, HASH_BUFFER_SIZE)
+        results['byte-compare'] = {'seconds': round(seconds, 4), 'mb_per_s': round(mb / max(seconds, 1e-9), 1)}
+
+    return {'file_bytes': size, 'results': results}
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Hash Benchmark - digest throughput of the duplicate finder on this machine",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--file', help='Existing file to hash (default: a random temporary file)')
+    parser.add_argument('--size-mb', type=int, default=256, help='Size of the temporary file in MB')
+    parser.add_argument('--runs', type=int, default=3, help='Timed runs per algorithm (best is reported)')
+    parser.add_argument('--output', help='JSON results file')
+    args = parser.parse_args()
+
+    if not XXHASH_AVAILABLE:
+        print("xxhash is not installed: xxh3_128 is skipped (pip install xxhash)\n")
+
+    if args.file:
+        report = run_benchmark(args.file, args.runs)
+    else:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sample = os.path.join(temp_dir, "sample.bin")
+            write_sample(sample, args.size_mb)
+            report = run_benchmark(sample, args.runs)
+
+    report.update({
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'buffer_bytes': HASH_BUFFER_SIZE,
+    })
+    print(f"{report['file_bytes'] / (1024 * 1024):.0f} MB, best of {args.runs}:")
+    for name, r in report['results'].items():
+        print(f"  {name:<14} {r['mb_per_s']:>9.1f} MB/s  ({r['seconds']:.3f} s)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nResults saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""Persistent cache of file content digests shared by the duplicate finder,
+the restore manifest and the NGIT packer.
+
+Digests are stored per (path, kind) together with the file's size, mtime and
+inode at hashing time; a lookup is only answered when all three still match,
+so a repeat scan of an unchanged archive costs one stat per file. "kind" names
+the digest, e.g. "sha256" or "sha256-ends64k" for a head/tail sample. The least
+recently used rows are evicted once the cache grows past its size cap.
+This module must not import PyQt5.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+HASH_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".DesktopOrganizer", "hash_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = 500000
+WRITE_BATCH = 500  # buffered inserts/touches before they are written
+
+
+class HashCache:
+    """SQLite-backed digest cache keyed by path and validated by size/mtime/inode.
+
+    One connection is shared by the threads of a run (guarded by a lock);
+    writes are buffered and committed in batches and by close().
+    """
+
+    # Files modified this recently may still change within the same mtime tick
+    SETTLE_SECONDS = 2.0
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path: str = HASH_CACHE_FILE, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes: Dict[Tuple[str, str], Tuple] = {}
+        self._touched: Dict[Tuple[str, str], int] = {}
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        try:
+            self._conn = self._open()
+        except sqlite3.DatabaseError:
+            # The cache only saves work: a damaged file is dropped and rebuilt
+            os.remove(db_path)
+            self._conn = self._open()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                if conn.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+                    conn.execute("DROP TABLE IF EXISTS digests")
+                    conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS digests (
+                        path TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        inode INTEGER NOT NULL,
+                        digest TEXT NOT NULL,
+                        used INTEGER NOT NULL,
+                        PRIMARY KEY (path, kind)
+                    );
+                    CREATE INDEX IF NOT EXISTS digests_used ON digests(used);
+                """)
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def __enter__(self) -> "HashCache":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _matches(row, st: os.stat_result) -> bool:
+        size, mtime_ns, inode = row
+        return size == st.st_size and mtime_ns == st.st_mtime_ns and inode == st.st_ino
+
+    def get(self, path: str, kind: str, st: Optional[os.stat_result] = None,
+            also_known_as: Optional[str] = None) -> Optional[str]:
+        """Cached digest of path, or None when unknown or the file changed since.
+
+        also_known_as is a former path of the same file (e.g. before a rename);
+        its digest is reused when size, mtime and a non-zero inode still match.
+        """
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return None
+        key = (path, kind)
+        with self._lock:
+            pending = self._writes.get(key)
+            if pending is not None and self._matches(pending[:3], st):
+                self.hits += 1
+                return pending[3]
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, digest FROM digests WHERE path = ? AND kind = ?", key).fetchone()
+            if row is not None and self._matches(row[:3], st):
+                self.hits += 1
+                self._touch(key)
+                return row[3]
+            if also_known_as and st.st_ino:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, inode, digest FROM digests WHERE path = ? AND kind = ?",
+                    (also_known_as, kind)).fetchone()
+                if row is not None and self._matches(row[:3], st):
+                    self.hits += 1
+                    self._queue_write(key, st, row[3])
+                    return row[3]
+            self.misses += 1
+        return None
+
+    def put(self, path: str, kind: str, digest: str, st: os.stat_result):
+        """Remember digest for path as of stat result st (taken before hashing)"""
+        if time.time() - st.st_mtime < self.SETTLE_SECONDS:
+            return  # could still change without a new mtime
+        with self._lock:
+            self._queue_write((path, kind), st, digest)
+
+    def digest(self, path: str, kind: str, compute: Callable[[str], Optional[str]],
+               st: Optional[os.stat_result] = None, also_known_as: Optional[str] = None) -> Optional[str]:
+        """Cached digest of path, computed with compute(path) and stored on a miss"""
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return None
+        cached = self.get(path, kind, st, also_known_as)
+        if cached is not None:
+            return cached
+        value = compute(path)
+        if value is not None:
+            self.put(path, kind, value, st)
+        return value
+
+    def _queue_write(self, key: Tuple[str, str], st: os.stat_result, digest: str):
+        self._writes[key] = (st.st_size, st.st_mtime_ns, st.st_ino, digest)
+        self._touched.pop(key, None)
+        if len(self._writes) >= WRITE_BATCH:
+            self._flush_locked()
+
+    def _touch(self, key: Tuple[str, str]):
+        self._touched[key] = time.time_ns()
+        if len(self._touched) >= WRITE_BATCH:
+            self._flush_locked()
+
+    def flush(self):
+        """Write buffered digests and access times"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._writes and not self._touched:
+            return
+        now = time.time_ns()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO digests (path, kind, size, mtime_ns, inode, digest, used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(path, kind, *values, now) for (path, kind), values in self._writes.items()])
+            self._conn.executemany(
+                "UPDATE digests SET used = ? WHERE path = ? AND kind = ?",
+                [(used, path, kind) for (path, kind), used in self._touched.items()])
+        self._writes.clear()
+        self._touched.clear()
+
+    def evict(self) -> int:
+        """Drop the least recently used rows above max_entries; returns the number removed"""
+        with self._lock:
+            self._flush_locked()
+            count = self._conn.execute("SELECT count(*) FROM digests").fetchone()[0]
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM digests WHERE rowid IN (SELECT rowid FROM digests ORDER BY used LIMIT ?)",
+                    (excess,))
+            return excess
+
+    def close(self):
+        """Flush, apply the size cap and close the connection"""
+        if self._conn is None:
+            return
+        try:
+            self.evict()
+        finally:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,231 @@
+"""Space reclaiming for confirmed duplicates: copies are replaced by links.
+
+Each group keeps its first file; every other file of the group is replaced
+by a hardlink to it or by a reflink (a copy-on-write clone that shares data
+blocks but keeps its own metadata) where the filesystem supports one. Every
+path stays in place. A replacement is built next to the target under a
+temporary name and moved over it with os.replace, so an interruption leaves
+either the old file or the link, never neither. plan_dedupe() is the dry run;
+apply_dedupe() runs the same plan.
+This module must not import PyQt5.
+"""
+
+import os
+import shutil
+import stat
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+
+COMPARE_BUFFER = 4 * 1024 * 1024
+FICLONE = 0x40049409  # Linux ioctl: clone a whole file (Btrfs, XFS, bcachefs)
+
+
+class LinkMode:
+    """How duplicates are replaced"""
+    AUTO = "auto"  # reflink where supported, otherwise hardlink
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+
+
+class LinkStatus:
+    PLANNED = "planned"
+    LINKED = "linked"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+@dataclass
+class LinkAction:
+    """Replacement of one duplicate by a link to the kept file"""
+    keep: str
+    target: str
+    size: int
+    reclaim: int  # bytes freed once the target's own data is released
+    status: str = LinkStatus.PLANNED
+    method: str = ""
+    reason: str = ""
+
+
+@dataclass
+class DedupeReport:
+    """Outcome of a dry run or a real run"""
+    mode: str
+    dry_run: bool
+    actions: List[LinkAction] = field(default_factory=list)
+
+    def _with_status(self, status: str) -> List[LinkAction]:
+        return [a for a in self.actions if a.status == status]
+
+    @property
+    def planned(self) -> List[LinkAction]:
+        return self._with_status(LinkStatus.PLANNED)
+
+    @property
+    def linked(self) -> List[LinkAction]:
+        return self._with_status(LinkStatus.LINKED)
+
+    @property
+    def skipped(self) -> List[LinkAction]:
+        return self._with_status(LinkStatus.SKIPPED)
+
+    @property
+    def failed(self) -> List[LinkAction]:
+        return self._with_status(LinkStatus.FAILED)
+
+    @property
+    def bytes_reclaimable(self) -> int:
+        return sum(a.reclaim for a in self.planned)
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return sum(a.reclaim for a in self.linked)
+
+
+def reflink_supported() -> bool:
+    """Whether this platform has a reflink call (the filesystem may still refuse it)"""
+    return sys.platform.startswith("linux") or sys.platform == "darwin"
+
+
+def reflink(src: str, dst: str):
+    """Create dst as a copy-on-write clone of src; raises OSError when unsupported"""
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(src, 'rb') as fsrc:
+            fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            try:
+                fcntl.ioctl(fd, FICLONE, fsrc.fileno())
+            except OSError:
+                os.close(fd)
+                os.unlink(dst)
+                raise
+            os.close(fd)
+    elif sys.platform == "darwin":
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), dst)
+    else:
+        raise OSError(f"Reflinks are not supported on {sys.platform}")
+
+
+def _plan_action(keep: str, keep_st: os.stat_result, target: str, mode: str) -> LinkAction:
+    try:
+        st = os.stat(target)
+    except OSError as e:
+        return LinkAction(keep, target, 0, 0, LinkStatus.SKIPPED, reason=f"недоступний: {e}")
+    action = LinkAction(keep, target, st.st_size, 0)
+    if not stat.S_ISREG(st.st_mode):
+        action.status, action.reason = LinkStatus.SKIPPED, "не звичайний файл"
+    elif st.st_size != keep_st.st_size:
+        action.status, action.reason = LinkStatus.SKIPPED, "розмір змінився після пошуку"
+    elif st.st_dev != keep_st.st_dev:
+        action.status, action.reason = LinkStatus.SKIPPED, "інший диск"
+    elif st.st_ino and st.st_ino == keep_st.st_ino:
+        action.status, action.reason = LinkStatus.SKIPPED, "вже пов'язаний"
+    else:
+        # A target with other hardlinks keeps its data after this name is replaced
+        action.method = mode
+        action.reclaim = st.st_size if st.st_nlink <= 1 else 0
+    return action
+
+
+def plan_dedupe(groups: Iterable[List[str]], mode: str = LinkMode.AUTO) -> DedupeReport:
+    """Dry run: what each group would link and how many bytes that frees"""
+    report = DedupeReport(mode=mode, dry_run=True)
+    for group in groups:
+        files = list(dict.fromkeys(group))
+        if len(files) < 2:
+            continue
+        keep = files[0]
+        try:
+            keep_st = os.stat(keep)
+        except OSError as e:
+            report.actions.extend(LinkAction(keep, target, 0, 0, LinkStatus.SKIPPED,
+                                             reason=f"файл-оригінал недоступний: {e}") for target in files[1:])
+            continue
+        report.actions.extend(_plan_action(keep, keep_st, target, mode) for target in files[1:])
+    return report
+
+
+def same_content(first: str, second: str, buffer_size: int = COMPARE_BUFFER,
+                 on_read: Optional[Callable[[int], None]] = None) -> bool:
+    """Byte comparison of two files chunk by chunk; raises OSError.
+
+    Used before a file is replaced, so one changed since the scan is never
+    linked, and by the duplicate finder's byte verification. on_read(count)
+    gets the bytes read at each step.
+    """
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        while True:
+            chunk_a = a.read(buffer_size)
+            chunk_b = b.read(buffer_size)
+            if on_read:
+                on_read(len(chunk_a) + len(chunk_b))
+            if chunk_a != chunk_b:
+                return False
+            if not chunk_a:
+                return True
+
+
+def _temp_name(target: str) -> str:
+    directory, name = os.path.split(target)
+    return os.path.join(directory, f".{name}.{os.getpid()}.dedupe.tmp")
+
+
+def _link_one(action: LinkAction, mode: str):
+    """Build the link under a temporary name and move it over the target"""
+    temp_path = _temp_name(action.target)
+    if os.path.lexists(temp_path):
+        os.unlink(temp_path)
+    try:
+        method = LinkMode.HARDLINK
+        if mode in (LinkMode.AUTO, LinkMode.REFLINK):
+            try:
+                reflink(action.keep, temp_path)
+                method = LinkMode.REFLINK
+            except OSError:
+                if mode == LinkMode.REFLINK:
+                    raise
+        if method == LinkMode.REFLINK:
+            # A clone has its own metadata: keep the replaced file's times and permissions
+            shutil.copystat(action.target, temp_path)
+        else:
+            os.link(action.keep, temp_path)
+        os.replace(temp_path, action.target)
+        action.method = method
+    except BaseException:
+        if os.path.lexists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def apply_dedupe(report: DedupeReport, verify: bool = True,
+                 on_progress: Optional[Callable[[int, int, LinkAction], None]] = None,
+                 should_stop: Optional[Callable[[], bool]] = None) -> DedupeReport:
+    """Carry out the planned actions of a dry run; returns the report of the real run"""
+    result = DedupeReport(mode=report.mode, dry_run=False)
+    planned = report.planned
+    for index, planned_action in enumerate(planned):
+        if should_stop and should_stop():
+            break
+        action = LinkAction(planned_action.keep, planned_action.target, planned_action.size,
+                            planned_action.reclaim, method=planned_action.method)
+        try:
+            # Re-check: the files may have changed between the dry run and now
+            checked = plan_dedupe([[action.keep, action.target]], report.mode).actions[0]
+            if checked.status != LinkStatus.PLANNED:
+                action.status, action.reason, action.reclaim = LinkStatus.SKIPPED, checked.reason, 0
+            elif verify and not same_content(action.keep, action.target):
+                action.status, action.reason, action.reclaim = LinkStatus.SKIPPED, "вміст відрізняється", 0
+            else:
+                action.reclaim = checked.reclaim
+                _link_one(action, report.mode)
+                action.status = LinkStatus.LINKED
+        except OSError as e:
+            action.status, action.reason, action.reclaim = LinkStatus.FAILED, str(e), 0
+        result.actions.append(action)
+        if on_progress:
+            on_progress(index + 1, len(planned), action)
+    return result
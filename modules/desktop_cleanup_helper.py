@@ -28,14 +28,25 @@ import sys
 import os
 import json
 import yaml
-import shutil
 import hashlib
+import sqlite3
+import stat
+import csv
+import heapq
+import math
+import bisect
+import tempfile
+import weakref
 import threading
 import time
 import subprocess
+import importlib.util
+from array import array
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
+from contextlib import contextmanager
 import humanize
 
 from PyQt5.QtWidgets import (
@@ -45,12 +56,13 @@ from PyQt5.QtWidgets import (
     QGroupBox, QSplitter, QTableWidget, QTableWidgetItem,
     QHeaderView, QMessageBox, QFileDialog, QFrame, QGridLayout,
     QScrollArea, QSizePolicy, QSlider, QDateEdit, QDialog, QMenu, QListWidget, QListWidgetItem,
-    QApplication, QToolTip
+    QApplication, QToolTip, QTreeView, QStackedWidget, QAbstractItemView
 )
 from PyQt5.QtCore import (
-    Qt, QThread, pyqtSignal, QTimer, QDate, QMutex, QMutexLocker, QRect, QPropertyAnimation, QEasingCurve
+    Qt, QThread, pyqtSignal, QTimer, QDate, QMutex, QMutexLocker, QRect, QPropertyAnimation, QEasingCurve,
+    QAbstractItemModel, QModelIndex
 )
-from PyQt5.QtGui import QIcon, QFont, QPixmap, QPainter, QColor, QPen, QBrush, QCursor
+from PyQt5.QtGui import QFont, QPixmap, QPainter, QColor, QPen, QBrush, QCursor
 
 # Import dependencies with fallback handling
 try:
@@ -61,6 +73,13 @@ except ImportError:
     pd = None
 
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
 try:
     from tqdm import tqdm
     TQDM_AVAILABLE = True
@@ -82,6 +101,25 @@ except ImportError:
     HUMANIZE_AVAILABLE = False
     humanize = None
 
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+    xxhash = None
+
+# GUI-free helpers of the main application (they live next to "Desctop organiser.py" and ship
+# with it, so they are required like PyQt5; near_duplicates is imported by the similarity stage)
+from fs_walker import DirectoryWalker, DEFAULT_WALK_WORKERS, stat_paths
+from progress_reporter import ProgressReporter, DEFAULT_PROGRESS_RATE_HZ
+from hash_cache import HashCache, HASH_CACHE_FILE
+from link_dedupe import LinkMode, DedupeReport, plan_dedupe, apply_dedupe, reflink_supported, same_content
+from desktop_mover import (
+    MoverEngine, ManifestEntry, load_manifest, find_snapshot_manifest, manifest_path_for,
+    plan_restore, restore_snapshot, format_progress,
+    SNAPSHOT_METADATA_PATTERNS, is_snapshot_metadata, remove_snapshot_metadata
+)
+
 class SpinningWheel(QWidget):
     """Custom spinning wheel widget"""
     def __init__(self, parent=None):
@@ -571,235 +609,744 @@ class DuplicateFinderSplashScreen(QWidget):
         self.spinning_wheel.stop_rotation()
 
 
-class ArchiveTreeBuilder(QThread):
-    """Thread for building archive tree structure"""
-    progress_updated = pyqtSignal(int, str)
-    tree_built = pyqtSignal(object)
-    error_occurred = pyqtSignal(str)
+ARCHIVE_INDEX_FILE = os.path.join(os.path.expanduser("~"), ".DesktopOrganizer", "archive_index.sqlite3")
 
-    def __init__(self, scan_path: str, search_term: str = "", filters: dict = None, parent=None):
-        super().__init__(parent)
-        self.scan_path = scan_path
-        self.search_term = search_term
-        self.filters = filters or {}
-        self.should_stop = False
 
-    def run(self):
-        """Build archive tree in background thread"""
-        try:
-            current_time = time.time()
-            use_cache = (hasattr(self.parent(), '_last_scan_path') and
-                         self.parent()._last_scan_path == self.scan_path and
-                         hasattr(self.parent(), '_file_cache') and
-                         self.parent()._file_cache and
-                         hasattr(self.parent(), '_cache_timestamp') and
-                         current_time - self.parent()._cache_timestamp < 300)
-
-            if not use_cache:
-                self.progress_updated.emit(25, "Сканування файлів")
-                self._build_file_cache()
-            else:
-                self.progress_updated.emit(50, "Використання кешу")
+class ArchiveIndex:
+    """Persistent SQLite index of the archive tree (path -> size, mtime, type, parent).
 
-            self.progress_updated.emit(75, "Побудова дерева файлів")
-            tree_widget = self._build_tree_recursive()
-            self.tree_built.emit(tree_widget)
+    Every directory keeps a fingerprint (mtime, entry count). A refresh re-lists
+    only directories whose mtime changed since the last pass; unchanged
+    directories cost one stat each. In-place edits of a file do not change its
+    directory's mtime and are picked up when that directory changes.
+    """
 
-        except Exception as e:
-            self.error_occurred.emit(str(e))
-
-    def _build_file_cache(self):
-        """Build a cache of the file structure for fast searching"""
-        if not hasattr(self.parent(), '_file_cache'):
-            self.parent()._file_cache = {}
-        if not hasattr(self.parent(), '_search_index'):
-            self.parent()._search_index = {}
-
-        self.parent()._file_cache.clear()
-        self.parent()._search_index.clear()
-        self.parent()._last_scan_path = self.scan_path
-        self.parent()._cache_timestamp = time.time()
-
-        def _scan_directory(path: str, cache_dict: dict):
-            """Recursively scan directory and build cache"""
-            try:
-                for item_name in os.listdir(path):
-                    if self.should_stop:
-                        return
+    # Directories modified this recently may still change within the same mtime tick
+    SETTLE_SECONDS = 2.0
+    SCHEMA_VERSION = 2  # 2: snapshot journals/manifests are no longer indexed
+
+    _lock = threading.Lock()
 
-                    item_path = os.path.join(path, item_name)
-                    if os.path.exists(item_path):
-                        is_dir = os.path.isdir(item_path)
+    def __init__(self, db_path: str = ARCHIVE_INDEX_FILE):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        try:
+            self._create_schema()
+        except sqlite3.DatabaseError:
+            # The index is only a cache: a damaged file is dropped and rebuilt
+            os.remove(db_path)
+            self._create_schema()
+
+    def _create_schema(self):
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+                # Older fingerprints lack entry counts or cover snapshot bookkeeping files: list every directory once more
+                conn.execute("DROP TABLE IF EXISTS dirs")
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    path TEXT PRIMARY KEY,
+                    parent TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    is_dir INTEGER NOT NULL,
+                    size INTEGER,
+                    mtime REAL
+                );
+                CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent);
+                CREATE TABLE IF NOT EXISTS dirs (
+                    path TEXT PRIMARY KEY,
+                    mtime_ns INTEGER NOT NULL,
+                    entries INTEGER NOT NULL,
+                    settled INTEGER NOT NULL
+                );
+            """)
 
-                        # Get file metadata
+    @contextmanager
+    def _connect(self):
+        """Connection for one operation: committed on success, always closed"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _subtree_range(path: str) -> Tuple[str, str]:
+        """Key range of everything below path (binary collation, separator + 1 as the upper bound)"""
+        return path + os.sep, path + chr(ord(os.sep) + 1)
+
+    def _delete_subtree(self, conn, path: str):
+        low, high = self._subtree_range(path)
+        conn.execute("DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+        conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+
+    def refresh(self, root: str, should_stop=None, workers: int = DEFAULT_WALK_WORKERS) -> Dict[str, int]:
+        """Bring the index for root up to date; returns counts of listed and reused directories"""
+        root = os.path.normpath(root)
+        stats = {'listed': 0, 'reused': 0}
+        low, high = self._subtree_range(root)
+        with self._lock, self._connect() as conn:
+            known = {path: (mtime_ns, settled) for path, mtime_ns, settled in conn.execute(
+                "SELECT path, mtime_ns, settled FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                (root, low, high))}
+
+            # Fingerprint check of every indexed directory, stat calls spread over the walker's threads
+            dir_stats = stat_paths(known, workers)
+            changed = []
+            for path in sorted(known):
+                st = dir_stats[path]
+                if st is None or not stat.S_ISDIR(st.st_mode):
+                    self._delete_subtree(conn, path)
+                elif known[path][1] and known[path][0] == st.st_mtime_ns:
+                    stats['reused'] += 1
+                else:
+                    changed.append(path)
+            if root not in known:
+                changed.append(root)
+                try:
+                    dir_stats[root] = os.stat(root)
+                except OSError:
+                    return stats
+
+            # Re-list changed directories; only directories new to the index are descended into
+            walker = DirectoryWalker(workers, stat_entries=True, should_stop=should_stop,
+                                     ignore_files=SNAPSHOT_METADATA_PATTERNS,
+                                     should_descend=lambda entry: entry.path not in known)
+            for batch in walker.walk(*changed):
+                if batch.error is not None:
+                    continue  # unreadable now; keep what was indexed before
+                directory = batch.path
+                rows = []
+                for is_dir, entries in ((1, batch.dirs), (0, batch.files)):
+                    for entry in entries:
                         try:
-                            stat_info = os.stat(item_path)
-                            file_size = stat_info.st_size
-                            modified_time = stat_info.st_mtime
-                            modified_str = datetime.fromtimestamp(modified_time).strftime("%Y-%m-%d %H:%M")
-                        except (OSError, PermissionError):
-                            file_size = None
-                            modified_time = None
-                            modified_str = "Невідомо"
-
-                        cache_dict[item_path] = {
-                            'path': item_path,
-                            'is_dir': is_dir,
-                            'name_lower': item_name.lower(),
-                            'size': file_size,
-                            'modified_timestamp': modified_time,
-                            'modified': modified_str
-                        }
-
-                        # Add to search index for faster lookups
-                        name_lower = item_name.lower()
-                        for i in range(len(name_lower)):
-                            for j in range(i + 1, min(i + 20, len(name_lower) + 1)):  # Limit substring length
-                                substring = name_lower[i:j]
-                                if substring not in self.parent()._search_index:
-                                    self.parent()._search_index[substring] = []
-                                self.parent()._search_index[substring].append(item_path)
-
-                        if is_dir:
-                            _scan_directory(item_path, cache_dict)
-
-            except (PermissionError, OSError) as e:
-                # Skip directories we can't access
-                pass
-
-        _scan_directory(self.scan_path, self.parent()._file_cache)
-
-    def _build_tree_recursive(self):
-        """Build the tree structure from cache based on filters."""
-        from PyQt5.QtWidgets import QTreeWidget, QTreeWidgetItem
-        from pathlib import Path
-
-        # Step 1: Find all paths that should be visible
-        visible_paths = set()
-        all_cached_paths = self.parent()._file_cache
-
-        # If no filters are active, show everything
-        if not self.search_term and not any(self.filters.values()):
-            visible_paths.update(all_cached_paths.keys())
+                            st = entry.stat()
+                            size, mtime = st.st_size, st.st_mtime
+                            if is_dir:
+                                dir_stats[entry.path] = st  # listed after this batch, stat taken first
+                        except OSError:
+                            size, mtime = None, None
+                        rows.append((entry.path, directory, entry.name, is_dir, size, mtime))
+
+                stats['listed'] += 1
+                current = {r[0]: r[3] for r in rows}
+                for old_path, was_dir in conn.execute(
+                        "SELECT path, is_dir FROM entries WHERE parent = ?", (directory,)).fetchall():
+                    if old_path not in current:
+                        self._delete_subtree(conn, old_path)
+                    elif was_dir and not current[old_path]:
+                        self._delete_subtree(conn, old_path)  # a folder replaced by a file
+                conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+                st = dir_stats.get(directory)
+                if st is None:
+                    continue  # its stat failed in the parent listing; listed again next time
+                settled = time.time() - st.st_mtime_ns / 1e9 >= self.SETTLE_SECONDS
+                conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                             (directory, st.st_mtime_ns, len(rows), int(settled)))
+        return stats
+
+    def fingerprint(self, root: str) -> Tuple:
+        """Fingerprint of the indexed tree below root: directory count, newest mtime, total entries.
+
+        Adding, removing or renaming anything updates its directory's mtime to the
+        newest one, and re-listings within the same mtime tick still change the entry
+        count, so an equal fingerprint means the loaded rows are still current.
+        """
+        root = os.path.normpath(root)
+        low, high = self._subtree_range(root)
+        with self._connect() as conn:
+            return tuple(conn.execute(
+                "SELECT count(*), max(mtime_ns), sum(entries) FROM dirs "
+                "WHERE path = ? OR (path >= ? AND path < ?)", (root, low, high)).fetchone())
+
+    def rows(self, root: str) -> List[Tuple]:
+        """(path, parent, name, is_dir, size, mtime) for everything below root, parents first"""
+        low, high = self._subtree_range(os.path.normpath(root))
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT path, parent, name, is_dir, size, mtime FROM entries "
+                "WHERE path >= ? AND path < ? ORDER BY path", (low, high)).fetchall()
+
+
+class NameIndex:
+    """Trigram index over lower-cased file names for substring search.
+
+    Every name gets an integer ID (the FileTable row it was added with) and
+    each distinct trigram of a name maps to a compact array of IDs. A query
+    intersects the posting lists of its own trigrams and verifies the few
+    candidates, so memory grows with the total name length instead of with
+    the number of substrings.
+    """
+
+    FUZZY_MIN_SHARE = 0.5  # share of the query's trigrams a fuzzy candidate must contain
+    FUZZY_CANDIDATE_LIMIT = 2000
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.postings: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def _trigrams(text: str) -> set:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, name: str) -> int:
+        name_lower = sys.intern(name.lower())  # shares the table's string when already lower-case
+        item_id = len(self.names)
+        self.names.append(name_lower)
+        for gram in self._trigrams(name_lower):
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array('I')
+            posting.append(item_id)
+        return item_id
+
+    def search(self, term: str) -> List[int]:
+        """IDs of names containing term (case-insensitive)"""
+        term = term.lower()
+        if len(term) < 3:
+            # Too short for trigrams: a plain scan over the name pool
+            return [i for i, name in enumerate(self.names) if term in name]
+        grams = sorted(self._trigrams(term), key=lambda g: len(self.postings.get(g, ())))
+        ids = set(self.postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not ids:
+                break
+            ids.intersection_update(self.postings.get(gram, ()))
+        return sorted(i for i in ids if term in self.names[i])
+
+    def related_ids(self, term: str, min_share: float = FUZZY_MIN_SHARE, limit: int = FUZZY_CANDIDATE_LIMIT) -> set:
+        """Candidates for fuzzy matching: up to limit IDs of names sharing most trigrams with term.
+
+        A name needs at least min_share of the term's trigrams, so common ones
+        such as "pdf" or "202" alone do not make the whole archive a candidate;
+        the limit keeps the best-sharing names.
+        """
+        grams = self._trigrams(term.lower())
+        if not grams:
+            return set()
+        needed = max(1, math.ceil(len(grams) * min_share))
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.postings.get(gram, ()))  # counted in C, no per-ID Python loop
+        return {item_id for item_id, count in counts.most_common(limit) if count >= needed}
+
+
+class FileTable:
+    """Columnar, array-backed table of cached archive entries.
+
+    Row i is described by parallel arrays (parent row, size, mtime, flags) and an
+    interned name; paths and display strings are produced on demand. Parent row
+    -1 is the table root. Rows are appended parents first.
+    """
+
+    FLAG_DIR = 1
+    UNKNOWN = -1  # size/mtime placeholder when stat failed
+
+    def __init__(self, root: str = ""):
+        self.root = os.path.normpath(root) if root else ""
+        self.names: List[str] = []
+        self.parents = array('i')
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.flags = array('B')
+        self._children: Optional[Dict[int, List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_index_rows(cls, root: str, rows) -> Tuple['FileTable', NameIndex]:
+        """Table and aligned name index from ArchiveIndex.rows() output (parents first)"""
+        table = cls(root)
+        name_index = NameIndex()
+        row_of = {table.root: -1}
+        for path, parent, name, is_dir, size, mtime in rows:
+            parent_row = row_of.get(parent)
+            if parent_row is None:
+                continue
+            row = table.add(name, parent_row, is_dir, size, mtime)
+            name_index.add(name)
+            if is_dir:
+                row_of[path] = row
+        table.build_children()  # once per refresh, in the worker thread
+        return table, name_index
+
+    def add(self, name: str, parent: int, is_dir: bool, size: Optional[int], mtime: Optional[float]) -> int:
+        self.names.append(sys.intern(name))
+        self.parents.append(parent)
+        self.sizes.append(self.UNKNOWN if size is None else size)
+        self.mtimes.append(self.UNKNOWN if mtime is None else mtime)
+        self.flags.append(self.FLAG_DIR if is_dir else 0)
+        self._children = None
+        return len(self.names) - 1
+
+    def is_dir(self, row: int) -> bool:
+        return bool(self.flags[row] & self.FLAG_DIR)
+
+    def size(self, row: int) -> Optional[int]:
+        size = self.sizes[row]
+        return None if size == self.UNKNOWN else size
+
+    def mtime(self, row: int) -> Optional[float]:
+        mtime = self.mtimes[row]
+        return None if mtime == self.UNKNOWN else mtime
+
+    def path(self, row: int) -> str:
+        parts = []
+        while row != -1:
+            parts.append(self.names[row])
+            row = self.parents[row]
+        return os.path.join(self.root, *reversed(parts))
+
+    def extension(self, row: int) -> str:
+        return os.path.splitext(self.names[row])[1].lower()
+
+    def modified_str(self, row: int) -> str:
+        mtime = self.mtime(row)
+        return datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M") if mtime is not None else "Невідомо"
+
+    def build_children(self):
+        """Parent -> children adjacency lists in display order (folders first, then by name)"""
+        children: Dict[int, List[int]] = {}
+        for child, parent in enumerate(self.parents):
+            children.setdefault(parent, []).append(child)
+        names, flags, dir_flag = self.names, self.flags, self.FLAG_DIR
+        for rows in children.values():
+            rows.sort(key=lambda r: (not flags[r] & dir_flag, names[r].lower()))
+        self._children = children
+
+    def children(self, row: int = -1) -> List[int]:
+        """Child rows of row (-1 for the root), folders first, then by lower-cased name"""
+        if self._children is None:
+            self.build_children()
+        return self._children.get(row, [])
+
+    def file_rows(self, extensions=None, min_size=None, max_size=None, min_mtime=None, max_mtime=None,
+                  rows=None) -> List[int]:
+        """Rows of files matching all given conditions; `rows` restricts the candidates"""
+        if NUMPY_AVAILABLE and rows is None and len(self.names):
+            # Vectorised over the raw column buffers, no per-row Python objects
+            mask = (np.frombuffer(self.flags, dtype=np.uint8) & self.FLAG_DIR) == 0
+            sizes = np.frombuffer(self.sizes, dtype=np.int64)
+            mtimes = np.frombuffer(self.mtimes, dtype=np.float64)
+            if min_size is not None or max_size is not None:
+                mask &= sizes != self.UNKNOWN
+            if min_size is not None:
+                mask &= sizes >= min_size
+            if max_size is not None:
+                mask &= sizes <= max_size
+            if min_mtime is not None or max_mtime is not None:
+                mask &= mtimes != self.UNKNOWN
+            if min_mtime is not None:
+                mask &= mtimes >= min_mtime
+            if max_mtime is not None:
+                mask &= mtimes <= max_mtime
+            candidates = np.flatnonzero(mask).tolist()
         else:
-            # First, find all files that match the filters
-            matching_files = set()
-            for item_path, item_data in all_cached_paths.items():
-                if item_data.get('is_dir', False):
-                    continue
+            candidates = range(len(self.names)) if rows is None else rows
+            candidates = [r for r in candidates if not self.flags[r] & self.FLAG_DIR and
+                          self._in_range(self.sizes[r], min_size, max_size) and
+                          self._in_range(self.mtimes[r], min_mtime, max_mtime)]
+        if extensions:
+            extensions = set(extensions)
+            candidates = [r for r in candidates if self.extension(r) in extensions]
+        return candidates
+
+    def _in_range(self, value, low, high) -> bool:
+        if low is None and high is None:
+            return True
+        if value == self.UNKNOWN:
+            return False
+        return (low is None or value >= low) and (high is None or value <= high)
 
-                # Apply text search on file name
-                if self.search_term and self.search_term.lower() not in item_data['name_lower']:
-                    continue
-                
-                # Apply file type filter
-                if self.filters.get('file_types'):
-                    ext = os.path.splitext(item_data['name_lower'])[1]
-                    if ext not in self.filters['file_types']:
-                        continue
-                
-                # Apply date filter
-                if item_data.get('modified_timestamp') and item_data['modified_timestamp'] is not None:
-                    ts = item_data['modified_timestamp']
-                    min_date = self.filters.get('min_date')
-                    max_date = self.filters.get('max_date')
-                    if min_date and ts < min_date.timestamp():
-                        continue
-                    if max_date and ts > max_date.timestamp():
-                        continue
-                
-                matching_files.add(item_path)
-            
-            visible_paths.update(matching_files)
 
-            # Second, add all parent directories of matching files
-            scan_path_obj = Path(self.scan_path)
-            for path_str in matching_files:
-                try:
-                    p = Path(path_str).parent
-                    while p != p.parent: # Stop at root
-                        if p in visible_paths: # Optimization
-                            break
-                        visible_paths.add(str(p))
-                        if p == scan_path_obj:
-                            break
-                        p = p.parent
-                except Exception:
-                    continue # Ignore errors from invalid paths
-            
-            # Third, add any directories that match the text search term directly
-            if self.search_term:
-                for item_path, item_data in all_cached_paths.items():
-                    if item_data.get('is_dir', False) and self.search_term.lower() in item_data['name_lower']:
-                        visible_paths.add(item_path)
-
-        # Step 2: Build the tree using only the visible paths
-        tree_widget = QTreeWidget()
-        tree_widget.clear()
-
-        def _build_level(path: str, parent_item):
-            """Recursively build tree level from visible paths."""
-            child_paths = []
-            for p in visible_paths:
-                if os.path.dirname(p) == path:
-                    child_paths.append(p)
-            
-            if not child_paths:
-                return
+class ArchiveTreeModel(QAbstractItemModel):
+    """Lazy item model of the archive browser backed by a FileTable.
 
-            child_data = [all_cached_paths[p] for p in child_paths if p in all_cached_paths]
-            child_data.sort(key=lambda x: (not x.get('is_dir', False), x.get('name_lower', '')))
+    Model rows are file table rows. Children of a folder are inserted in
+    batches through canFetchMore/fetchMore when the view expands it, so only
+    rows the view has asked for get model indexes and display strings.
+    `visible_rows` restricts the tree to search results (None shows everything).
+    """
 
-            for item_data in child_data:
-                if self.should_stop:
-                    return
+    HEADERS = ["Назва", "Розмір", "Змінено", "Тип", "Шлях"]
+    COL_NAME, COL_SIZE, COL_MODIFIED, COL_TYPE, COL_PATH = range(5)
+    FETCH_BATCH = 256
+    EXPAND_ALL_LIMIT = 2000  # expandAll() fetches every visible row
 
-                item_path = item_data['path']
-                item_name = os.path.basename(item_path)
-                is_dir = item_data['is_dir']
+    def __init__(self, table: FileTable, visible_rows: Optional[set] = None, folder_info=None,
+                 file_icon=None, file_category=None, parent=None):
+        super().__init__(parent)
+        self.table = table
+        self.visible_rows = visible_rows
+        self._folder_info = folder_info or (lambda path: {'icon': '📁', 'name': os.path.basename(path), 'type': 'Папка'})
+        self._file_icon = file_icon or (lambda path, ext: '📄')
+        self._file_category = file_category or (lambda path: "Файл")
+        self._sort_key = None  # None keeps the table order: folders first, then by name
+        self._reset_rows()
+
+    def _reset_rows(self):
+        self._visible: Dict[int, List[int]] = {}  # parent row -> visible child rows in display order
+        self._fetched: Dict[int, int] = {}        # parent row -> children inserted into the model so far
+        self._position: Dict[int, int] = {}       # row -> position under its parent
+        self._folders: Dict[int, dict] = {}       # folder row -> identify_folder_structure() result
+        self._icons: Dict[str, str] = {}
+        self._categories: Dict[str, str] = {}
+
+    # --- Row bookkeeping ---
+
+    def _row(self, index: QModelIndex) -> int:
+        return index.internalId() if index.isValid() else -1
+
+    def _visible_children(self, row: int) -> List[int]:
+        children = self._visible.get(row)
+        if children is None:
+            children = self.table.children(row)
+            if self.visible_rows is not None:
+                children = [child for child in children if child in self.visible_rows]
+            else:
+                children = list(children)  # the table's lists are shared, rows get removed from ours
+            if self._sort_key is not None:
+                key, reverse = self._sort_key
+                children.sort(key=key, reverse=reverse)
+                children.sort(key=lambda r: not self.table.is_dir(r))  # stable: folders stay first
+            self._visible[row] = children
+        return children
+
+    def _index_for(self, row: int, column: int = 0) -> QModelIndex:
+        if row == -1:
+            return QModelIndex()
+        return self.createIndex(self._position[row], column, row)
+
+    # --- QAbstractItemModel ---
+
+    def index(self, position: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        parent_row = self._row(parent)
+        if column < 0 or column >= len(self.HEADERS) or not 0 <= position < self._fetched.get(parent_row, 0):
+            return QModelIndex()
+        return self.createIndex(position, column, self._visible[parent_row][position])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        return self._index_for(self.table.parents[index.internalId()])
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return self._fetched.get(self._row(parent), 0)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.HEADERS)
 
-                tree_item = QTreeWidgetItem(parent_item)
-                tree_item.setData(0, Qt.UserRole, item_path)
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        row = self._row(parent)
+        if row != -1 and (parent.column() > 0 or not self.table.is_dir(row)):
+            return False
+        return bool(self._visible_children(row))
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        row = self._row(parent)
+        if row != -1 and not self.table.is_dir(row):
+            return False
+        return self._fetched.get(row, 0) < len(self._visible_children(row))
+
+    def fetchMore(self, parent: QModelIndex):
+        row = self._row(parent)
+        children = self._visible_children(row)
+        start = self._fetched.get(row, 0)
+        end = min(start + self.FETCH_BATCH, len(children))
+        if end <= start:
+            return
+        self.beginInsertRows(parent, start, end - 1)
+        for position in range(start, end):
+            self._position[children[position]] = position
+        self._fetched[row] = end
+        self.endInsertRows()
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and 0 <= section < len(self.HEADERS):
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.internalId()
+        if role == Qt.UserRole:
+            return self.table.path(row)
+        if role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+
+        column = index.column()
+        table = self.table
+        if column == self.COL_PATH or role == Qt.ToolTipRole:
+            return table.path(row)
+        if table.is_dir(row):
+            folder = self._folder(row)
+            if column == self.COL_NAME:
+                return f"{folder['icon']} {folder['name']}"
+            if column == self.COL_SIZE:
+                count = len(self._visible_children(row))
+                return f"Папка ({count} елементів)" if count else "Папка"
+            if column == self.COL_TYPE:
+                return folder['type']
+            return ""
+
+        extension = table.extension(row)
+        if column == self.COL_NAME:
+            icon = self._icons.get(extension)
+            if icon is None:
+                icon = self._icons[extension] = self._file_icon(table.path(row), extension)
+            return f"{icon} {table.names[row]}"
+        if column == self.COL_SIZE:
+            size = table.size(row)
+            return humanize.naturalsize(size) if size is not None else "Розмір невідомий"
+        if column == self.COL_MODIFIED:
+            return table.modified_str(row) if table.mtime(row) is not None else ""
+        if column == self.COL_TYPE:
+            category = self._categories.get(extension)
+            if category is None:
+                category = self._categories[extension] = self._file_category(table.names[row])
+            return category
+        return None
 
-                if is_dir:
-                    tree_item.setText(0, f"📁 {item_name}")
-                    tree_item.setData(1, Qt.DisplayRole, "Папка")
-                    _build_level(item_path, tree_item)
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        """Re-sort every folder level by the column; folders stay ahead of files"""
+        table = self.table
+        if column == self.COL_SIZE:
+            key = table.sizes.__getitem__
+        elif column == self.COL_MODIFIED:
+            key = table.mtimes.__getitem__
+        else:
+            key = lambda r: table.names[r].lower()
+        self.beginResetModel()
+        self._sort_key = (key, order == Qt.DescendingOrder)
+        self._reset_rows()
+        self.endResetModel()
+
+    # --- Helpers for the widget ---
+
+    def _folder(self, row: int) -> dict:
+        folder = self._folders.get(row)
+        if folder is None:
+            folder = self._folders[row] = self._folder_info(self.table.path(row))
+        return folder
+
+    def path(self, index: QModelIndex) -> str:
+        return self.table.path(index.internalId()) if index.isValid() else ""
+
+    def is_dir(self, index: QModelIndex) -> bool:
+        return index.isValid() and self.table.is_dir(index.internalId())
+
+    def counts(self) -> Dict[str, int]:
+        """Number of visible folders and files"""
+        if self.visible_rows is None:
+            folders = sum(self.table.flags)  # FLAG_DIR is the only flag
+            total = len(self.table)
+        else:
+            folders = sum(1 for row in self.visible_rows if self.table.is_dir(row))
+            total = len(self.visible_rows)
+        return {'total': total, 'files': total - folders, 'folders': folders}
+
+    def remove_paths(self, paths) -> int:
+        """Drop rows whose path is in paths (after a delete); returns the number of removed rows"""
+        paths = set(paths)
+        removed_rows = set()
+        for parent_row in list(self._visible):
+            # Folders below a removed folder are no longer reachable
+            ancestor = parent_row
+            while ancestor != -1 and ancestor not in removed_rows:
+                ancestor = self.table.parents[ancestor]
+            if ancestor != -1:
+                self._visible.pop(parent_row, None)
+                self._fetched.pop(parent_row, None)
+                continue
+
+            children = self._visible[parent_row]
+            fetched = self._fetched.get(parent_row, 0)
+            for position in range(len(children) - 1, -1, -1):
+                child = children[position]
+                if self.table.path(child) not in paths:
+                    continue
+                if position < fetched:
+                    self.beginRemoveRows(self._index_for(parent_row), position, position)
+                    del children[position]
+                    fetched -= 1
+                    self._fetched[parent_row] = fetched
+                    for moved in children[position:fetched]:
+                        self._position[moved] = self._position[moved] - 1
+                    self.endRemoveRows()
                 else:
-                    file_ext = os.path.splitext(item_name)[1].lower()
-                    icon = self._get_file_icon(file_ext)
-                    tree_item.setText(0, f"{icon} {item_name}")
-                    
-                    size_str = "Невідомо"
-                    if item_data.get('size') is not None:
-                        try:
-                            size_str = humanize.naturalsize(item_data['size'])
-                        except (TypeError, ValueError):
-                            pass
-                    tree_item.setData(1, Qt.DisplayRole, size_str)
-                    tree_item.setData(2, Qt.DisplayRole, item_data.get('modified', 'Невідомо'))
-        
-        _build_level(self.scan_path, tree_widget.invisibleRootItem())
-        return tree_widget
+                    del children[position]
+                removed_rows.add(child)
+        return len(removed_rows)
+
+
+class ScanFileList:
+    """Append-only list of scanned files, kept as (path, size, mtime) rows.
+
+    Past SPILL_THRESHOLD rows the list is written to a temporary CSV file, so
+    memory stays flat for any tree size. Iteration yields the file dicts the
+    archive browser expects; the file is removed with the list.
+    """
+
+    SPILL_THRESHOLD = 50000
+
+    def __init__(self, spill: bool = True):
+        self.spill = spill
+        self._rows: List[Tuple[str, int, float]] = []
+        self._count = 0
+        self._spill_path = None
+        self._spill_file = None
+        self._writer = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, path: str, size: int, mtime: float):
+        self._rows.append((path, size, mtime))
+        self._count += 1
+        if self.spill and len(self._rows) >= self.SPILL_THRESHOLD:
+            self._flush()
+
+    def _flush(self):
+        if self._writer is None:
+            fd, self._spill_path = tempfile.mkstemp(prefix="cleanup_scan_", suffix=".csv")
+            self._spill_file = os.fdopen(fd, 'w', newline='', encoding='utf-8', errors='surrogateescape')
+            self._writer = csv.writer(self._spill_file)
+            weakref.finalize(self, ScanFileList._remove_spill, self._spill_file, self._spill_path)
+        self._writer.writerows(self._rows)
+        self._rows = []
+
+    @staticmethod
+    def _remove_spill(spill_file, spill_path):
+        try:
+            spill_file.close()
+            os.remove(spill_path)
+        except OSError:
+            pass
 
+    def rows(self):
+        """(path, size, mtime) rows in scan order"""
+        if self._spill_path:
+            self._spill_file.flush()
+            with open(self._spill_path, newline='', encoding='utf-8', errors='surrogateescape') as f:
+                for path, size, mtime in csv.reader(f):
+                    yield path, int(size), float(mtime)
+        yield from list(self._rows)
+
+    def __iter__(self):
+        for path, size, mtime in self.rows():
+            name = os.path.basename(path)
+            try:
+                modified = datetime.fromtimestamp(mtime)
+            except (OSError, OverflowError, ValueError):
+                continue
+            yield {
+                'path': path,
+                'name': name,
+                'size': size,
+                'modified': modified,
+                'extension': os.path.splitext(name)[1],
+                'is_directory': False
+            }
 
 
-    def _get_file_icon(self, extension: str) -> str:
-        """Get appropriate icon for file extension"""
-        icon_map = {
-            '.txt': '📄', '.doc': '📝', '.docx': '📝', '.pdf': '📋',
-            '.jpg': '🖼️', '.jpeg': '🖼️', '.png': '🖼️', '.gif': '🖼️', '.bmp': '🖼️',
-            '.mp4': '🎬', '.avi': '🎬', '.mkv': '🎬', '.mov': '🎬',
-            '.mp3': '🎵', '.wav': '🎵', '.flac': '🎵', '.aac': '🎵',
-            '.zip': '🗜️', '.rar': '🗜️', '.7z': '🗜️', '.tar': '🗜️', '.gz': '🗜️',
-            '.exe': '⚙️', '.msi': '⚙️', '.bat': '⚙️', '.cmd': '⚙️',
-            '.py': '🐍', '.js': '🌐', '.html': '🌐', '.css': '🎨',
+class ScanAggregator:
+    """Streaming totals of an analytics scan.
+
+    Keeps per-extension counters, the largest files in a bounded heap, an age
+    histogram and a ScanFileList instead of one dict per file, so a scan of any
+    size needs the same memory. results() builds the dict shown by the
+    analytics tab.
+    """
+
+    LARGE_FILE_SIZE = 10 * 1024 * 1024
+    LARGE_FILES_LIMIT = 500  # rows kept for the large files table
+    OLD_FILE_DAYS = 365
+    AGE_BUCKETS = [
+        (30, "До 1 місяця"),
+        (182, "1-6 місяців"),
+        (365, "6-12 місяців"),
+        (730, "1-2 роки"),
+        (None, "Понад 2 роки"),
+    ]
+
+    def __init__(self, now: Optional[float] = None, spill: bool = True):
+        self.now = time.time() if now is None else now
+        self.total_files = 0
+        self.total_size = 0
+        self.file_types: Dict[str, Dict[str, int]] = {}
+        self.large_files_count = 0
+        self.old_files_count = 0
+        self.files = ScanFileList(spill)
+        self._large: List[Tuple[int, int, str, float, float]] = []  # min-heap by size
+        self._age_limits = [days * 86400 for days, _ in self.AGE_BUCKETS if days is not None]
+        self._age_counts = [[0, 0] for _ in self.AGE_BUCKETS]  # [count, size] per bucket
+
+    def add(self, path: str, name: str, size: int, mtime: float, ctime: float):
+        self.total_files += 1
+        self.total_size += size
+        self.files.append(path, size, mtime)
+
+        ext = os.path.splitext(name)[1].lower()
+        type_data = self.file_types.get(ext)
+        if type_data is None:
+            type_data = self.file_types[ext] = {'count': 0, 'size': 0}
+        type_data['count'] += 1
+        type_data['size'] += size
+
+        if size > self.LARGE_FILE_SIZE:
+            self.large_files_count += 1
+            item = (size, self.total_files, path, mtime, ctime)
+            if len(self._large) < self.LARGE_FILES_LIMIT:
+                heapq.heappush(self._large, item)
+            elif item > self._large[0]:
+                heapq.heapreplace(self._large, item)
+
+        age = self.now - mtime
+        bucket = self._age_counts[bisect.bisect_right(self._age_limits, age)]
+        bucket[0] += 1
+        bucket[1] += size
+        if age > self.OLD_FILE_DAYS * 86400:
+            self.old_files_count += 1
+
+    def results(self) -> Dict:
+        large_files = []
+        for size, _, path, mtime, ctime in sorted(self._large, reverse=True):
+            try:
+                modified, created = datetime.fromtimestamp(mtime), datetime.fromtimestamp(ctime)
+            except (OSError, OverflowError, ValueError):
+                continue
+            name = os.path.basename(path)
+            large_files.append({
+                'path': path,
+                'name': name,
+                'size': size,
+                'modified': modified,
+                'created': created,
+                'extension': os.path.splitext(name)[1],
+                'is_directory': False
+            })
+        return {
+            'total_files': self.total_files,
+            'total_size': self.total_size,
+            'file_types': self.file_types,
+            'large_files': large_files,
+            'large_files_count': self.large_files_count,
+            'old_files_count': self.old_files_count,
+            'age_histogram': [(label, count, size) for (_, label), (count, size)
+                              in zip(self.AGE_BUCKETS, self._age_counts)],
+            'files': self.files
         }
-        return icon_map.get(extension, '📄')
-
-    def stop(self):
-        """Stop the tree building process"""
-        self.should_stop = True
 
 
 class FileScanner(QThread):
@@ -808,164 +1355,213 @@ class FileScanner(QThread):
     file_found = pyqtSignal(object)
     scanning_finished = pyqtSignal(object)
 
-    def __init__(self, scan_path: str, file_types: List[str] = None):
+    def __init__(self, scan_path: str, file_types: List[str] = None,
+                 progress_rate_hz: float = DEFAULT_PROGRESS_RATE_HZ):
         super().__init__()
         self.scan_path = scan_path
         self.file_types = file_types or ['*']
+        self.progress_rate_hz = progress_rate_hz
         self.should_stop = False
         self.results = {}
         self.scanned_files = 0
-        self.total_estimated_files = 0
+        self.dirs_discovered = 0
+        self.dirs_processed = 0
 
     def run(self):
-        """Scan files in the specified path"""
+        """Scan files in the specified path (one walk; progress follows the directories found so far)"""
         try:
-            # Quick estimation of total files
-            self.progress_updated.emit(0, "Оцінка кількості файлів...")
-            self.total_estimated_files = self._estimate_file_count(self.scan_path)
-
-            # Now do the actual scanning
             self.scanned_files = 0
             self.results = self._scan_directory(self.scan_path)
             self.scanning_finished.emit(self.results)
         except Exception as e:
             self.progress_updated.emit(0, f"Помилка під час сканування: {str(e)}")
 
-    def _estimate_file_count(self, directory: str) -> int:
-        """Quick estimation of total files for progress calculation"""
-        try:
-            file_count = 0
-            for root, dirs, files in os.walk(directory):
-                if self.should_stop:
-                    break
-                file_count += len(files)
-                if file_count > 10000:  # Cap at 10000 for performance
-                    break
-            return max(file_count, 1)  # Ensure at least 1
-        except:
-            return 1
-
     def _scan_directory(self, directory: str) -> Dict:
-        """Recursively scan directory and collect file information"""
-        files_data = {
-            'total_files': 0,
-            'total_size': 0,
-            'file_types': {},
-            'large_files': [],
-            'old_files': [],
-            'files': []
-        }
+        """Recursively scan directory and aggregate file information on the fly"""
+        aggregator = ScanAggregator()
+        progress = ProgressReporter(self.progress_updated.emit, self.progress_rate_hz)
+        self.dirs_discovered = 1  # the root
+        self.dirs_processed = 0
+        progress_percentage = 0
 
         try:
-            for root, dirs, files in os.walk(directory):
-                if self.should_stop:
-                    break
-
-                for file in files:
+            # Directories are listed and stat'ed on the walker's threads; batches arrive here
+            walker = DirectoryWalker(stat_entries=True, ignore_files=SNAPSHOT_METADATA_PATTERNS,
+                                     should_stop=lambda: self.should_stop)
+            for batch in walker.walk(directory):
+                for entry in batch.files:
                     try:
-                        file_path = os.path.join(root, file)
-                        if os.path.exists(file_path):
-                            file_info = self._analyze_file(file_path)
-                            if file_info:
-                                files_data['files'].append(file_info)
-                                files_data['total_files'] += 1
-                                files_data['total_size'] += file_info['size']
-
-                                # Categorize by file type
-                                ext = file_info['extension'].lower()
-                                if ext not in files_data['file_types']:
-                                    files_data['file_types'][ext] = {'count': 0, 'size': 0}
-                                files_data['file_types'][ext]['count'] += 1
-                                files_data['file_types'][ext]['size'] += file_info['size']
-
-                                # Track large files (>10MB)
-                                if file_info['size'] > 10 * 1024 * 1024:
-                                    files_data['large_files'].append(file_info)
-
-                                # Track old files (>1 year)
-                                file_age = datetime.now() - file_info['modified']
-                                if file_age.days > 365:
-                                    files_data['old_files'].append(file_info)
-
-                                self.scanned_files += 1
-                                # Calculate progress as percentage
-                                progress_percentage = min(int((self.scanned_files / self.total_estimated_files) * 100), 95)  # Cap at 95% until completion
-                                self.progress_updated.emit(
-                                    progress_percentage,
-                                    f"Сканування: {file_info['name']}"
-                                )
-                    except Exception as e:
+                        st = entry.stat()  # served from the entry's cache
+                    except OSError:
                         continue
+                    aggregator.add(entry.path, entry.name, st.st_size, st.st_mtime, st.st_ctime)
+                self.scanned_files = aggregator.total_files
+
+                # Subdirectories of this batch are queued by the walker (symlinks are not followed)
+                self.dirs_processed += 1
+                self.dirs_discovered += sum(1 for d in batch.dirs if not d.is_symlink())
+                # The estimate only grows, so keep the bar from moving backwards; 95% until completion
+                progress_percentage = max(progress_percentage,
+                                          min(int(self.dirs_processed / self.dirs_discovered * 100), 95))
+                if progress.due():
+                    progress.update(
+                        progress_percentage,
+                        f"Сканування: {os.path.basename(batch.path) or batch.path} ({self.scanned_files} файлів)"
+                    )
+            progress.finish(progress_percentage, f"Проскановано {self.scanned_files} файлів")
 
         except Exception as e:
+            progress.finish()
             self.progress_updated.emit(0, f"Error scanning directory: {str(e)}")
 
-        return files_data
-
-    def _analyze_file(self, file_path: str) -> Optional[Dict]:
-        """Analyze a single file and return metadata"""
-        try:
-            stat = os.stat(file_path)
-            return {
-                'path': file_path,
-                'name': os.path.basename(file_path),
-                'size': stat.st_size,
-                'modified': datetime.fromtimestamp(stat.st_mtime),
-                'created': datetime.fromtimestamp(stat.st_ctime),
-                'extension': os.path.splitext(file_path)[1],
-                'is_directory': os.path.isdir(file_path)
-            }
-        except Exception:
-            return None
+        return aggregator.results()
 
     def stop(self):
         """Stop the scanning process"""
         self.should_stop = True
 
+
+DEFAULT_HASH_WORKERS = 8
+DEFAULT_DEVICE_CONCURRENCY = 2  # concurrent reads per disk; raise for SSDs and NAS shares
+
+# Digest constructors for duplicate detection, by the name recorded in result groups and the hash cache
+DIGEST_ALGORITHMS = {
+    'sha256': hashlib.sha256,
+    'blake2b': lambda: hashlib.blake2b(digest_size=32),
+}
+if XXHASH_AVAILABLE:
+    DIGEST_ALGORITHMS['xxh3_128'] = xxhash.xxh3_128  # not cryptographic; pair with byte verification
+DEFAULT_DIGEST_ALGORITHM = 'sha256'
+HASH_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def hash_file_content(file_path: str, new_digest, buffer_size: int = HASH_BUFFER_SIZE) -> Tuple[str, int]:
+    """Hex digest of a file's content and the number of bytes read; raises OSError.
+
+    Reads go into one reusable buffer; hashlib releases the GIL while
+    digesting it, so pool threads hash in parallel. mmap is not used: a file
+    truncated while mapped kills the process with SIGBUS on POSIX.
+    """
+    digest = new_digest()
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    read = 0
+    with open(file_path, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+            read += count
+    return digest.hexdigest(), read
+
+
 class DuplicateFileFinder(QThread):
     """Thread for finding duplicate files"""
     progress_updated = pyqtSignal(int, str)
-    duplicate_found = pyqtSignal(str, object)
+    duplicates_found = pyqtSignal(object)  # batch of (group key, file list) pairs
     finished = pyqtSignal(object)
 
-    def __init__(self, file_list: List[str], check_content: bool = True):
+    PARTIAL_HASH_SIZE = 64 * 1024  # bytes sampled from each end of a file before a full hash
+    HASH_BUFFER_SIZE = HASH_BUFFER_SIZE
+
+    def __init__(self, file_list: List[str], check_content: bool = True,
+                 progress_rate_hz: float = DEFAULT_PROGRESS_RATE_HZ, hash_cache_path: Optional[str] = HASH_CACHE_FILE,
+                 hash_workers: int = DEFAULT_HASH_WORKERS, device_concurrency: int = DEFAULT_DEVICE_CONCURRENCY,
+                 algorithm: str = DEFAULT_DIGEST_ALGORITHM, verify_bytes: bool = False,
+                 find_similar: bool = False):
         super().__init__()
         self.file_list = file_list
         self.check_content = check_content
+        # Optional last stage: resized/re-encoded images and re-saved documents (near_duplicates.py)
+        self.find_similar = find_similar
+        # Digest used for samples and full hashes; verify_bytes confirms every group by comparing content
+        self.algorithm = algorithm if algorithm in DIGEST_ALGORITHMS else DEFAULT_DIGEST_ALGORITHM
+        self.verify_bytes = verify_bytes
+        # Files are hashed on a pool; reads from one device are limited separately
+        self.hash_workers = max(1, int(hash_workers))
+        self.device_concurrency = max(1, int(device_concurrency))
+        self._device_slots = {}
+        self._device_lock = threading.Lock()
+        # Digests of unchanged files are reused across runs; None disables the cache
+        self.hash_cache_path = hash_cache_path
+        self.hash_cache = None
         self.should_stop = False
         self.duplicates = {}
+        self.stats = {}
+        self._file_stats = {}
+        self.progress = ProgressReporter(self.progress_updated.emit, progress_rate_hz,
+                                         on_items=self.duplicates_found.emit)
 
     def run(self):
         """Find duplicate files using hash comparison"""
         try:
+            if (self.check_content or self.find_similar) and self.hash_cache_path:
+                try:
+                    self.hash_cache = HashCache(self.hash_cache_path)
+                except (OSError, sqlite3.Error):
+                    self.hash_cache = None  # hash everything, as without a cache
             self._find_duplicates()
+            if self.find_similar and not self.should_stop:
+                self._find_similar()
         except Exception as e:
             # Try to emit an error message to the user via the progress signal
             try:
-                self.progress_updated.emit(0, f"Error finding duplicates: {str(e)}")
+                self.progress.update(0, f"Error finding duplicates: {str(e)}")
             except Exception:
                 pass # Signal might be disconnected
         finally:
-            # Always emit finished signal to unblock UI
+            if self.hash_cache is not None:
+                try:
+                    self.stats['cache_hits'] = self.hash_cache.hits
+                    self.hash_cache.close()
+                except (OSError, sqlite3.Error):
+                    pass
+                self.hash_cache = None
+            self._file_stats = {}
+            # Always deliver the last groups and progress, then unblock the UI
+            self.progress.finish()
             self.finished.emit(self.duplicates)
 
+    def _report_group(self, group_key: str, files: List[str]):
+        self.duplicates[group_key] = files
+        self.progress.add_item((group_key, files))
+
     def _find_duplicates(self):
-        """Find duplicate files by size, and optionally by hash."""
+        """Find duplicate files by size, and optionally by content.
+
+        Content is compared in stages: same-size files are first narrowed down
+        by a hash of their first and last PARTIAL_HASH_SIZE bytes, and only the
+        survivors are hashed in full. Per-stage counts end up in self.stats.
+        """
         files_by_size = {}
         total_files = len(self.file_list)
-        
-        # --- Pass 1: Group files by size ---
+        self.stats = {
+            'files': total_files,
+            'algorithm': self.algorithm,
+            'verify_bytes': self.verify_bytes,
+            'size_candidates': 0,
+            'partial_candidates': 0,
+            'full_candidates': 0,
+            'bytes_candidates': 0,
+            'bytes_read': 0,
+        }
+
+        # --- Stage 1: Group files by size ---
         for i, file_path in enumerate(self.file_list):
             if self.should_stop:
                 return
             
-            self.progress_updated.emit(int((i / total_files) * 20), f"Аналіз розміру: {os.path.basename(file_path)}") # Progress up to 20%
+            if self.progress.due():
+                self.progress.update(int((i / total_files) * 20), f"Аналіз розміру: {os.path.basename(file_path)}") # Progress up to 20%
             
             try:
-                # Skip zero-byte files
-                file_size = os.path.getsize(file_path)
+                # Skip zero-byte files; the stat result also validates cached digests later
+                st = os.stat(file_path)
+                file_size = st.st_size
                 if file_size == 0:
                     continue
+                self._file_stats[file_path] = st
                 
                 if file_size not in files_by_size:
                     files_by_size[file_size] = []
@@ -973,61 +1569,237 @@ class DuplicateFileFinder(QThread):
             except OSError:
                 continue # Skip files that can't be accessed
 
-        # --- Pass 2: Find duplicates in same-size groups ---
         potential_duplicates = {size: files for size, files in files_by_size.items() if len(files) > 1}
+        self.stats['size_candidates'] = sum(len(files) for files in potential_duplicates.values())
+        self.stats['bytes_candidates'] = sum(size * len(files) for size, files in potential_duplicates.items())
 
         if not self.check_content:
             # If not checking content, report all same-sized files as duplicates
             for size, files in potential_duplicates.items():
                 # Use size as the "hash" key for reporting
-                group_key = f"size:{size}"
-                self.duplicate_found.emit(group_key, files)
-                self.duplicates[group_key] = files
-            self.progress_updated.emit(100, "Знайдено потенційні дублікати за розміром.")
+                self._report_group(f"size:{size}", files)
+            self.progress.update(100, "Знайдено потенційні дублікати за розміром.")
             return
 
-        # If checking content, proceed to hash
-        processed_files = 0
-        num_potential_files = sum(len(files) for files in potential_duplicates.values())
-
-        for size, files in potential_duplicates.items():
-            if self.should_stop:
-                return
-            
-            file_hashes = {}
-            for file_path in files:
-                if self.should_stop:
-                    return
+        # --- Stage 2: Head/tail sample of large files ---
+        # Files up to two samples long are read in full anyway, so they go straight to stage 3
+        full_groups = [(size, files) for size, files in potential_duplicates.items()
+                       if size <= 2 * self.PARTIAL_HASH_SIZE]
+        sample_groups = [(size, files) for size, files in potential_duplicates.items()
+                         if size > 2 * self.PARTIAL_HASH_SIZE]
 
-                # Update progress based on number of files to be hashed
-                progress = 20 + int((processed_files / num_potential_files) * 80) if num_potential_files > 0 else 100
-                self.progress_updated.emit(progress, f"Хешування: {os.path.basename(file_path)}")
+        def collect_survivors(size, by_sample):
+            full_groups.extend((size, group) for group in by_sample.values() if len(group) > 1)
 
-                file_hash = self._calculate_file_hash(file_path)
-                processed_files += 1
+        self._hash_groups(sample_groups, f"{self.algorithm}-ends{self.PARTIAL_HASH_SIZE // 1024}k",
+                          self._calculate_partial_hash, collect_survivors,
+                          "Порівняння фрагментів", 20, 20, by_bytes=False)
+        if self.should_stop:
+            return
 
-                if file_hash:
-                    if file_hash not in file_hashes:
-                        file_hashes[file_hash] = []
-                    file_hashes[file_hash].append(file_path)
+        self.stats['partial_candidates'] = sum(len(files) for _, files in sample_groups)
+        self.stats['full_candidates'] = sum(len(files) for _, files in full_groups)
+        self.progress.update(40, f"Після порівняння фрагментів: {self.stats['full_candidates']} "
+                                 f"з {self.stats['size_candidates']} файлів")
 
-            # Report duplicates found by hash within the same-size group
+        # --- Stage 3: Full hash of the survivors; groups are reported as soon as they are complete ---
+        # Group keys record the algorithm ("blake2b:<hex>", "sha256+bytes:<hex>" when verified)
+        def report_duplicates(size, file_hashes):
             for file_hash, hashed_files in file_hashes.items():
-                if len(hashed_files) > 1:
-                    self.duplicate_found.emit(file_hash, hashed_files)
-                    self.duplicates[file_hash] = hashed_files
+                if len(hashed_files) < 2:
+                    continue
+                if not self.verify_bytes:
+                    self._report_group(f"{self.algorithm}:{file_hash}", hashed_files)
+                    continue
+                for number, identical in enumerate(self._split_identical(hashed_files)):
+                    suffix = f"#{number + 1}" if number else ""
+                    self._report_group(f"{self.algorithm}+bytes:{file_hash}{suffix}", identical)
 
-    def _calculate_file_hash(self, file_path: str, chunk_size: int = 8192) -> Optional[str]:
-        """Calculate SHA256 hash of a file"""
+        self._hash_groups(full_groups, self.algorithm, self._calculate_file_hash, report_duplicates,
+                          "Хешування", 40, 60, by_bytes=True)
+        if self.should_stop:
+            return
+
+        self.progress.update(100, f"Прочитано {humanize.naturalsize(self.stats['bytes_read'])} "
+                                  f"з {humanize.naturalsize(self.stats['bytes_candidates'])}")
+
+    def _find_similar(self):
+        """Group near-duplicate images and texts that are not byte-identical.
+
+        Of each exact duplicate group only the first file takes part, so a
+        similar group lists one copy per distinct content. Image hashes and
+        text signatures go through the hashing pool and the hash cache like
+        content digests; the LSH index then only compares files that share a
+        bucket. Groups are reported as "similar-image:<hash>" and
+        "similar-text:<id>".
+        """
+        # Imported here: near_duplicates loads Pillow, which only this stage needs
+        import near_duplicates
+
+        copies = {path for key, files in self.duplicates.items() if not key.startswith('size:')
+                  for path in files[1:]}
+        candidates = [path for path in self._file_stats if path not in copies]
+        images = [path for path in candidates if near_duplicates.is_image(path)]
+        texts = [path for path in candidates if near_duplicates.is_text(path)]
+        self.stats['similar_candidates'] = len(images) + len(texts)
+        self.stats['similar_groups'] = 0
+
+        def collect(values):
+            def on_group(size, by_value):
+                for value, files in by_value.items():
+                    values.update((path, value) for path in files)
+            return on_group
+
+        image_hashes, text_signatures = {}, {}
+        self._hash_groups([(0, images)] if images else [], near_duplicates.IMAGE_HASH_KIND,
+                          lambda path, size: near_duplicates.image_hash(path), collect(image_hashes),
+                          "Схожі зображення", 0, 50, by_bytes=False)
+        if self.should_stop:
+            return
+        self._hash_groups([(0, texts)] if texts else [], near_duplicates.TEXT_SIGNATURE_KIND,
+                          lambda path, size: near_duplicates.text_signature(path), collect(text_signatures),
+                          "Схожі документи", 50, 40, by_bytes=False)
+        if self.should_stop:
+            return
+
+        self.progress.update(90, "Порівняння схожих файлів...")
+        # Keep the caller's file order in every group
+        order = {path: position for position, path in enumerate(self.file_list)}
+        for files in near_duplicates.similar_images(dict(sorted(image_hashes.items(), key=lambda i: order[i[0]]))):
+            self._report_group(f"similar-image:{image_hashes[files[0]]}", files)
+            self.stats['similar_groups'] += 1
+        for files in near_duplicates.similar_texts(dict(sorted(text_signatures.items(), key=lambda i: order[i[0]]))):
+            signature_id = hashlib.blake2b(text_signatures[files[0]].encode('ascii'), digest_size=8).hexdigest()
+            self._report_group(f"similar-text:{signature_id}", files)
+            self.stats['similar_groups'] += 1
+        self.progress.update(100, f"Знайдено груп схожих файлів: {self.stats['similar_groups']}")
+
+    def _hash_groups(self, groups, kind: str, compute, on_group, label: str,
+                     progress_start: int, progress_span: int, by_bytes: bool):
+        """Hash the files of (size, files) groups on the hashing pool.
+
+        on_group(size, {digest: files}) runs on this thread as soon as every file
+        of a group is hashed, so results stream back while other groups are
+        still being read. Progress follows bytes or files.
+        """
+        if not groups:
+            return
+        # Imported here: only content comparisons need the pool
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+        remaining = [len(files) for _, files in groups]
+        digests = [{} for _ in groups]
+        total = sum(size * len(files) if by_bytes else len(files) for size, files in groups) or 1
+        done_amount = 0
+        jobs = ((index, position, size, file_path) for index, (size, files) in enumerate(groups)
+                for position, file_path in enumerate(files))
+
+        with ThreadPoolExecutor(max_workers=self.hash_workers, thread_name_prefix="hash") as pool:
+            pending = set()
+            exhausted = False
+            while True:
+                # Keep the queue bounded so cancellation takes effect quickly
+                while not exhausted and len(pending) < self.hash_workers * 4 and not self.should_stop:
+                    job = next(jobs, None)
+                    if job is None:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(self._hash_job, kind, compute, *job))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, position, size, file_path, digest = future.result()
+                    done_amount += size if by_bytes else 1
+                    if digest:
+                        digests[index].setdefault(digest, []).append((position, file_path))
+                    remaining[index] -= 1
+                    if remaining[index] == 0:
+                        # Keep the caller's file order within each group
+                        complete = {digest: [path for _, path in sorted(entries)]
+                                    for digest, entries in digests[index].items()}
+                        digests[index] = None
+                        on_group(size, complete)
+                    if self.progress.due():
+                        self.progress.update(progress_start + int(done_amount / total * progress_span),
+                                             f"{label}: {os.path.basename(file_path)}")
+
+                if self.should_stop:
+                    for future in pending:
+                        future.cancel()
+                    pending = {future for future in pending if not future.cancelled()}
+                    exhausted = True
+
+    def _hash_job(self, kind: str, compute, index: int, position: int, size: int, file_path: str):
+        """Pool task: cached digest of one file, read under its device's concurrency limit"""
+        st = self._file_stats.get(file_path)
+        with self._device_slot(st.st_dev if st is not None else None):
+            digest = self._cached_hash(file_path, kind, lambda path: compute(path, size))
+        return index, position, size, file_path, digest
+
+    def _device_slot(self, device) -> threading.Semaphore:
+        """Semaphore limiting concurrent reads from one device (keeps spinning disks from seeking back and forth)"""
+        with self._device_lock:
+            slot = self._device_slots.get(device)
+            if slot is None:
+                slot = self._device_slots[device] = threading.Semaphore(self.device_concurrency)
+            return slot
+
+    def _add_bytes_read(self, count: int):
+        with self._device_lock:
+            self.stats['bytes_read'] += count
+
+    def _cached_hash(self, file_path: str, kind: str, compute) -> Optional[str]:
+        """Digest from the hash cache when the file is unchanged, otherwise compute(file_path)"""
+        if self.hash_cache is None:
+            return compute(file_path)
+        return self.hash_cache.digest(file_path, kind, compute, st=self._file_stats.get(file_path))
+
+    def _calculate_partial_hash(self, file_path: str, file_size: int) -> Optional[str]:
+        """Digest of the first and last PARTIAL_HASH_SIZE bytes of a file"""
         try:
-            hash_sha256 = hashlib.sha256()
+            digest = DIGEST_ALGORITHMS[self.algorithm]()
             with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(chunk_size), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
+                head = f.read(self.PARTIAL_HASH_SIZE)
+                f.seek(max(file_size - self.PARTIAL_HASH_SIZE, 0))
+                tail = f.read(self.PARTIAL_HASH_SIZE)
+            digest.update(head)
+            digest.update(tail)
+            self._add_bytes_read(len(head) + len(tail))
+            return digest.hexdigest()
+        except Exception:
+            return None
+
+    def _calculate_file_hash(self, file_path: str, file_size: int = 0) -> Optional[str]:
+        """Digest of a file's content with the selected algorithm (see hash_file_content)"""
+        try:
+            digest, read = hash_file_content(file_path, DIGEST_ALGORITHMS[self.algorithm], self.HASH_BUFFER_SIZE)
+            self._add_bytes_read(read)
+            return digest
         except Exception:
             return None
 
+    def _split_identical(self, files: List[str]) -> List[List[str]]:
+        """Groups of byte-identical files among files with equal digests"""
+        groups = []
+        remaining = list(files)
+        while len(remaining) > 1 and not self.should_stop:
+            reference, same, different = remaining[0], [remaining[0]], []
+            for file_path in remaining[1:]:
+                (same if self._same_bytes(reference, file_path) else different).append(file_path)
+            if len(same) > 1:
+                groups.append(same)
+            remaining = different
+        return groups
+
+    def _same_bytes(self, first: str, second: str) -> bool:
+        """Compare two files chunk by chunk"""
+        try:
+            return same_content(first, second, self.HASH_BUFFER_SIZE, on_read=self._add_bytes_read)
+        except OSError:
+            return False
+
     def stop(self):
         """Stop the duplicate finding process"""
         self.should_stop = True
@@ -1037,12 +1809,14 @@ class FileCompressor(QThread):
     progress_updated = pyqtSignal(int, str)
     compression_finished = pyqtSignal(str, bool)
 
-    def __init__(self, files_to_compress: List[str], output_path: str, compression_level: int = 6):
+    def __init__(self, files_to_compress: List[str], output_path: str, compression_level: int = 6,
+                 progress_rate_hz: float = DEFAULT_PROGRESS_RATE_HZ):
         super().__init__()
         self.files_to_compress = files_to_compress
         self.output_path = output_path
         self.compression_level = compression_level
         self.should_stop = False
+        self.progress = ProgressReporter(self.progress_updated.emit, progress_rate_hz)
 
     def run(self):
         """Compress files using compress package"""
@@ -1053,9 +1827,10 @@ class FileCompressor(QThread):
                 return
 
             success = self._compress_files_with_compress()
+            self.progress.finish()
             self.compression_finished.emit(self.output_path, success)
         except Exception as e:
-            self.progress_updated.emit(0, f"Error during compression: {str(e)}")
+            self.progress.finish(0, f"Error during compression: {str(e)}")
             self.compression_finished.emit(self.output_path, False)
 
     def _compress_files_with_compress(self) -> bool:
@@ -1104,17 +1879,17 @@ class FileCompressor(QThread):
 
                         processed += 1
                         progress = int((processed / total_files) * 100)
-                        self.progress_updated.emit(
+                        self.progress.update(
                             progress,
                             f"Compressing: {os.path.basename(file_path)} ({format_type.upper()})"
                         )
                     else:
-                        self.progress_updated.emit(
+                        self.progress.update(
                             progress,
                             f"Skipping: {os.path.basename(file_path)} (not found)"
                         )
                 except Exception as e:
-                    self.progress_updated.emit(
+                    self.progress.update(
                         progress,
                         f"Warning: Failed to add {os.path.basename(file_path)}: {str(e)}"
                     )
@@ -1130,7 +1905,7 @@ class FileCompressor(QThread):
                 return False
 
         except Exception as e:
-            self.progress_updated.emit(0, f"Compression error: {str(e)}")
+            self.progress.update(0, f"Compression error: {str(e)}")
             return False
 
     def _compress_files_fallback(self) -> bool:
@@ -1162,7 +1937,7 @@ class FileCompressor(QThread):
 
                         processed += 1
                         progress = int((processed / total_files) * 100)
-                        self.progress_updated.emit(
+                        self.progress.update(
                             progress,
                             f"Compressing (fallback): {os.path.basename(file_path)}"
                         )
@@ -1177,6 +1952,85 @@ class FileCompressor(QThread):
         """Stop the compression process"""
         self.should_stop = True
 
+class SnapshotRestorer(QThread):
+    """Thread for restoring archived desktop items in one batch using snapshot manifests"""
+    progress_updated = pyqtSignal(int, str)
+    restore_finished = pyqtSignal(int, int, list)
+
+    def __init__(self, jobs: List[Tuple[Optional[str], List]], target_dir: Optional[str] = None):
+        super().__init__()
+        # Each job is (manifest_path or None, list of ManifestEntry)
+        self.jobs = jobs
+        self.target_dir = target_dir
+        self.engine = None
+        self.should_stop = False
+
+    def run(self):
+        restored = errors = 0
+        restored_paths = []
+        try:
+            for manifest_path, entries in self.jobs:
+                if self.should_stop:
+                    break
+                self.engine = MoverEngine(progress_interval=0.1, progress_callback=self._on_progress)
+                if manifest_path:
+                    result = restore_snapshot(manifest_path, self.engine, entries, self.target_dir)
+                else:
+                    # Snapshot without a manifest (created by an older version)
+                    desktop_path = self.target_dir or os.path.join(os.path.expanduser("~"), "Desktop")
+                    result = self.engine.run(plan_restore(entries, desktop_path), desktop_path)
+                restored += result.moved
+                errors += result.errors
+                restored_paths.extend(task.src for task in result.succeeded)
+        except Exception as e:
+            self.progress_updated.emit(0, f"Помилка відновлення: {str(e)}")
+        self.restore_finished.emit(restored, errors, restored_paths)
+
+    def _on_progress(self, progress):
+        percent = int(progress.completed * 100 / progress.total) if progress.total else 100
+        self.progress_updated.emit(percent, format_progress(progress))
+
+    def stop(self):
+        self.should_stop = True
+        if self.engine:
+            self.engine.cancel()
+
+
+class DuplicateLinker(QThread):
+    """Thread replacing confirmed duplicates with hardlinks/reflinks according to a dry-run plan"""
+    progress_updated = pyqtSignal(int, str)
+    link_finished = pyqtSignal(object, str)  # report of the real run, error message ("" when none)
+
+    def __init__(self, plan, progress_rate_hz: float = DEFAULT_PROGRESS_RATE_HZ):
+        super().__init__()
+        self.plan = plan
+        self.progress_rate_hz = progress_rate_hz
+        self.should_stop = False
+
+    def run(self):
+        reporter = ProgressReporter(self.progress_updated.emit, self.progress_rate_hz)
+        completed = []  # actions finished so far, reported even when the run breaks off
+
+        def on_progress(done, total, action):
+            completed.append(action)
+            if reporter.due():
+                reporter.update(int(done * 100 / total), f"Заміна {done}/{total}: {os.path.basename(action.target)}")
+
+        report = DedupeReport(mode=self.plan.mode, dry_run=False, actions=completed)
+        error = ""
+        try:
+            report = apply_dedupe(self.plan, on_progress=on_progress, should_stop=lambda: self.should_stop)
+            reporter.finish(100, f"Замінено {len(report.linked)} файлів")
+        except Exception as e:
+            error = str(e)
+            reporter.finish(message=f"Помилка заміни: {error}")
+        finally:
+            self.link_finished.emit(report, error)
+
+    def stop(self):
+        self.should_stop = True
+
+
 class CleanupHelperWidget(QWidget):
     """Main widget for the Desktop Cleanup Helper module"""
 
@@ -1189,6 +2043,8 @@ class CleanupHelperWidget(QWidget):
         self.scanner_thread = None
         self.duplicate_finder_thread = None
         self.compressor_thread = None
+        self.restorer_thread = None
+        self.duplicate_linker_thread = None
 
         # Data storage
         self.scan_results = {}
@@ -1207,10 +2063,11 @@ class CleanupHelperWidget(QWidget):
         }
 
         # Performance optimization: Add caching
-        self._file_cache = {}  # Cache for file structure
-        self._search_index = {}  # Search index for fast lookups
+        self._file_table = FileTable()  # Columnar cache of the archive structure
+        self._name_index = NameIndex()  # Trigram index of cached names, aligned with the table rows
+        self.archive_index = ArchiveIndex()  # Persistent metadata index, refreshed incrementally
         self._last_scan_path = ""  # Track last scanned path
-        self._cache_timestamp = 0  # Track when cache was built
+        self._table_fingerprint = None  # ArchiveIndex.fingerprint() the file table was loaded at
 
         # Splash screens for operations
         self.scan_splash = None
@@ -1389,7 +2246,7 @@ class CleanupHelperWidget(QWidget):
 
     def select_all_archive_items(self):
         """Select all items in the archive tree"""
-        self.archive_tree.selectAll()
+        self.archive_stack.currentWidget().selectAll()
 
     def initUI(self):
         """Initialize the user interface"""
@@ -1490,6 +2347,7 @@ class CleanupHelperWidget(QWidget):
         self.total_size_label = QLabel("Розмір: 0 Б")
         self.file_types_label = QLabel("Типів: 0")
         self.large_files_label = QLabel("Великих файлів: 0")
+        self.old_files_label = QLabel("Старих файлів: 0")
 
         summary_layout.addWidget(QLabel("Всього файлів:"), 0, 0)
         summary_layout.addWidget(self.total_files_label, 0, 1)
@@ -1499,6 +2357,8 @@ class CleanupHelperWidget(QWidget):
         summary_layout.addWidget(self.file_types_label, 2, 1)
         summary_layout.addWidget(QLabel("Великі файли:"), 3, 0)
         summary_layout.addWidget(self.large_files_label, 3, 1)
+        summary_layout.addWidget(QLabel("Старші за рік:"), 4, 0)
+        summary_layout.addWidget(self.old_files_label, 4, 1)
 
         left_layout.addWidget(self.summary_group)
 
@@ -1684,7 +2544,25 @@ class CleanupHelperWidget(QWidget):
         self.archive_tree.setRootIsDecorated(True)
         self.archive_tree.setAlternatingRowColors(True)
 
-        layout.addWidget(self.archive_tree)
+        # Archive browsing uses a lazy model view; the item tree above holds analytics and filter results
+        self.archive_view = QTreeView()
+        self.archive_view.setUniformRowHeights(True)
+        self.archive_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.archive_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.archive_view.customContextMenuRequested.connect(self.show_archive_context_menu)
+        self.archive_view.doubleClicked.connect(lambda index: self._reveal_path(index.data(Qt.UserRole)))
+        self.archive_view.setIndentation(20)
+        self.archive_view.setRootIsDecorated(True)
+        self.archive_view.setAlternatingRowColors(True)
+
+        self.archive_stack = QStackedWidget()
+        self.archive_stack.addWidget(self.archive_tree)
+        self.archive_stack.addWidget(self.archive_view)
+        # Whatever fills the item tree brings it to the front
+        self.archive_tree.model().rowsInserted.connect(
+            lambda *args: self.archive_stack.setCurrentWidget(self.archive_tree))
+
+        layout.addWidget(self.archive_stack)
 
         # Status label for archive operations
         self.archive_status_label = QLabel("Готовий до пошуку та фільтрації")
@@ -1852,6 +2730,39 @@ class CleanupHelperWidget(QWidget):
         self.check_content_hash.setChecked(True)
         options_layout.addWidget(self.check_content_hash)
 
+        self.hash_algorithm_combo = QComboBox()
+        for name in DIGEST_ALGORITHMS:
+            self.hash_algorithm_combo.addItem(name, name)
+        self.hash_algorithm_combo.setToolTip("Швидкість sha256 і blake2b залежить від процесора (див. hash_benchmark.py); "
+                                             "xxh3_128 (пакет xxhash) найшвидший, але не криптографічний")
+        options_layout.addWidget(QLabel("Алгоритм:"))
+        options_layout.addWidget(self.hash_algorithm_combo)
+
+        self.verify_bytes_check = QCheckBox("Побайтова перевірка")
+        self.verify_bytes_check.setToolTip("Підтверджувати кожну групу порівнянням вмісту (читає файли ще раз)")
+        options_layout.addWidget(self.verify_bytes_check)
+
+        self.find_similar_check = QCheckBox("Схожі файли")
+        self.find_similar_check.setToolTip(
+            "Також шукати змінені копії: зображення іншого розміру чи якості "
+            + ("" if importlib.util.find_spec("PIL") else "(потрібен пакет Pillow) ")
+            + "і повторно збережені документи (txt, docx, odt, pptx...)")
+        options_layout.addWidget(self.find_similar_check)
+
+        self.hash_workers_spin = QSpinBox()
+        self.hash_workers_spin.setRange(1, 32)
+        self.hash_workers_spin.setValue(DEFAULT_HASH_WORKERS)
+        self.hash_workers_spin.setToolTip("Скільки файлів хешується одночасно")
+        options_layout.addWidget(QLabel("Потоків:"))
+        options_layout.addWidget(self.hash_workers_spin)
+
+        self.device_concurrency_spin = QSpinBox()
+        self.device_concurrency_spin.setRange(1, 16)
+        self.device_concurrency_spin.setValue(DEFAULT_DEVICE_CONCURRENCY)
+        self.device_concurrency_spin.setToolTip("Одночасних читань з одного диска: 1-2 для HDD, більше для SSD та мережевих дисків")
+        options_layout.addWidget(QLabel("На диск:"))
+        options_layout.addWidget(self.device_concurrency_spin)
+
         options_layout.addStretch()
         layout.addLayout(options_layout)
 
@@ -1884,6 +2795,22 @@ class CleanupHelperWidget(QWidget):
         duplicate_actions_layout.addWidget(delete_selected_btn)
 
         duplicate_actions_layout.addStretch()
+
+        self.link_mode_combo = QComboBox()
+        self.link_mode_combo.addItem("Авто (reflink або жорстке посилання)", LinkMode.AUTO)
+        self.link_mode_combo.addItem("Жорсткі посилання", LinkMode.HARDLINK)
+        if reflink_supported():
+            self.link_mode_combo.addItem("Лише reflink", LinkMode.REFLINK)
+        self.link_mode_combo.setToolTip(
+            "Reflink (Btrfs, XFS, APFS) зберігає окремі файли зі спільними даними; "
+            "жорстке посилання робить усі копії одним файлом — зміна однієї змінює всі")
+        duplicate_actions_layout.addWidget(self.link_mode_combo)
+
+        self.link_duplicates_btn = QPushButton("🔗 Замінити посиланнями")
+        self.link_duplicates_btn.setToolTip("Звільнити місце: залишити найстаріший файл групи, "
+                                            "інші замінити посиланнями на нього (спершу пробний запуск)")
+        self.link_duplicates_btn.clicked.connect(self.link_selected_duplicates)
+        duplicate_actions_layout.addWidget(self.link_duplicates_btn)
         duplicate_results_layout.addLayout(duplicate_actions_layout)
 
         layout.addWidget(self.duplicate_results_group)
@@ -1904,18 +2831,29 @@ class CleanupHelperWidget(QWidget):
         if not duplicates:
             QMessageBox.information(self, "Дублікати не знайдено", "У вказаній папці не знайдено дублікатів файлів.")
 
+    def add_duplicate_items(self, groups: list):
+        """Add a batch of (hash, file list) duplicate groups to the tree"""
+        self.duplicate_tree.setUpdatesEnabled(False)
+        try:
+            for file_hash, file_list in groups:
+                self.add_duplicate_item(file_hash, file_list)
+        finally:
+            self.duplicate_tree.setUpdatesEnabled(True)
+
     def add_duplicate_item(self, file_hash: str, file_list: list):
         """Add a new duplicate item to the tree"""
         if not file_list:
             return
 
         # Check if this hash is already in the tree (shouldn't happen with new logic, but for safety)
-        root_items = self.duplicate_tree.findItems(file_hash[:12], Qt.MatchExactly, 0)
+        label = self._duplicate_group_label(file_hash)
+        root_items = self.duplicate_tree.findItems(label, Qt.MatchExactly, 0)
         if root_items:
             root_item = root_items[0]
         else:
             root_item = QTreeWidgetItem(self.duplicate_tree)
-            root_item.setText(0, file_hash[:12]) # Display truncated hash
+            root_item.setText(0, label) # Display truncated hash
+            root_item.setToolTip(0, file_hash)
             self.duplicate_tree.addTopLevelItem(root_item)
 
         # Clear existing children for this hash and re-add (in case of updates)
@@ -2413,8 +3351,8 @@ class CleanupHelperWidget(QWidget):
     def send_selection_to_duplicate_finder(self):
         """Send selected files to duplicate finder tab"""
         # Get selected items from archive tree
-        selected_items = self.archive_tree.selectedItems()
-        if not selected_items:
+        selected_paths = self._selected_archive_paths()
+        if not selected_paths:
             QMessageBox.warning(self, "Попередження", "Будь ласка, виберіть файли для пошуку дублікатів.")
             return
 
@@ -2427,8 +3365,7 @@ class CleanupHelperWidget(QWidget):
 
         # Extract unique directory paths from selected items
         directories = set()
-        for item in selected_items:
-            file_path = item.text(4)  # Column 4 contains the full path
+        for file_path in selected_paths:
             if file_path and os.path.exists(file_path):
                 if os.path.isfile(file_path):
                     directories.add(os.path.dirname(file_path))
@@ -2505,7 +3442,11 @@ class CleanupHelperWidget(QWidget):
         self.total_files_label.setText(str(results['total_files']))
         self.total_size_label.setText(humanize.naturalsize(results['total_size']))
         self.file_types_label.setText(str(len(results['file_types'])))
-        self.large_files_label.setText(str(len(results['large_files'])))
+        self.large_files_label.setText(str(results.get('large_files_count', len(results['large_files']))))
+        self.old_files_label.setText(str(results.get('old_files_count', 0)))
+        self.old_files_label.setToolTip("\n".join(
+            f"{label}: {count} ({humanize.naturalsize(size)})" for label, count, size in results.get('age_histogram', [])
+        ))
 
         # Update file types table
         self.file_types_table.setRowCount(len(results['file_types']))
@@ -2721,6 +3662,14 @@ class CleanupHelperWidget(QWidget):
             export_data.append(['Кількість типів файлів', len(self.current_analytics_data['file_types'])])
             export_data.append([])
 
+            # Add age histogram
+            if self.current_analytics_data.get('age_histogram'):
+                export_data.append(['Вік файлів'])
+                export_data.append(['Вік', 'Кількість', 'Розмір'])
+                for label, count, size in self.current_analytics_data['age_histogram']:
+                    export_data.append([label, count, size])
+                export_data.append([])
+
             # Add file types breakdown
             export_data.append(['Типи файлів'])
             export_data.append(['Розширення', 'Кількість', 'Розмір'])
@@ -2774,7 +3723,8 @@ class CleanupHelperWidget(QWidget):
             file_list = []
             for root, _, files in os.walk(path):
                 for file in files:
-                    file_list.append(os.path.join(root, file))
+                    if not is_snapshot_metadata(file):  # restore manifests and journals of the archive
+                        file_list.append(os.path.join(root, file))
         except Exception as e:
             if self.duplicate_splash:
                 self.duplicate_splash.hide()
@@ -2792,9 +3742,16 @@ class CleanupHelperWidget(QWidget):
         self.duplicate_tree.clear()
 
         check_content = self.check_content_hash.isChecked()
-        self.duplicate_finder_thread = DuplicateFileFinder(file_list, check_content=check_content)
+        self.duplicate_finder_thread = DuplicateFileFinder(
+            file_list, check_content=check_content,
+            hash_workers=self.hash_workers_spin.value(),
+            device_concurrency=self.device_concurrency_spin.value(),
+            algorithm=self.hash_algorithm_combo.currentData(),
+            verify_bytes=self.verify_bytes_check.isChecked(),
+            find_similar=self.find_similar_check.isChecked()
+        )
         self.duplicate_finder_thread.progress_updated.connect(self.update_duplicate_progress)
-        self.duplicate_finder_thread.duplicate_found.connect(self.add_duplicate_item)
+        self.duplicate_finder_thread.duplicates_found.connect(self.add_duplicate_items)
         self.duplicate_finder_thread.finished.connect(self.on_duplicates_finished)
         self.duplicate_finder_thread.start()
 
@@ -2806,10 +3763,14 @@ class CleanupHelperWidget(QWidget):
     def on_duplicates_finished(self, results):
         """Handle duplicate finding completion"""
         self.duplicate_results = results
+        stats_text = self._format_duplicate_stats(getattr(self.duplicate_finder_thread, 'stats', {}))
 
         # Update and hide duplicate splash screen
         if hasattr(self, 'duplicate_splash') and self.duplicate_splash:
-            self.duplicate_splash.update_progress(100, f"✅ Знайдено {len(results)} груп дублікатів!")
+            message = f"✅ Знайдено {len(results)} груп дублікатів!"
+            if stats_text:
+                message += f"\n{stats_text}"
+            self.duplicate_splash.update_progress(100, message)
             QTimer.singleShot(1500, self.duplicate_splash.hide)
 
         # Update duplicate tree
@@ -2817,7 +3778,8 @@ class CleanupHelperWidget(QWidget):
         for hash_val, files in results.items():
             if len(files) > 1:
                 item = QTreeWidgetItem(self.duplicate_tree)
-                item.setText(0, hash_val[:8] + "...")
+                item.setText(0, self._duplicate_group_label(hash_val))
+                item.setToolTip(0, hash_val)
                 item.setText(1, f"{len(files)} files")
 
                 total_size = sum(os.path.getsize(f) for f in files if os.path.exists(f))
@@ -2837,6 +3799,37 @@ class CleanupHelperWidget(QWidget):
         # Log to main application
         if hasattr(self.main_window, 'log_message'):
             self.main_window.log_message(f"CleanupHelper: Found {len(results)} groups of duplicate files")
+            if stats_text:
+                self.main_window.log_message(f"CleanupHelper: {stats_text}")
+
+    def _duplicate_group_label(self, group_key: str) -> str:
+        """Short tree label of a duplicate group key ("<algorithm>:<hex>", "size:<bytes>" or "similar-<kind>:<id>")"""
+        algorithm, _, value = group_key.partition(':')
+        if not value or algorithm == 'size':
+            return group_key
+        if algorithm.startswith('similar-'):
+            kind = "зображення" if algorithm == 'similar-image' else "документи"
+            return f"≈ {value[:8]}... ({kind})"
+        return f"{value[:8]}... ({algorithm})"
+
+    def _format_duplicate_stats(self, stats: dict) -> str:
+        """One-line summary of the duplicate finder stages and the bytes they avoided reading"""
+        if not stats or not (stats.get('size_candidates') or stats.get('similar_groups')):
+            return ""
+        text = f"📊 Однаковий розмір: {stats['size_candidates']} з {stats['files']}"
+        if stats.get('algorithm') and (stats.get('partial_candidates') or stats.get('full_candidates')):
+            text += f" [{stats['algorithm']}{' + побайтова перевірка' if stats.get('verify_bytes') else ''}]"
+        if stats.get('partial_candidates') or stats.get('full_candidates'):
+            text += f", після фрагментів: {stats['full_candidates']}"
+            avoided = max(stats['bytes_candidates'] - stats['bytes_read'], 0)
+            text += (f"; прочитано {humanize.naturalsize(stats['bytes_read'])} "
+                     f"з {humanize.naturalsize(stats['bytes_candidates'])} "
+                     f"(заощаджено {humanize.naturalsize(avoided)})")
+            if stats.get('cache_hits'):
+                text += f", з кешу хешів: {stats['cache_hits']}"
+        if 'similar_groups' in stats:
+            text += f"; схожих груп: {stats['similar_groups']} (перевірено {stats['similar_candidates']} файлів)"
+        return text
 
     def compress_files(self):
         """Compress selected files"""
@@ -3144,12 +4137,6 @@ class CleanupHelperWidget(QWidget):
         # Clear tree before rebuilding to prevent duplicates
         self.archive_tree.clear()
 
-        # Stop any existing tree building thread
-        if hasattr(self, 'tree_builder_thread') and self.tree_builder_thread:
-            self.tree_builder_thread.stop()
-            self.tree_builder_thread.wait()
-            self.tree_builder_thread.deleteLater()
-
         # Use threading to prevent freezing
         # Create a simple thread to run the tree building without blocking UI
         import threading
@@ -3215,174 +4202,6 @@ class CleanupHelperWidget(QWidget):
             search_btn.setEnabled(True)
             search_btn.setText("Пошук")
 
-    def _build_tree_in_thread(self, scan_path: str, search_term: str = ""):
-        """Build tree in background thread"""
-        try:
-            # Update splash screen progress using thread-safe method
-            QTimer.singleShot(0, lambda: self._update_splash_progress(25, "Побудова дерева файлів..."))
-
-            # Build the tree data in background (this won't touch UI)
-            tree_data = self._build_tree_data(scan_path, search_term)
-
-            # Update UI on main thread when done
-            QTimer.singleShot(0, lambda: self._update_tree_ui(tree_data))
-
-        except Exception as e:
-            # Handle errors on main thread
-            QTimer.singleShot(0, lambda: self._handle_tree_error(str(e)))
-
-    def _build_tree_data(self, scan_path: str, search_term: str = ""):
-        """Build tree data in background thread (no UI operations)"""
-        # This is a simplified version that builds the data structure
-        # without touching any UI elements
-        tree_items = []
-
-        try:
-            # Update progress (thread-safe)
-            QTimer.singleShot(0, lambda: self._update_splash_progress(50, "Сканування файлів..."))
-
-            # Build file cache
-            file_cache = {}
-            self._build_file_cache_threaded(scan_path, file_cache)
-
-            # Update progress
-            QTimer.singleShot(0, lambda: self._update_splash_progress(75, "Побудова структури..."))
-
-            # Build tree structure from cache
-            root_items = self._build_tree_structure_threaded(scan_path, file_cache, search_term)
-            tree_items.extend(root_items)
-
-            # Update progress
-            QTimer.singleShot(0, lambda: self._update_splash_progress(90, "Фіналізація результатів..."))
-
-            return {
-                'items': tree_items,
-                'count': len(tree_items),
-                'scan_path': scan_path
-            }
-
-        except Exception as e:
-            raise e
-
-    def _build_file_cache_threaded(self, scan_path: str, file_cache: dict):
-        """Build file cache in background thread"""
-        def _scan_directory(path: str):
-            try:
-                for item_name in os.listdir(path):
-                    item_path = os.path.join(path, item_name)
-                    if os.path.exists(item_path):
-                        is_dir = os.path.isdir(item_path)
-
-                        # Get file metadata
-                        try:
-                            stat_info = os.stat(item_path)
-                            file_size = stat_info.st_size
-                            modified_time = stat_info.st_mtime
-                            modified_str = datetime.fromtimestamp(modified_time).strftime("%Y-%m-%d %H:%M")
-                        except (OSError, PermissionError):
-                            file_size = None
-                            modified_time = None
-                            modified_str = "Невідомо"
-
-                        file_cache[item_path] = {
-                            'name': item_name,
-                            'path': item_path,
-                            'is_dir': is_dir,
-                            'name_lower': item_name.lower(),
-                            'size': file_size,
-                            'modified': modified_str
-                        }
-
-                        if is_dir:
-                            _scan_directory(item_path)
-
-            except (PermissionError, OSError):
-                # Skip directories we can't access
-                pass
-
-        _scan_directory(scan_path)
-
-    def _build_tree_structure_threaded(self, scan_path: str, file_cache: dict, search_term: str = ""):
-        """Build tree structure from cache in background thread"""
-        root_items = []
-
-        for file_path, file_data in file_cache.items():
-            # Check if item matches search term
-            if search_term and search_term.lower() not in file_data['name_lower']:
-                continue
-
-            # Only include items directly in the scan path for now
-            if os.path.dirname(file_path) == scan_path:
-                root_items.append(file_data)
-
-        # Sort: directories first, then files
-        root_items.sort(key=lambda x: (not x['is_dir'], x['name_lower']))
-
-        return root_items
-
-    def _update_splash_progress(self, value, message):
-        """Thread-safe splash screen progress update"""
-        if self.archive_splash and self.archive_splash.isVisible():
-            self.archive_splash.update_progress(value, message)
-        if hasattr(self, 'archive_status_label'):
-            self.archive_status_label.setText(message)
-
-    def _update_tree_ui(self, tree_data):
-        """Update UI with tree data (runs on main thread)"""
-        try:
-            self.archive_tree.clear()
-
-            for item_data in tree_data['items']:
-                tree_item = QTreeWidgetItem(self.archive_tree)
-                tree_item.setText(0, item_data['name'])
-                tree_item.setData(0, Qt.UserRole, item_data['path'])
-
-                if item_data['is_dir']:
-                    tree_item.setText(0, f"📁 {item_data['name']}")
-                    tree_item.setData(1, Qt.DisplayRole, "Папка")
-                else:
-                    file_ext = os.path.splitext(item_data['name'])[1].lower()
-                    icon = self._get_file_icon(file_ext)
-                    tree_item.setText(0, f"{icon} {item_data['name']}")
-                    size_str = humanize.naturalsize(item_data['size']) if item_data['size'] else "Невідомо"
-                    tree_item.setData(1, Qt.DisplayRole, size_str)
-                    tree_item.setData(2, Qt.DisplayRole, item_data.get('modified', 'Невідомо'))
-
-            # Set headers
-            self.archive_tree.setHeaderLabels(["Назва файлу", "Розмір", "Дата модифікації"])
-
-            # Show final count
-            final_count = tree_data['count']
-            self.archive_status_label.setText(f"Дерево побудовано: {final_count} елементів")
-
-            # Expand tree
-            if final_count > 0:
-                self.archive_tree.expandAll()
-
-        except Exception as e:
-            self.archive_status_label.setText(f"Помилка при відображенні: {e}")
-
-        finally:
-            # Always hide splash screen and reset button
-            self.hide_archive_splash()
-            search_btn = self.findChild(QPushButton, "search_button")
-            if search_btn:
-                search_btn.setEnabled(True)
-                search_btn.setText("Пошук")
-
-    def _handle_tree_error(self, error_message):
-        """Handle tree building errors (runs on main thread)"""
-        self.archive_status_label.setText(f"Помилка: {error_message}")
-        if hasattr(self, 'main_window') and hasattr(self.main_window, 'log_message'):
-            self.main_window.log_message(f"CleanupHelper: Помилка побудови дерева: {error_message}")
-
-        # Hide splash screen and reset button on error
-        self.hide_archive_splash()
-        search_btn = self.findChild(QPushButton, "search_button")
-        if search_btn:
-            search_btn.setEnabled(True)
-            search_btn.setText("Пошук")
-
     def _get_file_icon(self, extension: str) -> str:
         """Get appropriate icon for file extension"""
         icon_map = {
@@ -3396,148 +4215,20 @@ class CleanupHelperWidget(QWidget):
         }
         return icon_map.get(extension, '📄')
 
-    def _on_tree_progress_updated(self, value, message):
-        """Handle tree building progress updates"""
-        # Update splash screen if it's active
-        if self.archive_splash and self.archive_splash.isVisible():
-            self.archive_splash.update_progress(value, message)
-
-        # Update status label
-        if hasattr(self, 'archive_status_label'):
-            self.archive_status_label.setText(message)
-
-    def _on_tree_built(self, tree_widget):
-        """Handle successful tree building completion"""
-        try:
-            # Copy the tree structure to our main tree widget
-            self.archive_tree.clear()
-
-            # Copy all items from the built tree to our main tree
-            def copy_tree_items(source_parent, target_parent):
-                for i in range(source_parent.childCount()):
-                    source_item = source_parent.child(i)
-                    target_item = QTreeWidgetItem(target_parent)
-
-                    # Copy all columns
-                    for col in range(source_item.columnCount()):
-                        target_item.setText(col, source_item.text(col))
-                        target_item.setData(col, Qt.UserRole, source_item.data(col, Qt.UserRole))
-
-                    # Recursively copy children
-                    copy_tree_items(source_item, target_item)
-
-            copy_tree_items(tree_widget.invisibleRootItem(), self.archive_tree.invisibleRootItem())
-
-            # Set tree headers
-            self.archive_tree.setHeaderLabels(["Назва файлу", "Розмір", "Дата модифікації"])
-
-            # Count and display final results
-            final_count = self._count_tree_items(self.archive_tree.invisibleRootItem())
-            self.archive_status_label.setText(f"Дерево побудовано: {final_count} елементів")
-
-            # Expand the tree to show items
-            if final_count > 0:
-                self.archive_tree.expandAll()
-
-        except Exception as e:
-            self.archive_status_label.setText(f"Помилка при відображенні дерева: {e}")
-            if hasattr(self, 'main_window') and hasattr(self.main_window, 'log_message'):
-                self.main_window.log_message(f"CleanupHelper: Помилка відображення дерева: {e}")
-
-        finally:
-            # Always hide splash screen and reset button
-            self.hide_archive_splash()
-            search_btn = self.findChild(QPushButton, "search_button")
-            if search_btn:
-                search_btn.setEnabled(True)
-                search_btn.setText("Пошук")
-
-    def _on_tree_error(self, error_message):
-        """Handle tree building errors"""
-        self.archive_status_label.setText(f"Помилка: {error_message}")
-        if hasattr(self, 'main_window') and hasattr(self.main_window, 'log_message'):
-            self.main_window.log_message(f"CleanupHelper: Помилка побудови дерева: {error_message}")
-
-        # Hide splash screen and reset button on error
-        self.hide_archive_splash()
-        search_btn = self.findChild(QPushButton, "search_button")
-        if search_btn:
-            search_btn.setEnabled(True)
-            search_btn.setText("Пошук")
-
-    def _count_tree_items_with_breakdown(self, item):
-        """Count total items in tree (recursive) with file/folder breakdown"""
-        count = 0
-        file_count = 0
-        folder_count = 0
-
-        for i in range(item.childCount()):
-            child = item.child(i)
-            count += 1
-
-            # Check if this is a file or folder
-            child_text = child.text(0)
-            if child_text.startswith("📁"):
-                folder_count += 1
-            else:
-                file_count += 1
-
-            # Count children recursively
-            child_counts = self._count_tree_items_with_details(child)
-            count += child_counts['total']
-            file_count += child_counts['files']
-            folder_count += child_counts['folders']
-
-        return {'total': count, 'files': file_count, 'folders': folder_count}
-
-    def _count_tree_items_with_details(self, item):
-        """Count items with file/folder breakdown (recursive)"""
-        total = 0
-        files = 0
-        folders = 0
-
-        for i in range(item.childCount()):
-            child = item.child(i)
-            total += 1
-
-            child_text = child.text(0)
-            if child_text.startswith("📁"):
-                folders += 1
-            else:
-                files += 1
-
-            # Recursive count
-            child_counts = self._count_tree_items_with_details(child)
-            total += child_counts['total']
-            files += child_counts['files']
-            folders += child_counts['folders']
-
-        return {'total': total, 'files': files, 'folders': folders}
-
     def _build_tree_directly(self, scan_path: str, search_term: str = ""):
-        """Build the tree structure directly from filesystem with timeout (thread-safe version)"""
+        """Refresh the file table if needed and select the rows to show (thread-safe version)"""
         try:
-            # Check if we have cached data for this path
-            current_time = time.time()
-            if (self._last_scan_path == scan_path and
-                self._file_cache and
-                current_time - self._cache_timestamp < 300):  # 5 minutes cache
-                QTimer.singleShot(0, lambda: self._update_splash_progress_safe("Використання кешу..."))
-                self._build_tree_from_cache(search_term)
-            else:
-                # Build cache and tree structure
-                QTimer.singleShot(0, lambda: self._update_splash_progress_safe("Сканування файлів..."))
-                self._build_file_cache(scan_path)
+            # Refresh the persistent index (only changed folders are re-listed); the cached
+            # table is kept while the folder fingerprints stay the same
+            QTimer.singleShot(0, lambda: self._update_splash_progress_safe("Перевірка змін в архіві..."))
+            if self._build_file_cache(scan_path):
                 QTimer.singleShot(0, lambda: self._update_splash_progress_safe("Побудова дерева файлів..."))
-                self._build_tree_recursive(scan_path, self.archive_tree.invisibleRootItem(), search_term, 0)
-
-            # Update status and count on main thread
-            final_counts = self._count_tree_items_with_breakdown(self.archive_tree.invisibleRootItem())
-            QTimer.singleShot(0, lambda: self._update_tree_status_with_details(final_counts))
+            else:
+                QTimer.singleShot(0, lambda: self._update_splash_progress_safe("Використання кешу..."))
 
-            # Expand tree on main thread
-            if final_counts['total'] > 0:
-                QTimer.singleShot(0, lambda: self.archive_tree.expandAll())
+            # Only the row selection happens here; the model and view live on the main thread
+            visible_rows = self._archive_visible_rows(search_term)
+            QTimer.singleShot(0, lambda: self._show_archive_model(visible_rows, expand=bool(search_term)))
 
         except Exception as e:
             # Handle errors on main thread
@@ -3554,273 +4245,140 @@ class CleanupHelperWidget(QWidget):
         folders = counts['folders']
         self.archive_status_label.setText(f"Дерево побудовано: {total} елементів ({folders} папок, {files} файлів)")
 
-    def _build_file_cache(self, scan_path: str):
-        """Build a cache of the file structure for fast searching"""
-        self._file_cache = {}
-        self._search_index = {}
-        self._last_scan_path = scan_path
-        self._cache_timestamp = time.time()
-
-        def _scan_directory(path: str, cache_dict: dict):
-            """Recursively scan directory and build cache"""
-            try:
-                for item_name in os.listdir(path):
-                    item_path = os.path.join(path, item_name)
-                    if os.path.exists(item_path):
-                        is_dir = os.path.isdir(item_path)
+    def _build_file_cache(self, scan_path: str, should_stop=None) -> bool:
+        """Refresh the archive index and reload the file table if anything changed; True when reloaded"""
+        # Incremental refresh of the persistent index: one stat per unchanged folder
+        self.archive_index.refresh(scan_path, should_stop=should_stop)
+        fingerprint = self.archive_index.fingerprint(scan_path)
+        if self._last_scan_path == scan_path and self._file_table and fingerprint == self._table_fingerprint:
+            return False
 
-                        # Get file metadata
-                        try:
-                            stat_info = os.stat(item_path)
-                            file_size = stat_info.st_size
-                            modified_time = stat_info.st_mtime
-                            modified_str = datetime.fromtimestamp(modified_time).strftime("%Y-%m-%d %H:%M")
-                        except (OSError, PermissionError):
-                            file_size = None
-                            modified_time = None
-                            modified_str = "Невідомо"
-
-                        cache_dict[item_name] = {
-                            'path': item_path,
-                            'is_dir': is_dir,
-                            'name_lower': item_name.lower(),
-                            'size': file_size,
-                            'modified_timestamp': modified_time,
-                            'modified': modified_str
-                        }
-
-                        # Add to search index for faster lookups
-                        name_lower = item_name.lower()
-                        for i in range(len(name_lower)):
-                            for j in range(i + 1, min(i + 20, len(name_lower) + 1)):  # Limit substring length
-                                substring = name_lower[i:j]
-                                if substring not in self._search_index:
-                                    self._search_index[substring] = []
-                                self._search_index[substring].append(item_path)
-
-                        if is_dir:
-                            cache_dict[item_name]['children'] = {}
-                            _scan_directory(item_path, cache_dict[item_name]['children'])
-            except (PermissionError, OSError):
-                pass
-
-        _scan_directory(scan_path, self._file_cache)
+        # Rows come parents first
+        self._file_table, self._name_index = FileTable.from_index_rows(scan_path, self.archive_index.rows(scan_path))
+        self._last_scan_path = scan_path
+        self._table_fingerprint = fingerprint
+        return True
 
     def _build_tree_from_cache(self, search_term: str = ""):
-        """Build tree from cached data much faster than filesystem scanning"""
-        if not self._file_cache:
-            return
-
-        def _build_from_cache(cache_dict: dict, parent_item: QTreeWidgetItem, search_term: str):
-            """Recursively build tree from cache"""
-            for item_name, item_data in cache_dict.items():
-                is_dir = item_data['is_dir']
-
-                if is_dir:
-                    # For directories, check both original name and display name
-                    folder_info = self.identify_folder_structure(item_data['path'])
-                    dir_matches = not search_term or self._matches_search_term(search_term, folder_info['name'])
-
-                    # Create directory item (always, to preserve tree structure)
-                    dir_item = QTreeWidgetItem(parent_item)
-                    # Include icon emoji in text (like the working _build_tree_recursive does)
-                    display_name = f"{folder_info['icon']} {folder_info['name']}"
-                    dir_item.setText(0, display_name)
-                    dir_item.setText(1, "Папка")
-                    dir_item.setText(2, "")
-                    dir_item.setText(3, folder_info['type'])
-                    dir_item.setText(4, item_data['path'])
-
-                    # Recursively add children (filtered by search term)
-                    if 'children' in item_data:
-                        _build_from_cache(item_data['children'], dir_item, search_term)
-
-                        # Update item count after building children
-                        try:
-                            sub_items = len(item_data.get('children', {}))
-                            if sub_items > 0:
-                                dir_item.setText(1, f"Папка ({sub_items} елементів)")
-                        except:
-                            pass
-                    else:
-                        dir_item.setText(1, "Папка")
+        """Show the cached file table in the archive view, filtered by the search term"""
+        if self._file_table:
+            self._show_archive_model(self._archive_visible_rows(search_term), expand=bool(search_term))
+
+    def _archive_visible_rows(self, search_term: str = "") -> Optional[set]:
+        """File table rows matching the search term plus their parent folders (None means everything)"""
+        table = self._file_table
+        search_term = search_term.strip()
+        if not search_term:
+            return None
 
-                    # If directory doesn't match and no children matched, remove the empty folder
-                    if not dir_matches and dir_item.childCount() == 0:
-                        parent_item.removeChild(dir_item)
+        # File and folder names are matched through the trigram index; only its best
+        # candidates get the fuzzy check, so no query walks the whole table
+        matching = set(self._name_index.search(search_term))
+        for row in self._name_index.related_ids(search_term) - matching:
+            if self._matches_search_term(search_term, table.names[row]):
+                matching.add(row)
+
+        visible_rows = set()
+        parents = table.parents
+        for row in matching:
+            while row != -1 and row not in visible_rows:
+                visible_rows.add(row)
+                row = parents[row]
+        return visible_rows
+
+    def _show_archive_model(self, visible_rows: Optional[set] = None, expand: bool = False):
+        """Show the file table through a lazy ArchiveTreeModel (main thread)"""
+        model = ArchiveTreeModel(self._file_table, visible_rows, folder_info=self.identify_folder_structure,
+                                 file_icon=self.get_file_icon, file_category=self.get_file_category, parent=self)
+        old_model = self.archive_view.model()
+        self.archive_view.setModel(model)
+        if old_model is not None:
+            old_model.deleteLater()
+        for column, width in enumerate([300, 100, 150, 80, 200]):
+            self.archive_view.setColumnWidth(column, width)
 
-                    continue
+        self.archive_tree.clear()
+        self.archive_stack.setCurrentWidget(self.archive_view)
+
+        counts = model.counts()
+        self._update_tree_status_with_details(counts)
+        # Search results open completely when small; the whole archive opens folder by folder
+        if expand and counts['total'] <= ArchiveTreeModel.EXPAND_ALL_LIMIT:
+            self.archive_view.expandAll()
+        return model
+
+    def _add_table_file_item(self, parent_item: QTreeWidgetItem, row: int) -> QTreeWidgetItem:
+        """Tree item for a file row of the file table: name, size, modified, type, path"""
+        table = self._file_table
+        item_name = table.names[row]
+        item_path = table.path(row)
+        file_item = QTreeWidgetItem(parent_item)
+        try:
+            # Use cached values instead of filesystem calls
+            file_icon = self.get_file_icon(item_path, os.path.splitext(item_name)[1])
+            file_item.setText(0, f"{file_icon} {item_name}")
 
-                # For files (not directories), create file item
-                file_item = QTreeWidgetItem(parent_item)
+            file_size = table.size(row)
+            if file_size is not None:
                 try:
-                    # Use cached values instead of filesystem calls
-                    file_category = self.get_file_category(item_data['path'])
-                    _, file_ext = os.path.splitext(item_name)
-                    file_icon = self.get_file_icon(item_data['path'], file_ext)
-                    # Include icon emoji in text (like the working _build_tree_recursive does)
-                    display_name = f"{file_icon} {item_name}"
-
-                    file_item.setText(0, display_name)
-
-                    # Use cached size
-                    if 'size' in item_data and item_data['size'] is not None:
-                        file_size = item_data['size']
-                        try:
-                            import humanize
-                            file_item.setText(1, humanize.naturalsize(file_size))
-                        except ImportError:
-                            size_mb = file_size / (1024 * 1024)
-                            if size_mb < 1:
-                                file_item.setText(1, f"{file_size / 1024:.1f} KB")
-                            else:
-                                file_item.setText(1, f"{size_mb:.1f} MB")
-                    else:
-                        file_item.setText(1, "Розмір невідомий")
-
-                    # Use cached modified time
-                    if 'modified' in item_data and item_data['modified']:
-                        file_item.setText(2, item_data['modified'])
+                    import humanize
+                    file_item.setText(1, humanize.naturalsize(file_size))
+                except ImportError:
+                    size_mb = file_size / (1024 * 1024)
+                    if size_mb < 1:
+                        file_item.setText(1, f"{file_size / 1024:.1f} KB")
                     else:
-                        file_item.setText(2, "")
-
-                    file_item.setText(3, file_category)
-                    file_item.setText(4, item_data['path'])
-
-                except Exception:
-                    # Include default file icon in text
-                    file_item.setText(0, f"📄 {item_name}")
-                    file_item.setText(1, "Розмір невідомий")
-                    file_item.setText(2, "")
-                    file_item.setText(3, "Файл")
-                    file_item.setText(4, item_data['path'])
-
-        _build_from_cache(self._file_cache, self.archive_tree.invisibleRootItem(), search_term)
-
-    def _build_tree_recursive(self, path: str, parent_item: QTreeWidgetItem, search_term: str, depth: int = 0):
-        """Recursively build tree structure from filesystem"""
-        try:
-            # Limit depth to prevent infinite recursion
-            if depth > 10:
-                return
-
-            if depth == 0:
-                self._scanned_items = 0
-
-            items = []
-            try:
-                for item_name in os.listdir(path):
-                    item_path = os.path.join(path, item_name)
-                    if os.path.exists(item_path):
-                        items.append((item_name, item_path, os.path.isdir(item_path)))
-            except (PermissionError, OSError):
-                return
-
-            # Separate directories and files
-            directories = [(name, path) for name, path, is_dir in items if is_dir]
-            files = [(name, path) for name, path, is_dir in items if not is_dir]
-
-            if depth == 0:
-                self.archive_status_label.setText(f"Сканування: {len(directories)} папок, {len(files)} файлів...")
-            elif not hasattr(self, '_scanned_items'):
-                self._scanned_items = 0
-
-            self._scanned_items += len(directories) + len(files)
+                        file_item.setText(1, f"{size_mb:.1f} MB")
+            else:
+                file_item.setText(1, "Розмір невідомий")
 
-            # Update progress for full scans
-            if depth == 0 and self._scanned_items % 50 == 0:  # Update every 50 items
-                self.archive_status_label.setText(f"Сканування: {self._scanned_items} елементів оброблено...")
+            file_item.setText(2, table.modified_str(row) if table.mtime(row) is not None else "")
+            file_item.setText(3, self.get_file_category(item_path))
+            file_item.setText(4, item_path)
 
-            # Sort directories first, then files
-            directories.sort(key=lambda x: x[0].lower())
-            files.sort(key=lambda x: x[0].lower())
+        except Exception:
+            # Include default file icon in text
+            file_item.setText(0, f"📄 {item_name}")
+            file_item.setText(1, "Розмір невідомий")
+            file_item.setText(2, "")
+            file_item.setText(3, "Файл")
+            file_item.setText(4, item_path)
+        return file_item
+
+    def _build_filtered_tree_from_table(self, matching_rows: set, parent_row: int, parent_item: QTreeWidgetItem) -> int:
+        """Build tree of the file table showing only matching file rows; returns the visible count"""
+        table = self._file_table
+        visible_count = 0
+
+        for row in table.children(parent_row):
+            if table.is_dir(row):
+                # A directory is shown when one of its own files matches
+                if not any(child in matching_rows for child in table.children(row)):
+                    continue
 
-            # Add directories
-            for dir_name, dir_path in directories:
-                # Create directory item first to get display name
+                item_path = table.path(row)
+                folder_info = self.identify_folder_structure(item_path)
                 dir_item = QTreeWidgetItem(parent_item)
-                folder_info = self.identify_folder_structure(dir_path)
-                display_name = f"{folder_info['icon']} {folder_info['name']}"
-
-                dir_matches = not search_term or self._matches_search_term(search_term, folder_info['name'])
-
-                # Check search filter with improved matching using display name
-                if not dir_matches:
-                    # Check if it has matching children
-                    has_matching_children = self._has_matching_children(dir_path, search_term)
-                    if not has_matching_children:
-                        # Only remove if no children match
-                        parent_item.removeChild(dir_item)
-                        continue
-                    else:
-                        # Directory doesn't match but has matching children - keep it
-                        dir_item.setText(0, f"📁 {folder_info['name']} (має відповідні файли)")
-                        # Set a light color to indicate it doesn't match directly
-                        dir_item.setForeground(0, QColor(128, 128, 128))
-                dir_item.setText(0, display_name)
-                dir_item.setText(1, "Папка")
-                dir_item.setText(2, "")
+                dir_item.setText(0, f"{folder_info['icon']} {folder_info['name']}")
+                dir_item.setText(2, table.modified_str(row))
                 dir_item.setText(3, folder_info['type'])
-                dir_item.setText(4, dir_path)
-
-                # Count items in this directory
-                try:
-                    sub_items = len(os.listdir(dir_path))
-                    dir_item.setText(1, f"Папка ({sub_items} елементів)")
-                except:
-                    dir_item.setText(1, "Папка")
-
-                # Always add a placeholder child to ensure expand icon is visible
-                # We'll remove it later if we add actual children
-                placeholder = QTreeWidgetItem(dir_item)
-                placeholder.setText(0, "Завантаження...")
-
-                # Recursively add subdirectories and files
-                self._build_tree_recursive(dir_path, dir_item, search_term, depth + 1)
-
-                # Remove placeholder if we added actual children
-                if dir_item.childCount() > 1:
-                    dir_item.removeChild(placeholder)
-                elif dir_item.childCount() == 1 and placeholder == dir_item.child(0):
-                    # Keep placeholder to show it's an empty directory
-                    placeholder.setText(0, "(пуста папка)")
-                    placeholder.setForeground(0, QColor(128, 128, 128))
-
-            # Add files
-            for file_name, file_path in files:
-                # Check search filter with improved matching first using file name only
-                if search_term and not self._matches_search_term(search_term, file_name):
-                    continue
-                # Create file item
-                file_item = QTreeWidgetItem(parent_item)
-                try:
-                    file_size = os.path.getsize(file_path)
-                    file_mtime = os.path.getmtime(file_path)
-                    file_category = self.get_file_category(file_path)
+                dir_item.setText(4, item_path)
 
-                    # Get file icon
-                    file_icon = self.get_file_icon(file_path)
-                    display_name = f"{file_icon} {file_name}"
+                # Build children recursively
+                child_visible = self._build_filtered_tree_from_table(matching_rows, row, dir_item)
 
-                    file_item.setText(0, display_name)
-                    file_item.setText(1, humanize.naturalsize(file_size))
-                    file_item.setText(2, datetime.fromtimestamp(file_mtime).strftime("%Y-%m-%d %H:%M"))
-                    file_item.setText(3, file_category)
-                    file_item.setText(4, file_path)
-                except OSError:
-                    file_item.setText(0, f"📄 {file_name}")
-                    file_item.setText(1, "Розмір невідомий")
-                    file_item.setText(2, "")
-                    file_item.setText(3, "Файл")
-                    file_item.setText(4, file_path)
+                # Update directory item count
+                if child_visible > 0:
+                    dir_item.setText(1, f"Папка ({child_visible} елементів)")
+                else:
+                    dir_item.setText(1, "Папка")
 
-            if depth == 0:
-                # Don't set completion status here - let the completion callback handle it
-                pass
+                visible_count += 1
+            elif row in matching_rows:
+                self._add_table_file_item(parent_item, row)
+                visible_count += 1
 
-        except Exception as e:
-            if hasattr(self.main_window, 'log_message'):
-                self.main_window.log_message(f"CleanupHelper: Error processing {path}: {e}")
+        return visible_count
 
     def _count_tree_items(self, item: QTreeWidgetItem) -> int:
         """Count all items in the tree recursively"""
@@ -4127,22 +4685,6 @@ class CleanupHelperWidget(QWidget):
 
         return False
 
-    def _has_matching_children(self, dir_path: str, search_term: str) -> bool:
-        """Check if directory has any files/subdirectories that match search term"""
-        try:
-            for item_name in os.listdir(dir_path):
-                item_path = os.path.join(dir_path, item_name)
-                if os.path.exists(item_path):
-                    if self._matches_search_term(search_term, item_name):
-                        return True
-                    # If it's a directory, check recursively
-                    if os.path.isdir(item_path):
-                        if self._has_matching_children(item_path, search_term):
-                            return True
-        except (PermissionError, OSError):
-            pass
-        return False
-
     def _fuzzy_match(self, pattern: str, text: str, max_distance: int) -> bool:
         """Simple fuzzy matching using character-by-character comparison"""
         pattern_len = len(pattern)
@@ -4173,7 +4715,10 @@ class CleanupHelperWidget(QWidget):
     def open_file_location(self, item, column):
         """Open file location in file explorer"""
         # Path is in column 4
-        file_path = item.text(4)
+        self._reveal_path(item.text(4))
+
+    def _reveal_path(self, file_path: str):
+        """Show a file or folder in the system file explorer"""
         if file_path and os.path.exists(file_path):
             import subprocess
             # Ensure the path is absolute and normalized
@@ -4189,46 +4734,15 @@ class CleanupHelperWidget(QWidget):
 
     def open_selected_location(self):
         """Open selected file location"""
-        current_item = self.archive_tree.currentItem()
-        if current_item:
-            self.open_file_location(current_item, 0)
+        self._reveal_path(self._current_archive_path())
 
     def restore_selected_file(self):
         """Restore selected file to desktop"""
-        current_item = self.archive_tree.currentItem()
-        if not current_item:
-            return
-
-        # Path is now in column 4 (index 3)
-        source_path = current_item.text(4)
+        source_path = self._current_archive_path()
         if not source_path or not os.path.exists(source_path):
             return
 
-        desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
-        target_path = os.path.join(desktop_path, os.path.basename(source_path))
-
-        try:
-            # Handle name conflicts
-            counter = 1
-            while os.path.exists(target_path):
-                name, ext = os.path.splitext(os.path.basename(source_path))
-                target_path = os.path.join(desktop_path, f"{name}_{counter}{ext}")
-                counter += 1
-
-            # Copy file
-            if os.path.isfile(source_path):
-                shutil.copy2(source_path, target_path)
-            else:
-                shutil.copytree(source_path, target_path)
-
-            QMessageBox.information(self, "Успіх", f"Файл відновлено на робочий стіл:\n{os.path.basename(target_path)}")
-
-            # Log to main application
-            if hasattr(self.main_window, 'log_message'):
-                self.main_window.log_message(f"CleanupHelper: Restored {os.path.basename(source_path)} to desktop")
-
-        except Exception as e:
-            QMessageBox.critical(self, "Помилка", f"Не вдалося відновити файл:\n{str(e)}")
+        self._restore_paths([source_path])
 
     def select_all_duplicates(self):
         """Select all duplicate files"""
@@ -4336,8 +4850,7 @@ class CleanupHelperWidget(QWidget):
 
     def show_archive_context_menu(self, position):
         """Show context menu for archive browser"""
-        selected_items = self.archive_tree.selectedItems()
-        if not selected_items:
+        if not self._selected_archive_paths():
             return
 
         menu = QMenu(self)
@@ -4381,7 +4894,8 @@ class CleanupHelperWidget(QWidget):
         menu.addSeparator()
 
         # Tree operations
-        if self.archive_tree.topLevelItemCount() > 0:
+        archive_view = self.archive_stack.currentWidget()
+        if archive_view.model().rowCount() > 0:
             menu.addSeparator()
             expand_all_action = menu.addAction("📂 Розгорнути все")
             expand_all_action.triggered.connect(self.expand_all_tree_items)
@@ -4394,10 +4908,19 @@ class CleanupHelperWidget(QWidget):
             restore_action = menu.addAction("↩️ Відновити на стіл")
             restore_action.triggered.connect(self.restore_selected_files)
 
-        menu.exec_(self.archive_tree.viewport().mapToGlobal(position))
+        # Restore whole snapshot folders that have a manifest
+        if any(os.path.isfile(manifest_path_for(d)) for d in selected_directories):
+            restore_snapshot_action = menu.addAction("↩️ Відновити весь знімок")
+            restore_snapshot_action.triggered.connect(self.restore_selected_snapshots)
+
+        menu.exec_(archive_view.viewport().mapToGlobal(position))
 
     def expand_all_tree_items(self):
         """Expand all tree items recursively"""
+        if self._archive_model_shown():
+            self.archive_view.expandAll()
+            return
+
         def expand_items(item):
             item.setExpanded(True)
             for i in range(item.childCount()):
@@ -4408,6 +4931,10 @@ class CleanupHelperWidget(QWidget):
 
     def collapse_all_tree_items(self):
         """Collapse all tree items recursively"""
+        if self._archive_model_shown():
+            self.archive_view.collapseAll()
+            return
+
         def collapse_items(item):
             item.setExpanded(False)
             for i in range(item.childCount()):
@@ -4471,6 +4998,9 @@ class CleanupHelperWidget(QWidget):
                 delete_group_action = menu.addAction("🗑️ Видалити всю групу дублікатів")
                 delete_group_action.triggered.connect(self.delete_selected_duplicate_groups)
 
+                link_group_action = menu.addAction("🔗 Замінити дублікати посиланнями")
+                link_group_action.triggered.connect(self.link_selected_duplicates)
+
             menu.addSeparator()
 
             # Copy operations
@@ -4511,11 +5041,31 @@ class CleanupHelperWidget(QWidget):
         """Get list of selected duplicate groups"""
         selected_groups = []
         for item in self.duplicate_tree.selectedItems():
-            # Parent items have hash in column 0
-            if item.text(0) and not item.text(0).startswith(""):
+            # Group items are the top-level items (hash label in column 0)
+            if item.parent() is None and item.text(0):
                 selected_groups.append(item)
         return selected_groups
 
+    def _is_similar_group(self, group) -> bool:
+        """Whether a group item holds similar, not identical, files ("similar-" key in the tooltip)"""
+        return group.toolTip(0).startswith("similar-")
+
+    def _selected_identical_groups(self):
+        """Selected groups of identical files and the number of selected similar groups left out.
+
+        Files of a similar group differ in content, so no automatic action may
+        treat one of them as a spare copy of another.
+        """
+        groups = self.get_selected_duplicate_groups()
+        identical = [group for group in groups if not self._is_similar_group(group)]
+        return identical, len(groups) - len(identical)
+
+    def _similar_groups_note(self, similar_count: int) -> str:
+        if not similar_count:
+            return ""
+        return (f"\n\nГруп схожих файлів (≈) пропущено: {similar_count}. "
+                "Це не ідентичні копії, тому вони не видаляються автоматично.")
+
     def open_selected_duplicates(self):
         """Open selected duplicate files"""
         selected_files = self.get_selected_duplicate_files()
@@ -4545,15 +5095,17 @@ class CleanupHelperWidget(QWidget):
 
     def keep_newest_delete_others(self):
         """Keep the newest file in each selected group and delete others"""
-        selected_groups = self.get_selected_duplicate_groups()
+        selected_groups, similar_count = self._selected_identical_groups()
         if not selected_groups:
-            QMessageBox.warning(self, "Попередження", "Будь ласка, виберіть групи дублікатів.")
+            QMessageBox.warning(self, "Попередження", "Будь ласка, виберіть групи дублікатів."
+                                + self._similar_groups_note(similar_count))
             return
 
         reply = QMessageBox.question(
             self, "Підтвердження",
             f"Ви впевнені, що хочете залишити найновіші файли та видалити інші?\n\n"
-            f"Це видалить {sum(group.childCount() - 1 for group in selected_groups)} файлів.",
+            f"Це видалить {sum(group.childCount() - 1 for group in selected_groups)} файлів."
+            + self._similar_groups_note(similar_count),
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No
         )
 
@@ -4580,15 +5132,17 @@ class CleanupHelperWidget(QWidget):
 
     def keep_oldest_delete_others(self):
         """Keep the oldest file in each selected group and delete others"""
-        selected_groups = self.get_selected_duplicate_groups()
+        selected_groups, similar_count = self._selected_identical_groups()
         if not selected_groups:
-            QMessageBox.warning(self, "Попередження", "Будь ласка, виберіть групи дублікатів.")
+            QMessageBox.warning(self, "Попередження", "Будь ласка, виберіть групи дублікатів."
+                                + self._similar_groups_note(similar_count))
             return
 
         reply = QMessageBox.question(
             self, "Підтвердження",
             f"Ви впевнені, що хочете залишити найстаріші файли та видалити інші?\n\n"
-            f"Це видалить {sum(group.childCount() - 1 for group in selected_groups)} файлів.",
+            f"Це видалить {sum(group.childCount() - 1 for group in selected_groups)} файлів."
+            + self._similar_groups_note(similar_count),
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No
         )
 
@@ -4615,9 +5169,10 @@ class CleanupHelperWidget(QWidget):
 
     def keep_in_location_delete_others(self):
         """Keep files in preferred location and delete others"""
-        selected_groups = self.get_selected_duplicate_groups()
+        selected_groups, similar_count = self._selected_identical_groups()
         if not selected_groups:
-            QMessageBox.warning(self, "Попередження", "Будь ласка, виберіть групи дублікатів.")
+            QMessageBox.warning(self, "Попередження", "Будь ласка, виберіть групи дублікатів."
+                                + self._similar_groups_note(similar_count))
             return
 
         # Let user choose preferred location
@@ -4659,7 +5214,8 @@ class CleanupHelperWidget(QWidget):
         if files_to_delete:
             reply = QMessageBox.question(
                 self, "Підтвердження",
-                f"Видалити {len(files_to_delete)} файлів, що не знаходяться у вибраній папці?",
+                f"Видалити {len(files_to_delete)} файлів, що не знаходяться у вибраній папці?"
+                + self._similar_groups_note(similar_count),
                 QMessageBox.Yes | QMessageBox.No, QMessageBox.No
             )
 
@@ -4681,9 +5237,15 @@ class CleanupHelperWidget(QWidget):
             QMessageBox.warning(self, "Попередження", "Будь ласка, виберіть файли для видалення.")
             return
 
+        # Files picked from similar groups are not spare copies: say so explicitly
+        from_similar = sum(1 for item in self.duplicate_tree.selectedItems()
+                           if item.parent() is not None and self._is_similar_group(item.parent()))
+        similar_warning = (f"⚠️ {from_similar} з них належать до груп схожих (не ідентичних) файлів — "
+                           "їхній вміст відрізняється від інших файлів групи.\n\n" if from_similar else "")
         reply = QMessageBox.question(
             self, "Підтвердження видалення",
             f"Ви впевнені, що хочете видалити {len(selected_files)} файлів?\n\n"
+            f"{similar_warning}"
             "Ця дія не може бути скасована!",
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No
         )
@@ -4693,16 +5255,17 @@ class CleanupHelperWidget(QWidget):
 
     def delete_selected_duplicate_groups(self):
         """Delete entire selected duplicate groups"""
-        selected_groups = self.get_selected_duplicate_groups()
+        selected_groups, similar_count = self._selected_identical_groups()
         if not selected_groups:
-            QMessageBox.warning(self, "Попередження", "Будь ласка, виберіть групи для видалення.")
+            QMessageBox.warning(self, "Попередження", "Будь ласка, виберіть групи для видалення."
+                                + self._similar_groups_note(similar_count))
             return
 
         total_files = sum(group.childCount() for group in selected_groups)
         reply = QMessageBox.question(
             self, "Підтвердження видалення",
             f"Ви впевнені, що хочете видалити всі {total_files} файлів у вибраних групах?\n\n"
-            "Ця дія не може бути скасована!",
+            "Ця дія не може бути скасована!" + self._similar_groups_note(similar_count),
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No
         )
 
@@ -4751,6 +5314,110 @@ class CleanupHelperWidget(QWidget):
         if current_path and os.path.exists(current_path):
             self.find_duplicates()
 
+    def link_selected_duplicates(self):
+        """Dry run for the selected (or all) groups, then replace duplicates with links on confirmation"""
+        if self.duplicate_linker_thread and self.duplicate_linker_thread.isRunning():
+            return
+        group_items = self.get_selected_duplicate_groups()
+        if not group_items:
+            group_items = [self.duplicate_tree.topLevelItem(i) for i in range(self.duplicate_tree.topLevelItemCount())]
+
+        groups = []
+        unconfirmed = 0
+        for group in group_items:
+            # Only content-confirmed groups; "size:" groups merely share a size, similar ones differ in content
+            if group.toolTip(0).startswith("size:") or self._is_similar_group(group):
+                unconfirmed += 1
+                continue
+            files = [group.child(i).text(1) for i in range(group.childCount())]
+            # The oldest file is kept: with hardlinks its metadata applies to the whole group
+            files.sort(key=lambda f: os.path.getmtime(f) if os.path.exists(f) else float('inf'))
+            groups.append(files)
+
+        if not groups:
+            QMessageBox.warning(self, "Попередження",
+                                "Немає груп, підтверджених порівнянням вмісту.\n"
+                                "Увімкніть «Порівнювати вміст файлів» і повторіть пошук.")
+            return
+
+        mode = self.link_mode_combo.currentData()
+        plan = plan_dedupe(groups, mode)
+        summary = (f"Пробний запуск: буде замінено посиланнями {len(plan.planned)} файлів, "
+                   f"звільниться {humanize.naturalsize(plan.bytes_reclaimable)}.")
+        if hasattr(self.main_window, 'log_message'):
+            self.main_window.log_message(
+                f"CleanupHelper: Link dry run ({mode}): {len(plan.planned)} files, "
+                f"{plan.bytes_reclaimable} bytes reclaimable, {len(plan.skipped)} skipped")
+
+        details = [f"{a.target} -> {a.keep} ({humanize.naturalsize(a.reclaim)})" for a in plan.planned]
+        details += [f"Пропущено: {a.target}: {a.reason}" for a in plan.skipped]
+        text = summary
+        if plan.skipped:
+            text += f"\nПропущено: {len(plan.skipped)}"
+        if unconfirmed:
+            text += f"\nГруп лише за розміром чи схожістю (не змінюються): {unconfirmed}"
+
+        box = QMessageBox(self)
+        box.setWindowTitle("Заміна дублікатів посиланнями")
+        box.setDetailedText("\n".join(details))
+        if not plan.planned:
+            box.setIcon(QMessageBox.Information)
+            box.setText(text)
+            box.exec_()
+            return
+        box.setIcon(QMessageBox.Question)
+        if mode != LinkMode.REFLINK:
+            text += ("\n\nЖорстко пов'язані копії стають одним файлом: зміна однієї змінить усі. "
+                     "Перед заміною вміст кожного файлу перевіряється побайтово.")
+        box.setText(text + "\n\nВиконати заміну?")
+        box.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
+        box.setDefaultButton(QMessageBox.No)
+        if box.exec_() != QMessageBox.Yes:
+            return
+
+        if not self.duplicate_splash:
+            self.duplicate_splash = DuplicateFinderSplashScreen(self)
+        self.duplicate_splash.show()
+        self.duplicate_splash.update_progress(0, "Заміна дублікатів посиланнями...")
+        self.link_duplicates_btn.setEnabled(False)
+        self.duplicate_linker_thread = DuplicateLinker(plan)
+        self.duplicate_linker_thread.progress_updated.connect(self.update_duplicate_progress)
+        self.duplicate_linker_thread.link_finished.connect(self.on_duplicates_linked)
+        self.duplicate_linker_thread.start()
+
+    def on_duplicates_linked(self, report, error: str = ""):
+        """Show and log the outcome of a link run (error: why it broke off, "" when it completed)"""
+        self.link_duplicates_btn.setEnabled(True)
+        if self.duplicate_splash:
+            self.duplicate_splash.hide()
+
+        methods = {}
+        for action in report.linked:
+            methods[action.method] = methods.get(action.method, 0) + 1
+        method_text = ", ".join(f"{name}: {count}" for name, count in methods.items())
+        if hasattr(self.main_window, 'log_message'):
+            for action in report.linked:
+                self.main_window.log_message(f"CleanupHelper: Linked {action.target} -> {action.keep} ({action.method})")
+            self.main_window.log_message(
+                f"CleanupHelper: Reclaimed {report.bytes_reclaimed} bytes by linking {len(report.linked)} duplicates")
+
+        text = (f"Замінено {len(report.linked)} файлів ({method_text or '—'}), "
+                f"звільнено {humanize.naturalsize(report.bytes_reclaimed)}.")
+        if error:
+            text += f"\nЗаміну перервано помилкою: {error}"
+            if hasattr(self.main_window, 'log_message'):
+                self.main_window.log_message(f"CleanupHelper: Linking stopped by an error: {error}")
+        problems = [f"{a.target}: {a.reason}" for a in report.skipped + report.failed]
+        if problems:
+            details = "\n".join(problems[:5])
+            if len(problems) > 5:
+                details += f"\n... та ще {len(problems) - 5}"
+            text += f"\nНе замінено {len(problems)}:\n{details}"
+        if problems or error:
+            QMessageBox.warning(self, "Заміна посиланнями", text)
+        else:
+            QMessageBox.information(self, "Заміна посиланнями", text)
+
     def _delete_duplicate_files_list(self, files_to_delete):
         """Helper method to delete a list of files"""
         deleted_count = 0
@@ -4853,6 +5520,14 @@ class CleanupHelperWidget(QWidget):
         try:
             self.archive_status_label.setText(f"Сортування за {sort_by}...")
 
+            if self._archive_model_shown():
+                # The model re-sorts each folder level when it is fetched again
+                columns = {"name": ArchiveTreeModel.COL_NAME, "size": ArchiveTreeModel.COL_SIZE,
+                           "date": ArchiveTreeModel.COL_MODIFIED}
+                self.archive_view.model().sort(columns[sort_by], Qt.AscendingOrder if ascending else Qt.DescendingOrder)
+                self.archive_status_label.setText(f"Відсортовано за {sort_by} ({'за зростанням' if ascending else 'за спаданням'})")
+                return
+
             # Get the root item
             root = self.archive_tree.invisibleRootItem()
 
@@ -5100,15 +5775,18 @@ class CleanupHelperWidget(QWidget):
         self.archive_status_label.setText("Готовий до пошуку та фільтрації")
 
     def get_cached_scan_results(self, scan_path: str) -> dict:
-        """Get cached scan results for faster secondary searches"""
+        """Get cached scan results for faster secondary searches.
+
+        Refreshes the archive index (one stat per unchanged folder), so call it
+        off the GUI thread for large trees.
+        """
         cache_key = scan_path.lower()
 
         if hasattr(self, 'scan_cache') and cache_key in self.scan_cache:
             cached_data = self.scan_cache[cache_key]
-            # Check if cache is still valid (within last 5 minutes)
-            cache_time = cached_data.get('timestamp', 0)
-            current_time = datetime.now().timestamp()
-            if current_time - cache_time < 300:  # 5 minutes
+            # Still valid while no folder below scan_path changed since the results were cached
+            self.archive_index.refresh(scan_path)
+            if self.archive_index.fingerprint(scan_path) == cached_data.get('fingerprint'):
                 return cached_data.get('results', {})
 
         return None
@@ -5121,7 +5799,9 @@ class CleanupHelperWidget(QWidget):
         cache_key = scan_path.lower()
         self.scan_cache[cache_key] = {
             'results': results,
-            'timestamp': datetime.now().timestamp()
+            'timestamp': datetime.now().timestamp(),
+            # Index state known at caching time; a later change anywhere below scan_path alters it
+            'fingerprint': self.archive_index.fingerprint(scan_path)
         }
 
     def get_file_icon(self, file_path: str, extension: str = "") -> str:
@@ -5240,35 +5920,36 @@ class CleanupHelperWidget(QWidget):
 
         return icon_map.get(extension, '📄')
 
+    def _archive_model_shown(self) -> bool:
+        """True when the archive browser shows the lazy model view rather than the item tree"""
+        return self.archive_stack.currentWidget() is self.archive_view
+
+    def _selected_archive_paths(self) -> List[str]:
+        """Paths of the selected rows in whichever archive view is shown"""
+        if self._archive_model_shown():
+            return [index.data(Qt.UserRole) for index in self.archive_view.selectionModel().selectedRows()]
+        # Path is in column 4 (index 3)
+        return [item.text(4) for item in self.archive_tree.selectedItems()]
+
+    def _current_archive_path(self) -> str:
+        """Path of the current row in whichever archive view is shown"""
+        if self._archive_model_shown():
+            index = self.archive_view.currentIndex()
+            return index.data(Qt.UserRole) if index.isValid() else ""
+        current_item = self.archive_tree.currentItem()
+        return current_item.text(4) if current_item else ""
+
     def get_selected_files(self) -> List[str]:
         """Get paths of selected files only (exclude directories)"""
-        selected_files = []
-        for item in self.archive_tree.selectedItems():
-            # Path is in column 4 (index 3)
-            file_path = item.text(4)
-            if file_path and os.path.isfile(file_path):
-                selected_files.append(file_path)
-        return selected_files
+        return [path for path in self._selected_archive_paths() if path and os.path.isfile(path)]
 
     def get_selected_directories(self) -> List[str]:
         """Get paths of selected directories only"""
-        selected_directories = []
-        for item in self.archive_tree.selectedItems():
-            # Path is in column 4 (index 3)
-            dir_path = item.text(4)
-            if dir_path and os.path.isdir(dir_path):
-                selected_directories.append(dir_path)
-        return selected_directories
+        return [path for path in self._selected_archive_paths() if path and os.path.isdir(path)]
 
     def get_selected_items(self) -> List[str]:
         """Get paths of selected items (both files and directories)"""
-        selected_paths = []
-        for item in self.archive_tree.selectedItems():
-            # Path is in column 4 (index 3)
-            item_path = item.text(4)
-            if item_path and os.path.exists(item_path):
-                selected_paths.append(item_path)
-        return selected_paths
+        return [path for path in self._selected_archive_paths() if path and os.path.exists(path)]
 
     def show_compression_window(self):
         """Show compression window with selected files and directories"""
@@ -5388,6 +6069,10 @@ class CleanupHelperWidget(QWidget):
                         import shutil
                         shutil.rmtree(dir_path)
                         deleted_count += 1
+                    # A snapshot folder's manifest and journal go with it
+                    for removed in remove_snapshot_metadata(dir_path):
+                        if hasattr(self.main_window, 'log_message'):
+                            self.main_window.log_message(f"CleanupHelper: Видалено {removed}")
                     current_progress += 1
                 except Exception as e:
                     if hasattr(self.main_window, 'log_message'):
@@ -5407,8 +6092,8 @@ class CleanupHelperWidget(QWidget):
             self._remove_items_from_tree(selected_items)
 
             # Invalidate cache to ensure next scan is fresh
-            self._file_cache = {}
-            self._cache_timestamp = 0
+            self._file_table = FileTable()
+            self._table_fingerprint = None
             self._last_scan_path = ""
 
             # Update analytics if on analytics tab
@@ -5424,6 +6109,10 @@ class CleanupHelperWidget(QWidget):
             if not deleted_items or not hasattr(self, 'archive_tree'):
                 return
 
+            if self._archive_model_shown():
+                self.archive_view.model().remove_paths(deleted_items)
+                return
+
             root = self.archive_tree.invisibleRootItem()
             items_to_remove = []
             deleted_set = set(deleted_items)  # Convert to set for faster lookup
@@ -5527,10 +6216,11 @@ class CleanupHelperWidget(QWidget):
                     self.current_analytics_data['total_files'] -= 1
 
                 # Update large files list
-                self.current_analytics_data['large_files'] = [
-                    f for f in self.current_analytics_data['large_files']
-                    if f['path'] != item_path
-                ]
+                large_files = self.current_analytics_data['large_files']
+                self.current_analytics_data['large_files'] = [f for f in large_files if f['path'] != item_path]
+                removed_large = len(large_files) - len(self.current_analytics_data['large_files'])
+                if removed_large and 'large_files_count' in self.current_analytics_data:
+                    self.current_analytics_data['large_files_count'] -= removed_large
 
                 # Update file types
                 ext = os.path.splitext(item_path)[1].lower()
@@ -5544,9 +6234,6 @@ class CleanupHelperWidget(QWidget):
                         # Estimate size removal (we don't have exact size anymore)
                         file_type_data['size'] = max(0, file_type_data['size'] - 1024)  # Remove estimated 1KB
 
-            # Update large files count
-            self.current_analytics_data['large_files_count'] = len(self.current_analytics_data['large_files'])
-
             # Update analytics display
             self.update_analytics_display(self.current_analytics_data)
 
@@ -5604,33 +6291,74 @@ class CleanupHelperWidget(QWidget):
         selected_files = self.get_selected_files()
         if not selected_files:
             return
-
+        self._restore_paths(selected_files)
+
+    def restore_selected_snapshots(self):
+        """Restore whole snapshot folders (with a manifest) to the desktop"""
+        jobs = []
+        for dir_path in self.get_selected_directories():
+            manifest_path = manifest_path_for(dir_path)
+            if os.path.isfile(manifest_path):
+                jobs.append((manifest_path, load_manifest(manifest_path)))
+        if jobs:
+            self._start_restore(jobs)
+
+    def _restore_paths(self, paths: List[str]):
+        """Restore archived items, resolving their original location from snapshot manifests"""
         desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
-        restored_count = 0
+        manifest_by_dir = {}
+        entries_by_manifest = {}
+        jobs = {}
+
+        for path in paths:
+            parent = os.path.dirname(path)
+            if parent not in manifest_by_dir:
+                manifest_by_dir[parent] = find_snapshot_manifest(parent)
+            manifest_path = manifest_by_dir[parent]
+
+            entry = None
+            if manifest_path:
+                if manifest_path not in entries_by_manifest:
+                    entries_by_manifest[manifest_path] = {
+                        os.path.normcase(e.archived): e for e in load_manifest(manifest_path)
+                    }
+                entry = entries_by_manifest[manifest_path].get(os.path.normcase(path))
+            if entry is None:
+                # Not a top-level snapshot item: restore it onto the desktop under its own name
+                manifest_path = None
+                entry = ManifestEntry(name=os.path.basename(path),
+                                      original=os.path.join(desktop_path, os.path.basename(path)),
+                                      archived=path, is_dir=os.path.isdir(path))
+            jobs.setdefault(manifest_path, []).append(entry)
+
+        self._start_restore(list(jobs.items()))
+
+    def _start_restore(self, jobs):
+        if self.restorer_thread and self.restorer_thread.isRunning():
+            QMessageBox.warning(self, "Зайнято", "Відновлення вже виконується.")
+            return
 
         self.archive_status_label.setText("Відновлення файлів на робочий стіл...")
-
-        for i, source_path in enumerate(selected_files):
-            try:
-                target_path = os.path.join(desktop_path, os.path.basename(source_path))
-
-                # Handle name conflicts
-                counter = 1
-                while os.path.exists(target_path):
-                    name, ext = os.path.splitext(os.path.basename(source_path))
-                    target_path = os.path.join(desktop_path, f"{name}_{counter}{ext}")
-                    counter += 1
-
-                # Copy file
-                if os.path.isfile(source_path):
-                    shutil.copy2(source_path, target_path)
-                    restored_count += 1
-            except Exception as e:
-                if hasattr(self.main_window, 'log_message'):
-                    self.main_window.log_message(f"CleanupHelper: Помилка відновлення {source_path}: {e}")
-                self.archive_status_label.setText(f"Відновлено {restored_count} з {len(selected_files)} файлів")
-
-        QMessageBox.information(self, "Готово", f"Відновлено {restored_count} файл(ів) на робочий стіл.")
+        self.restorer_thread = SnapshotRestorer(jobs)
+        self.restorer_thread.progress_updated.connect(
+            lambda value, message: self.archive_status_label.setText(message))
+        self.restorer_thread.restore_finished.connect(self.on_restore_finished)
+        self.restorer_thread.start()
+
+    def on_restore_finished(self, restored: int, errors: int, restored_paths: list):
+        """Update the archive view after a batched restore"""
+        self._remove_items_from_tree(restored_paths)
+        self._file_table = FileTable()
+        self._table_fingerprint = None
+        self._last_scan_path = ""
+
+        message = f"Відновлено {restored} елемент(ів) на робочий стіл."
+        if errors:
+            message += f"\nПомилок: {errors}"
+        self.archive_status_label.setText(message.replace("\n", " "))
+        if hasattr(self.main_window, 'log_message'):
+            self.main_window.log_message(f"CleanupHelper: {message}")
+        QMessageBox.information(self, "Готово", message)
 
     def install_compress_package(self):
         """Install the compress package"""
@@ -5702,6 +6430,14 @@ class CleanupHelperWidget(QWidget):
             self.compressor_thread.stop()
             self.compressor_thread.wait()
 
+        if self.restorer_thread and self.restorer_thread.isRunning():
+            self.restorer_thread.stop()
+            self.restorer_thread.wait()
+
+        if self.duplicate_linker_thread and self.duplicate_linker_thread.isRunning():
+            self.duplicate_linker_thread.stop()
+            self.duplicate_linker_thread.wait()
+
         event.accept()
 
     def apply_quick_filter(self, filter_type: str):
@@ -5754,22 +6490,14 @@ class CleanupHelperWidget(QWidget):
             """)
 
             # Rebuild tree from cache to show all items
-            if self._file_cache:
+            if self._file_table:
                 self.archive_status_label.setText("Скидання фільтрів...")
-                self.archive_tree.clear()
                 self._build_tree_from_cache("")
 
                 # Count items from cache instead of tree
-                total_count = self._count_cache_items(self._file_cache)
+                total_count = len(self._file_table)
                 self.archive_status_label.setText(f"Всі файли: {total_count} елементів")
 
-                # Expand tree to show all items
-                self.archive_tree.expandAll()
-
-                # Enable selection and ensure items are selectable
-                for i in range(self.archive_tree.topLevelItemCount()):
-                    self._make_tree_item_selectable(self.archive_tree.topLevelItem(i))
-
                 if hasattr(self.main_window, 'log_message'):
                     self.main_window.log_message(f"CleanupHelper: Фільтри скинуто. Показано {total_count} файлів")
             else:
@@ -5780,18 +6508,6 @@ class CleanupHelperWidget(QWidget):
             if hasattr(self.main_window, 'log_message'):
                 self.main_window.log_message(f"CleanupHelper: Помилка скидання фільтрів: {e}")
 
-    def _count_cache_items(self, cache_dict: dict) -> int:
-        """Count all items in cache dictionary"""
-        try:
-            count = 0
-            for item_name, item_data in cache_dict.items():
-                count += 1
-                if item_data.get('is_dir') and 'children' in item_data:
-                    count += self._count_cache_items(item_data['children'])
-            return count
-        except:
-            return 0
-
     def _make_tree_item_selectable(self, item: QTreeWidgetItem):
         """Make tree item and all its children selectable"""
         if not item:
@@ -5828,7 +6544,7 @@ class CleanupHelperWidget(QWidget):
 
     def _update_filter_status(self, filter_name: str, visible_count: int):
         """Update the filter status label"""
-        total_count = self._count_cache_items(self._file_cache) if self._file_cache else 0
+        total_count = len(self._file_table)
         self.archive_status_label.setText(f"Фільтр: {filter_name} ({visible_count} з {total_count} файлів)")
         self.archive_status_label.setStyleSheet("""
             QLabel {
@@ -5889,7 +6605,7 @@ class CleanupHelperWidget(QWidget):
                 return
 
             # Check if we have cached data to work with
-            if not self._file_cache:
+            if not self._file_table:
                 if hasattr(self.main_window, 'log_message'):
                     self.main_window.log_message("CleanupHelper: Кеш відсутній, оновлення дерева...")
                 self.refresh_archive_tree()
@@ -5900,84 +6616,9 @@ class CleanupHelperWidget(QWidget):
             # Clear current tree and rebuild from cache with filter
             self.archive_tree.clear()
 
-            def _build_filtered_tree_from_cache(cache_dict: dict, parent_item: QTreeWidgetItem, extensions: list):
-                """Build tree from cache applying extension filter"""
-                visible_count = 0
-                items_processed = 0
-
-                for item_name, item_data in cache_dict.items():
-                    items_processed += 1
-                    if item_data['is_dir']:
-                        # Check if this directory should be included
-                        should_include_dir = False
-                        dir_has_matching_children = False
-
-                        # Check if directory itself has matching children
-                        for child_name, child_data in item_data.get('children', {}).items():
-                            if not child_data['is_dir']:
-                                _, child_ext = os.path.splitext(child_name)
-                                if child_ext.lower() in extensions:
-                                    dir_has_matching_children = True
-                                    should_include_dir = True
-                                    break
-
-                        if should_include_dir:
-                            # Create directory item
-                            folder_info = self.identify_folder_structure(item_data['path'])
-                            dir_item = QTreeWidgetItem(parent_item)
-                            dir_item.setText(0, folder_info['name'])
-                            dir_item.setText(2, "Папка")
-                            dir_item.setText(3, item_data.get('modified', ''))
-                            dir_item.setText(4, item_data['path'])
-                            dir_item.setIcon(0, QIcon(folder_info['icon']))
-
-                            # Build children recursively
-                            child_visible = _build_filtered_tree_from_cache(
-                                item_data.get('children', {}), dir_item, extensions
-                            )
-
-                            # Update directory item count
-                            if child_visible > 0:
-                                dir_item.setText(1, f"Папка ({child_visible} елементів)")
-                            else:
-                                dir_item.setText(1, "Папка")
-
-                            visible_count += 1
-                    else:
-                        # For files, check extension
-                        _, file_ext = os.path.splitext(item_name)
-                        if file_ext.lower() in extensions:
-                            file_item = QTreeWidgetItem(parent_item)
-
-                            # Build display name with icon
-                            icon_name = self.get_file_icon(item_data['path'], file_ext)
-                            display_name = f"{icon_name} {item_name}"
-
-                            file_item.setText(0, display_name)
-
-                            if 'size' in item_data:
-                                file_size = item_data['size']
-                                try:
-                                    import humanize
-                                    file_item.setText(1, humanize.naturalsize(file_size))
-                                except ImportError:
-                                    size_mb = file_size / (1024 * 1024)
-                                    if size_mb < 1:
-                                        file_item.setText(1, f"{file_size / 1024:.1f} KB")
-                                    else:
-                                        file_item.setText(1, f"{size_mb:.1f} MB")
-                            else:
-                                file_item.setText(1, "Розмір невідомий")
-
-                            file_item.setText(2, self.get_file_category(item_data['path']))
-                            file_item.setText(3, item_data.get('modified', ''))
-                            file_item.setText(4, item_data['path'])
-                            visible_count += 1
-
-                return visible_count
-
             # Build filtered tree
-            total_visible = _build_filtered_tree_from_cache(self._file_cache, self.archive_tree.invisibleRootItem(), extensions)
+            matching_rows = set(self._file_table.file_rows(extensions=extensions))
+            total_visible = self._build_filtered_tree_from_table(matching_rows, -1, self.archive_tree.invisibleRootItem())
 
             # Update progress and status
             self.archive_status_label.setText(f"Фільтр застосовано: {total_visible} файлів")
@@ -6007,7 +6648,7 @@ class CleanupHelperWidget(QWidget):
         """Apply size filter using cached data for optimal performance"""
         try:
             # Check if we have cached data to work with
-            if not self._file_cache:
+            if not self._file_table:
                 if hasattr(self.main_window, 'log_message'):
                     self.main_window.log_message("CleanupHelper: Кеш відсутній, оновлення дерева...")
                 self.refresh_archive_tree()
@@ -6021,77 +6662,9 @@ class CleanupHelperWidget(QWidget):
             # Clear current tree and rebuild from cache with size filter
             self.archive_tree.clear()
 
-            def _build_filtered_tree_by_size(cache_dict: dict, parent_item: QTreeWidgetItem, min_bytes: int, max_bytes: int):
-                """Build tree from cache applying size filter"""
-                visible_count = 0
-                items_processed = 0
-
-                for item_name, item_data in cache_dict.items():
-                    items_processed += 1
-                    if item_data['is_dir']:
-                        # Check if directory should be included (has matching children)
-                        should_include_dir = False
-
-                        for child_name, child_data in item_data.get('children', {}).items():
-                            if not child_data['is_dir'] and 'size' in child_data:
-                                if min_bytes <= child_data['size'] <= max_bytes:
-                                    should_include_dir = True
-                                    break
-
-                        if should_include_dir:
-                            # Create directory item
-                            folder_info = self.identify_folder_structure(item_data['path'])
-                            dir_item = QTreeWidgetItem(parent_item)
-                            dir_item.setText(0, folder_info['name'])
-                            dir_item.setText(2, "Папка")
-                            dir_item.setText(3, item_data.get('modified', ''))
-                            dir_item.setText(4, item_data['path'])
-                            dir_item.setIcon(0, QIcon(folder_info['icon']))
-
-                            # Build children recursively
-                            child_visible = _build_filtered_tree_by_size(
-                                item_data.get('children', {}), dir_item, min_bytes, max_bytes
-                            )
-
-                            # Update directory item count
-                            if child_visible > 0:
-                                dir_item.setText(1, f"Папка ({child_visible} елементів)")
-                            else:
-                                dir_item.setText(1, "Папка")
-
-                            visible_count += 1
-                    else:
-                        # For files, check size
-                        if 'size' in item_data and min_bytes <= item_data['size'] <= max_bytes:
-                            file_item = QTreeWidgetItem(parent_item)
-
-                            # Build display name with icon
-                            _, file_ext = os.path.splitext(item_name)
-                            icon_name = self.get_file_icon(item_data['path'], file_ext)
-                            display_name = f"{icon_name} {item_name}"
-
-                            file_item.setText(0, display_name)
-
-                            file_size = item_data['size']
-                            try:
-                                import humanize
-                                file_item.setText(1, humanize.naturalsize(file_size))
-                            except ImportError:
-                                size_mb = file_size / (1024 * 1024)
-                                if size_mb < 1:
-                                    file_item.setText(1, f"{file_size / 1024:.1f} KB")
-                                else:
-                                    file_item.setText(1, f"{size_mb:.1f} MB")
-
-                            file_item.setText(2, self.get_file_category(item_data['path']))
-                            file_item.setText(3, item_data.get('modified', ''))
-                            file_item.setText(4, item_data['path'])
-                            visible_count += 1
-
-                return visible_count
-
             # Build filtered tree
-            total_visible = _build_filtered_tree_by_size(self._file_cache, self.archive_tree.invisibleRootItem(), min_bytes, max_bytes)
+            matching_rows = set(self._file_table.file_rows(min_size=min_bytes, max_size=max_bytes))
+            total_visible = self._build_filtered_tree_from_table(matching_rows, -1, self.archive_tree.invisibleRootItem())
 
             # Update progress and status
             self.archive_status_label.setText(f"Фільтр розміру застосовано: {total_visible} файлів")
@@ -6118,7 +6691,7 @@ class CleanupHelperWidget(QWidget):
         """Apply date filter using cached data for optimal performance"""
         try:
             # Check if we have cached data to work with
-            if not self._file_cache:
+            if not self._file_table:
                 if hasattr(self.main_window, 'log_message'):
                     self.main_window.log_message("CleanupHelper: Кеш відсутній, оновлення дерева...")
                 self.refresh_archive_tree()
@@ -6132,81 +6705,9 @@ class CleanupHelperWidget(QWidget):
             # Clear current tree and rebuild from cache with date filter
             self.archive_tree.clear()
 
-            def _build_filtered_tree_by_date(cache_dict: dict, parent_item: QTreeWidgetItem, min_timestamp: float, max_timestamp: float):
-                """Build tree from cache applying date filter"""
-                visible_count = 0
-                items_processed = 0
-
-                for item_name, item_data in cache_dict.items():
-                    items_processed += 1
-                    if item_data['is_dir']:
-                        # Check if directory should be included (has matching children)
-                        should_include_dir = False
-
-                        for child_name, child_data in item_data.get('children', {}).items():
-                            if not child_data['is_dir'] and 'modified_timestamp' in child_data:
-                                if min_timestamp <= child_data['modified_timestamp'] <= max_timestamp:
-                                    should_include_dir = True
-                                    break
-
-                        if should_include_dir:
-                            # Create directory item
-                            folder_info = self.identify_folder_structure(item_data['path'])
-                            dir_item = QTreeWidgetItem(parent_item)
-                            dir_item.setText(0, folder_info['name'])
-                            dir_item.setText(2, "Папка")
-                            dir_item.setText(3, item_data.get('modified', ''))
-                            dir_item.setText(4, item_data['path'])
-                            dir_item.setIcon(0, QIcon(folder_info['icon']))
-
-                            # Build children recursively
-                            child_visible = _build_filtered_tree_by_date(
-                                item_data.get('children', {}), dir_item, min_timestamp, max_timestamp
-                            )
-
-                            # Update directory item count
-                            if child_visible > 0:
-                                dir_item.setText(1, f"Папка ({child_visible} елементів)")
-                            else:
-                                dir_item.setText(1, "Папка")
-
-                            visible_count += 1
-                    else:
-                        # For files, check modification date
-                        item_modified = item_data.get('modified_timestamp')
-                        if item_modified and min_timestamp <= item_modified <= max_timestamp:
-                            file_item = QTreeWidgetItem(parent_item)
-
-                            # Build display name with icon
-                            _, file_ext = os.path.splitext(item_name)
-                            icon_name = self.get_file_icon(item_data['path'], file_ext)
-                            display_name = f"{icon_name} {item_name}"
-
-                            file_item.setText(0, display_name)
-
-                            if 'size' in item_data:
-                                file_size = item_data['size']
-                                try:
-                                    import humanize
-                                    file_item.setText(1, humanize.naturalsize(file_size))
-                                except ImportError:
-                                    size_mb = file_size / (1024 * 1024)
-                                    if size_mb < 1:
-                                        file_item.setText(1, f"{file_size / 1024:.1f} KB")
-                                    else:
-                                        file_item.setText(1, f"{size_mb:.1f} MB")
-                            else:
-                                file_item.setText(1, "Розмір невідомий")
-
-                            file_item.setText(2, self.get_file_category(item_data['path']))
-                            file_item.setText(3, item_data.get('modified', ''))
-                            file_item.setText(4, item_data['path'])
-                            visible_count += 1
-
-                return visible_count
-
             # Build filtered tree
-            total_visible = _build_filtered_tree_by_date(self._file_cache, self.archive_tree.invisibleRootItem(), min_timestamp, max_timestamp)
+            matching_rows = set(self._file_table.file_rows(min_mtime=min_timestamp, max_mtime=max_timestamp))
+            total_visible = self._build_filtered_tree_from_table(matching_rows, -1, self.archive_tree.invisibleRootItem())
 
             # Update progress and status
             self.archive_status_label.setText(f"Фільтр дати застосовано: {total_visible} файлів")
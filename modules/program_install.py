@@ -58,6 +58,9 @@ from typing import List, Dict, Optional, Set, Callable, Tuple, Any, Union
 from dataclasses import dataclass, field
 from datetime import datetime
 
+# Shared directory walker of the main application (lives next to "Desctop organiser.py")
+from fs_walker import DirectoryWalker
+
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -1362,34 +1365,33 @@ class ProgramInstaller:
         ext_filter_count = 0
         msi_prop_fail_count = 0
 
-        # Use scandir for better performance than os.walk
+        # Directories are listed in parallel by the shared walker; ignored folders are never entered
+        walker = DirectoryWalker(ignore_dirs=ignore_dirs_lower)
         try:
-            for root, dirs, files in os.walk(base_path, topdown=True):
+            for batch in walker.walk(str(base_path)):
                 dir_count += 1
-                current_path = Path(root)
-
-                # Optimize directory filtering in-place for better performance
-                original_dir_count = len(dirs)
-                dirs[:] = [d for d in dirs if d.lower() not in ignore_dirs_lower]
-                ignored_count_this_level = original_dir_count - len(dirs)
-                ignored_dir_count += ignored_count_this_level
+                ignored_dir_count += batch.ignored
+                if batch.error is not None:
+                    logger.debug(f" -> Cannot list directory {batch.path}: {batch.error}")
+                    continue
 
                 # Batch process files for better performance
                 valid_files = []
-                for filename in files:
+                for entry in batch.files:
                     file_count += 1
+                    filename = entry.name
                     filename_lower = filename.lower()
-                    file_path = current_path / filename
-                    ext_lower = file_path.suffix.lower()
+                    ext_lower = os.path.splitext(filename_lower)[1]
 
                     # Early filter 1: Extension (use set for O(1) lookup)
                     if ext_lower not in supported_extensions:
                         ext_filter_count += 1
                         continue
+                    file_path = Path(entry.path)
 
-                    # Quick size check without full stat if possible
+                    # Size check from the directory entry (no extra stat on Windows)
                     try:
-                        file_size = file_path.stat().st_size
+                        file_size = entry.stat().st_size
                         if file_size < min_size:
                             size_filter_count += 1
                             continue
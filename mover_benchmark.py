@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Mover Benchmark - throughput and latency harness for the desktop mover
+
+Builds synthetic desktops in temporary directories and runs the same
+plan -> journal -> move -> manifest pipeline as FileMover, without the GUI.
+Cross-volume moves use a second directory on another device: /dev/shm
+(tmpfs) on Linux when it is a separate mount, or any path given with
+--cross-dir (e.g. a mounted loop image or a second drive).
+
+Reports files/s, bytes/s, counted filesystem calls and peak memory for
+every scenario and stores the results as JSON, so runs of different
+versions can be compared with --compare.
+
+Usage:
+    python mover_benchmark.py
+    python mover_benchmark.py --counts 10 1000 100000 --profiles small mixed
+    python mover_benchmark.py --output results.json --compare previous.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from desktop_mover import (
+    MoverEngine, FilterRules, plan_directory, execute_plan, write_manifest, same_device
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# File size mixes (bytes, weight)
+PROFILES = {
+    'small': [(1024, 60), (16 * 1024, 30), (128 * 1024, 10)],
+    'mixed': [(4 * 1024, 50), (512 * 1024, 30), (8 * 1024 * 1024, 15), (64 * 1024 * 1024, 5)],
+}
+
+# os functions counted during a run; DirEntry methods are free (cached) and not counted
+COUNTED_OS_CALLS = [
+    'stat', 'lstat', 'scandir', 'listdir', 'rename', 'replace', 'unlink', 'remove',
+    'rmdir', 'mkdir', 'open', 'fsync', 'copy_file_range', 'sendfile', 'symlink', 'readlink',
+]
+
+
+class CallCounter:
+    """Counts calls of selected os functions while active"""
+
+    def __init__(self, names: List[str]):
+        self.names = [name for name in names if hasattr(os, name)]
+        self.counts: Dict[str, int] = {}
+        self._originals = {}
+
+    def __enter__(self):
+        for name in self.names:
+            original = getattr(os, name)
+            self._originals[name] = original
+            setattr(os, name, self._wrap(name, original))
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+        self._originals = {}
+
+    def _wrap(self, name, original):
+        def counted(*args, **kwargs):
+            self.counts[name] = self.counts.get(name, 0) + 1
+            return original(*args, **kwargs)
+        return counted
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+def read_proc_io() -> Dict[str, int]:
+    """Kernel read/write syscall counters of this process (Linux only)"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            values = dict(line.split(':', 1) for line in f)
+        return {'syscr': int(values['syscr']), 'syscw': int(values['syscw'])}
+    except (OSError, KeyError, ValueError):
+        return {}
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def find_cross_dir(base_dir: str) -> Optional[str]:
+    """A writable directory on a different device than base_dir, if one exists"""
+    for candidate in ('/dev/shm', '/run/user/%d' % os.getuid() if hasattr(os, 'getuid') else ''):
+        if candidate and os.path.isdir(candidate) and os.access(candidate, os.W_OK):
+            if not same_device(candidate, base_dir):
+                return candidate
+    return None
+
+
+def build_desktop(path: str, count: int, profile: str, max_bytes: int, seed: int = 42) -> int:
+    """Create `count` synthetic desktop entries; returns total bytes written"""
+    rng = random.Random(seed)
+    sizes, weights = zip(*PROFILES[profile])
+    chunk = os.urandom(1024 * 1024)
+    total = 0
+    os.makedirs(path, exist_ok=True)
+    for i in range(count):
+        size = rng.choices(sizes, weights)[0]
+        if total + size > max_bytes:
+            size = min(1024, max(0, max_bytes - total))
+        ext = rng.choice(['.txt', '.pdf', '.png', '.docx', '.zip', '.lnk', '.iso'])
+        with open(os.path.join(path, f"file_{i:06d}{ext}"), 'wb') as f:
+            remaining = size
+            while remaining > 0:
+                n = min(remaining, len(chunk))
+                f.write(chunk[:n])
+                remaining -= n
+        total += size
+    return total
+
+
+def run_scenario(work_dir: str, dest_root: str, count: int, profile: str, max_bytes: int,
+                 workers: int, trace_memory: bool) -> Dict:
+    desktop = os.path.join(work_dir, f"desktop_{profile}_{count}")
+    dest = os.path.join(dest_root, f"archive_{profile}_{count}", "Робочий стіл benchmark")
+    os.makedirs(dest, exist_ok=True)
+    total_bytes = build_desktop(desktop, count, profile, max_bytes)
+
+    rules = FilterRules(max_size_bytes=max_bytes or 1)
+    engine = MoverEngine(max_workers=workers)
+
+    if trace_memory:
+        tracemalloc.start()
+    io_before = read_proc_io()
+    with CallCounter(COUNTED_OS_CALLS) as counter:
+        start = time.perf_counter()
+        plan = plan_directory(desktop, rules)
+        plan_seconds = time.perf_counter() - start
+        result = execute_plan(plan, dest, engine)
+        write_manifest(desktop, dest, result.succeeded)
+        total_seconds = time.perf_counter() - start
+    io_after = read_proc_io()
+    traced_peak = None
+    if trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    shutil.rmtree(desktop, ignore_errors=True)
+    shutil.rmtree(os.path.dirname(dest), ignore_errors=True)
+
+    move_seconds = max(total_seconds - plan_seconds, 1e-9)
+    return {
+        'count': count,
+        'profile': profile,
+        'cross_volume': not same_device(work_dir, dest_root),
+        'bytes': total_bytes,
+        'moved': result.moved,
+        'errors': result.errors,
+        'plan_seconds': round(plan_seconds, 6),
+        'total_seconds': round(total_seconds, 6),
+        'files_per_s': round(result.moved / max(total_seconds, 1e-9), 1),
+        'bytes_per_s': round(result.bytes_moved / move_seconds, 1),
+        'os_calls': counter.total,
+        'os_calls_by_name': dict(sorted(counter.counts.items())),
+        'kernel_syscalls': {k: io_after[k] - io_before[k] for k in io_after} if io_before else {},
+        'peak_traced_mb': round(traced_peak, 2) if traced_peak is not None else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1) if resource is not None else None,
+    }
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def compare_results(current: Dict, previous_path: str):
+    """Print files/s change per scenario against a previous results file"""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    key = lambda r: (r['count'], r['profile'], r['cross_volume'])
+    old = {key(r): r for r in previous.get('results', [])}
+    print(f"\nComparison with {previous_path} ({previous.get('revision', '?')}):")
+    for r in current['results']:
+        before = old.get(key(r))
+        if not before or not before['files_per_s']:
+            continue
+        change = (r['files_per_s'] - before['files_per_s']) / before['files_per_s'] * 100
+        print(f"  {r['profile']:>6} {r['count']:>7} {'cross' if r['cross_volume'] else 'same':>5}: "
+              f"{before['files_per_s']:>10.1f} -> {r['files_per_s']:>10.1f} files/s ({change:+.1f}%)")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Mover Benchmark - throughput and latency harness for the desktop mover",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 1000, 100000],
+                        help='Number of desktop entries per scenario')
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=['small', 'mixed'],
+                        help='File size mixes')
+    parser.add_argument('--max-mb', type=int, default=512,
+                        help='Upper bound for the bytes written per scenario')
+    parser.add_argument('--workers', type=int, default=4, help='Mover thread pool size')
+    parser.add_argument('--work-dir', help='Directory for synthetic desktops (default: system temp)')
+    parser.add_argument('--cross-dir', help='Directory on another volume for cross-volume scenarios')
+    parser.add_argument('--no-cross', action='store_true', help='Skip cross-volume scenarios')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Also report the Python-level allocation peak (slower)')
+    parser.add_argument('--output', help='JSON results file (default: mover_benchmark_<timestamp>.json)')
+    parser.add_argument('--compare', help='Previous JSON results file to compare against')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="mover_bench_", dir=args.work_dir)
+    targets = [('same', tempfile.mkdtemp(prefix="dest_", dir=work_dir))]
+    if not args.no_cross:
+        cross_base = args.cross_dir or find_cross_dir(work_dir)
+        if cross_base:
+            targets.append(('cross', tempfile.mkdtemp(prefix="mover_bench_", dir=cross_base)))
+        else:
+            print("No second volume found, cross-volume scenarios skipped (use --cross-dir)")
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'workers': args.workers,
+        'results': [],
+    }
+
+    try:
+        for label, dest_root in targets:
+            for profile in args.profiles:
+                for count in args.counts:
+                    r = run_scenario(work_dir, dest_root, count, profile, args.max_mb * 1024 * 1024,
+                                     args.workers, args.trace_memory)
+                    report['results'].append(r)
+                    print(f"{profile:>6} {count:>7} {label:>5}: {r['files_per_s']:>10.1f} files/s "
+                          f"{r['bytes_per_s'] / (1024 * 1024):>9.1f} MB/s  "
+                          f"os calls {r['os_calls']:>8}  rss {r['peak_rss_mb']} MB")
+    finally:
+        for _, dest_root in targets:
+            shutil.rmtree(dest_root, ignore_errors=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = args.output or f"mover_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        compare_results(report, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
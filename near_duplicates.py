@@ -0,0 +1,217 @@
+"""Near-duplicate detection: resized or re-encoded images and re-saved documents.
+
+Images get a 64-bit difference hash (Pillow, optional); text-like files and
+office documents get a MinHash signature of their word shingles. Both are
+strings, so they can live in the hash cache next to content digests. Similar
+files are found through locality-sensitive hashing: only files sharing an
+LSH bucket are compared, so the cost grows with the number of candidates
+rather than with the square of the number of files.
+This module must not import PyQt5.
+"""
+
+import hashlib
+import os
+import re
+import zipfile
+from typing import Dict, Hashable, Iterable, List, Optional
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = None
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp', '.heic'}
+TEXT_EXTENSIONS = {'.txt', '.md', '.rtf', '.csv', '.log', '.ini', '.json', '.xml', '.yaml', '.yml',
+                   '.html', '.htm', '.py', '.js', '.sql', '.tex'}
+# Zipped office formats and the members holding their text
+DOCUMENT_MEMBERS = {
+    '.docx': re.compile(r'word/document\.xml$'),
+    '.pptx': re.compile(r'ppt/slides/slide\d+\.xml$'),
+    '.odt': re.compile(r'content\.xml$'),
+    '.odp': re.compile(r'content\.xml$'),
+}
+
+IMAGE_HASH_BITS = 64
+DEFAULT_IMAGE_DISTANCE = 5  # differing bits of two difference hashes still called similar
+MIN_IMAGE_DETAIL = 4  # hashes with fewer set (or unset) bits come from near-uniform images
+SHINGLE_WORDS = 5
+SIGNATURE_SLOTS = 64
+LSH_BANDS = 16  # 16 bands of 4 slots: pairs above ~0.5 similarity become candidates
+DEFAULT_TEXT_SIMILARITY = 0.8  # estimated Jaccard similarity of the shingle sets
+MIN_SHINGLES = 16  # shorter texts are too small to compare meaningfully
+MAX_TEXT_BYTES = 2 * 1024 * 1024
+
+IMAGE_HASH_KIND = f"dhash{IMAGE_HASH_BITS}"
+TEXT_SIGNATURE_KIND = f"minhash{SIGNATURE_SLOTS}-w{SHINGLE_WORDS}"
+
+_WORD = re.compile(r'\w+')
+_TAG = re.compile(r'<[^>]+>')
+
+
+def is_image(path: str) -> bool:
+    return PIL_AVAILABLE and os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def is_text(path: str) -> bool:
+    ext = os.path.splitext(path)[1].lower()
+    return ext in TEXT_EXTENSIONS or ext in DOCUMENT_MEMBERS
+
+
+def image_hash(path: str) -> Optional[str]:
+    """Difference hash: brightness gradients of a 9x8 grayscale thumbnail, as 16 hex digits"""
+    if not PIL_AVAILABLE:
+        return None
+    try:
+        with Image.open(path) as img:
+            img.draft('L', (64, 64))  # JPEG: decode at a reduced scale
+            pixels = list(img.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    # Blank scans and smooth backgrounds hash to (nearly) all zeros and would match each other
+    if not MIN_IMAGE_DETAIL <= bin(value).count('1') <= IMAGE_HASH_BITS - MIN_IMAGE_DETAIL:
+        return None
+    return f"{value:016x}"
+
+
+def extract_text(path: str, limit: int = MAX_TEXT_BYTES) -> Optional[str]:
+    """Text of a plain-text file or a zipped office document, up to limit bytes"""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext in DOCUMENT_MEMBERS:
+            member = DOCUMENT_MEMBERS[ext]
+            parts = []
+            with zipfile.ZipFile(path) as archive:
+                for name in archive.namelist():
+                    if member.match(name):
+                        with archive.open(name) as f:
+                            parts.append(_TAG.sub(' ', f.read(limit).decode('utf-8', errors='ignore')))
+            return ' '.join(parts)
+        with open(path, 'rb') as f:
+            data = f.read(limit)
+    except (OSError, zipfile.BadZipFile, RuntimeError):
+        return None
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('cp1251', errors='replace')  # older Ukrainian/Russian text files
+
+
+def minhash_signature(text: str) -> Optional[str]:
+    """One-permutation MinHash of the text's word shingles, as SIGNATURE_SLOTS hex values.
+
+    Every shingle is hashed once; its hash picks a slot and competes for that
+    slot's minimum. Empty slots borrow from the next filled slot so that
+    short texts still give comparable signatures.
+    """
+    words = _WORD.findall(text.lower())
+    shingles = {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    slots = [None] * SIGNATURE_SLOTS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        slot, value = h % SIGNATURE_SLOTS, h // SIGNATURE_SLOTS
+        if slots[slot] is None or value < slots[slot]:
+            slots[slot] = value
+    for i in range(SIGNATURE_SLOTS):
+        if slots[i] is None:
+            distance = 1
+            while slots[(i + distance) % SIGNATURE_SLOTS] is None:
+                distance += 1
+            # Offset by the distance so borrowed values only match the same borrowing
+            slots[i] = (slots[(i + distance) % SIGNATURE_SLOTS] + (distance << 58)) & (2 ** 64 - 1)
+    return ''.join(f"{value:016x}" for value in slots)
+
+
+def text_signature(path: str) -> Optional[str]:
+    text = extract_text(path)
+    return minhash_signature(text) if text else None
+
+
+def signature_similarity(first: str, second: str) -> float:
+    """Estimated Jaccard similarity: share of equal signature slots"""
+    equal = sum(first[i:i + 16] == second[i:i + 16] for i in range(0, len(first), 16))
+    return equal / SIGNATURE_SLOTS
+
+
+class _DisjointSet:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        self.parent.setdefault(item, item)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, first, second):
+        self.parent[self.find(first)] = self.find(second)
+
+
+def _groups(values: Dict[str, Hashable], buckets: Iterable[List[Hashable]], similar) -> List[List[str]]:
+    """Group files whose values are similar; only values sharing a bucket are compared.
+
+    Files with equal values are merged first, so each bucket holds distinct
+    values. Groups keep the order of values.
+    """
+    files_by_value: Dict[Hashable, List[str]] = {}
+    for path, value in values.items():
+        files_by_value.setdefault(value, []).append(path)
+    links = _DisjointSet()
+    for bucket in buckets:
+        for i, first in enumerate(bucket):
+            for second in bucket[i + 1:]:
+                if similar(first, second) and links.find(first) != links.find(second):
+                    links.union(first, second)
+    members: Dict[str, List[str]] = {}
+    for value, files in files_by_value.items():
+        members.setdefault(links.find(value), []).extend(files)
+    ordered = {path: position for position, path in enumerate(values)}
+    return [sorted(files, key=ordered.get) for files in members.values() if len(files) > 1]
+
+
+def _band_buckets(values: Iterable[Hashable], band_keys) -> Iterable[List[Hashable]]:
+    """LSH buckets: values sharing any band key, as given by band_keys(value)"""
+    buckets: Dict[Hashable, List[Hashable]] = {}
+    for value in values:
+        for key in band_keys(value):
+            buckets.setdefault(key, []).append(value)
+    return (bucket for bucket in buckets.values() if len(bucket) > 1)
+
+
+def similar_images(hashes: Dict[str, str], max_distance: int = DEFAULT_IMAGE_DISTANCE) -> List[List[str]]:
+    """Groups of images whose difference hashes differ in at most max_distance bits.
+
+    The hash is cut into max_distance + 1 bands: two hashes within the
+    distance agree completely on at least one band (pigeonhole), so bucketing
+    by band finds every similar pair.
+    """
+    values = {path: int(value, 16) for path, value in hashes.items()}
+    count = max_distance + 1
+    edges = [round(i * IMAGE_HASH_BITS / count) for i in range(count + 1)]
+    bands = [(number, edges[number], (1 << (edges[number + 1] - edges[number])) - 1) for number in range(count)]
+
+    def band_keys(value):
+        return [(number, (value >> shift) & mask) for number, shift, mask in bands]
+
+    buckets = _band_buckets(set(values.values()), band_keys)
+    return _groups(values, buckets, lambda a, b: bin(a ^ b).count('1') <= max_distance)
+
+
+def similar_texts(signatures: Dict[str, str], threshold: float = DEFAULT_TEXT_SIMILARITY) -> List[List[str]]:
+    """Groups of texts with estimated Jaccard similarity of at least threshold"""
+    width = SIGNATURE_SLOTS // LSH_BANDS * 16
+    bands = [(number, slice(number * width, (number + 1) * width)) for number in range(LSH_BANDS)]
+
+    def band_keys(value):
+        return [(number, value[band]) for number, band in bands]
+
+    buckets = _band_buckets(set(signatures.values()), band_keys)
+    return _groups(signatures, buckets, lambda a, b: signature_similarity(a, b) >= threshold)
@@ -0,0 +1,456 @@
+"""GUI-free settings, schedule and background-run logic of Desktop Organizer.
+
+Everything the scheduled `--background-run` check needs lives here, so that
+"Desctop organiser.py" can dispatch to it before PyQt5, the module system and
+the packaging code are imported. Heavy third-party modules (yaml, psutil) are
+imported on first use. This module must not import PyQt5.
+"""
+
+import atexit
+import builtins
+import copy
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from desktop_mover import (
+    DEFAULT_FILE_MANAGER_SETTINGS, DEFAULT_MOVER_SETTINGS, ARCHIVE_FOLDER_NAME,
+    engine_from_settings, format_progress, load_journal, find_incomplete_journals, resume_with_manifest
+)
+
+
+# --- Startup profiler ---
+
+class StartupProfiler:
+    """Import-time breakdown and startup milestones, enabled with --profile-startup"""
+
+    def __init__(self):
+        self.active = False
+        self.started = 0.0
+        self.imports: Dict[str, float] = {}
+        self.marks: List[Tuple[str, float]] = []
+        self._depth = 0
+        self._original_import = None
+        self._reported = False
+
+    def start(self, started: Optional[float] = None, preloaded: Optional[str] = None):
+        """Install the import hook; `preloaded` is charged for the time since `started`"""
+        if self.active:
+            return
+        self.active = True
+        now = time.perf_counter()
+        self.started = started if started is not None else now
+        if preloaded:
+            self.imports[preloaded] = now - self.started
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        atexit.register(self.report)
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only the outermost import is timed; nested imports are part of its cost
+        if self._depth or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            top = name.split('.')[0] if level == 0 else name or '<relative>'
+            self.imports[top] = self.imports.get(top, 0.0) + time.perf_counter() - start
+
+    def mark(self, label: str):
+        if self.active:
+            self.marks.append((label, time.perf_counter() - self.started))
+
+    def report(self, top: int = 25):
+        """Print the breakdown once; later calls are ignored"""
+        if not self.active or self._reported:
+            return
+        self._reported = True
+        builtins.__import__ = self._original_import
+        total = time.perf_counter() - self.started
+        imported = sum(self.imports.values())
+        print(f"⏱️ Профіль запуску: {total * 1000:.1f} ms, з них імпорти {imported * 1000:.1f} ms")
+        for name, seconds in sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:top]:
+            print(f"   {seconds * 1000:8.1f} ms  {name}")
+        for label, at in self.marks:
+            print(f"   @{at * 1000:7.1f} ms  {label}")
+
+
+startup_profiler = StartupProfiler()
+
+
+# --- Helper Functions for subprocess without console popup on Windows ---
+def run_subprocess_silent(command: list, **kwargs) -> subprocess.CompletedProcess:
+    """Run subprocess without showing console window on Windows"""
+    if platform.system() == "Windows":
+        from subprocess import STARTUPINFO, STARTF_USESHOWWINDOW, SW_HIDE
+
+        startupinfo = STARTUPINFO()
+        startupinfo.dwFlags |= STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = SW_HIDE
+        kwargs['startupinfo'] = startupinfo
+
+    return subprocess.run(command, **kwargs)
+
+def popen_subprocess_silent(command: list, **kwargs):
+    """Popen subprocess without showing console window on Windows"""
+    if platform.system() == "Windows":
+        from subprocess import STARTUPINFO, STARTF_USESHOWWINDOW, SW_HIDE
+
+        startupinfo = STARTUPINFO()
+        startupinfo.dwFlags |= STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = SW_HIDE
+        kwargs['startupinfo'] = startupinfo
+
+    return subprocess.Popen(command, **kwargs)
+
+
+# --- Configuration File Path ---
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".DesktopOrganizer")
+CONFIG_FILE = os.path.join(CONFIG_DIR, "config.yaml")
+LAST_RUN_FILE = os.path.join(CONFIG_DIR, "last_run.txt")
+os.makedirs(CONFIG_DIR, exist_ok=True)
+
+# --- Default Settings ---
+DEFAULT_SETTINGS = {
+    'application': {
+        'autostart_timer_enabled': True,
+        'notifications_enabled': True,
+        'minimize_to_tray': False,
+    },
+    'timer': {
+        'override_default_enabled': False,
+        'default_minutes': 3,
+    },
+    'drives': {
+        'main_drive_policy': 'D',
+    },
+    'file_manager': copy.deepcopy(DEFAULT_FILE_MANAGER_SETTINGS),
+    'mover': copy.deepcopy(DEFAULT_MOVER_SETTINGS),
+    'schedule': {
+        'type': 'disabled',  # 'вимкнено', 'щодня', 'щотижня', 'щомісяця', 'щокварталу'
+        'time_start': '15:00',
+        'time_end': '17:00',
+        'day_of_week': 1,  # 1=Понеділок, 7=Неділя
+        'day_of_month': 1,
+        'quarter_month': 1, # 1, 2, 3
+        'quarter_day': 1
+    }
+}
+
+
+def _merge_dicts(base, updates):
+    for key, value in updates.items():
+        if isinstance(value, dict) and key in base and isinstance(base[key], dict):
+            _merge_dicts(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+def load_settings():
+    import yaml
+    try:
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            loaded_settings = yaml.safe_load(f)
+            if loaded_settings:
+                merged = _merge_dicts(DEFAULT_SETTINGS.copy(), loaded_settings)
+                return merged
+            else:
+                return DEFAULT_SETTINGS.copy()
+    except FileNotFoundError:
+        print(f"Файл конфігурації не знайдено за шляхом {CONFIG_FILE}. Використовуються стандартні налаштування.")
+        return DEFAULT_SETTINGS.copy()
+    except yaml.YAMLError as e:
+        print(f"Помилка розбору файлу конфігурації {CONFIG_FILE}: {e}. Використовуються стандартні налаштування.")
+        return DEFAULT_SETTINGS.copy()
+    except Exception as e:
+        print(f"Неочікувана помилка завантаження конфігурації {CONFIG_FILE}: {e}. Використовуються стандартні налаштування.")
+        return DEFAULT_SETTINGS.copy()
+
+def save_settings(settings):
+    """Save settings to the configuration file"""
+    import yaml
+    try:
+        # Ensure the config directory exists
+        os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
+
+        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+            yaml.dump(settings, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+
+        print(f"✅ Settings saved to {CONFIG_FILE}")
+
+    except Exception as e:
+        print(f"❌ Error saving settings to {CONFIG_FILE}: {e}")
+
+def find_next_available_drive():
+    """Find the available drive with the most free space"""
+    try:
+        import shutil
+        import psutil
+
+        available_drives = []
+        drive_spaces = {}
+
+        partitions = psutil.disk_partitions(all=False)
+        for p in partitions:
+            if platform.system() == "Windows" and re.match("^[A-Z]:\\?$", p.mountpoint) and p.mountpoint[0] != 'C':
+                if p.fstype and 'cdrom' not in p.opts.lower():
+                     if 'removable' not in p.opts.lower():
+                         if os.path.exists(p.mountpoint):
+                              drive_letter = p.mountpoint[0]
+                              available_drives.append(drive_letter)
+
+                              # Get free space for this drive
+                              try:
+                                  usage = shutil.disk_usage(f"{drive_letter}:\\")
+                                  free_gb = usage.free // (1024**3)
+                                  drive_spaces[drive_letter] = free_gb
+                              except:
+                                  drive_spaces[drive_letter] = 0
+
+        if available_drives:
+            # Sort drives by free space (descending) and return the one with most space
+            sorted_drives = sorted(available_drives, key=lambda x: drive_spaces.get(x, 0), reverse=True)
+            best_drive = sorted_drives[0]
+            free_space = drive_spaces.get(best_drive, 0)
+            print(f"✅ Автовибір: {best_drive}: - Вільно: {free_space}GB (найбільше)")
+            return best_drive
+
+        return None
+    except Exception as e:
+        print(f"⚠️ Помилка визначення дисків: {e}. Використовується резервний варіант.")
+        return None
+
+def get_incomplete_run_journals(drives):
+    """Find journals of interrupted organise runs on the given drive letters"""
+    base_paths = []
+    for drive_letter in dict.fromkeys(drives):
+        if drive_letter:
+            base_paths.append(os.path.join(f"{drive_letter}:\\", ARCHIVE_FOLDER_NAME))
+    return find_incomplete_journals(base_paths)
+
+def is_scheduled_day(schedule_cfg):
+    now = datetime.now()
+    schedule_type = schedule_cfg.get('type', 'disabled')
+
+    if schedule_type == 'daily':
+        return True
+    elif schedule_type == 'weekly':
+        return now.isoweekday() == schedule_cfg.get('day_of_week', 1)
+    elif schedule_type == 'monthly':
+        target_day = schedule_cfg.get('day_of_month', 1)
+        # Get last day of current month
+        import calendar
+        last_day_of_month = calendar.monthrange(now.year, now.month)[1]
+        # If target day exceeds last day, run on last day of month
+        effective_day = min(target_day, last_day_of_month)
+        return now.day == effective_day
+    elif schedule_type == 'quarterly':
+        quarter_month = schedule_cfg.get('quarter_month', 1)  # 1=Jan,Apr,Jul,Oct / 2=Feb,May,Aug,Nov / 3=Mar,Jun,Sep,Dec
+        quarter_day = schedule_cfg.get('quarter_day', 1)
+
+        # Calculate which months match: quarter_month (1-3) in each quarter
+        # Q1: months 1,2,3  Q2: months 4,5,6  Q3: months 7,8,9  Q4: months 10,11,12
+        target_months = [quarter_month, quarter_month + 3, quarter_month + 6, quarter_month + 9]
+
+        if now.month not in target_months:
+            return False
+
+        # Get last day of current month
+        import calendar
+        last_day_of_month = calendar.monthrange(now.year, now.month)[1]
+        # If target day exceeds last day, run on last day of month
+        effective_day = min(quarter_day, last_day_of_month)
+        return now.day == effective_day
+    return False
+
+
+def was_scheduled_day(schedule_cfg, check_date):
+    """Check if a specific date was a scheduled day"""
+    schedule_type = schedule_cfg.get('type', 'disabled')
+
+    if schedule_type == 'daily':
+        return True
+    elif schedule_type == 'weekly':
+        # check_date is a date object, convert to check weekday
+        return check_date.isoweekday() == schedule_cfg.get('day_of_week', 1)
+    elif schedule_type == 'monthly':
+        target_day = schedule_cfg.get('day_of_month', 1)
+        import calendar
+        last_day_of_month = calendar.monthrange(check_date.year, check_date.month)[1]
+        effective_day = min(target_day, last_day_of_month)
+        return check_date.day == effective_day
+    elif schedule_type == 'quarterly':
+        quarter_month = schedule_cfg.get('quarter_month', 1)
+        quarter_day = schedule_cfg.get('quarter_day', 1)
+        target_months = [quarter_month, quarter_month + 3, quarter_month + 6, quarter_month + 9]
+
+        if check_date.month not in target_months:
+            return False
+
+        import calendar
+        last_day_of_month = calendar.monthrange(check_date.year, check_date.month)[1]
+        effective_day = min(quarter_day, last_day_of_month)
+        return check_date.day == effective_day
+    return False
+
+
+def _parse_schedule_time(value, default):
+    """'HH:MM' from the schedule settings as a datetime.time"""
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except (TypeError, ValueError):
+        return datetime.strptime(default, "%H:%M").time()
+
+
+# --- Background Task Runner ---
+class BackgroundTaskRunner:
+    """Scheduled check started with --background-run; runs without Qt"""
+
+    def __init__(self):
+        self.settings = load_settings()
+        self.selected_drive = 'C'
+        self.auto_configure_drive()
+
+    def log_message(self, message):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] {message}")
+
+    def load_last_run_date(self):
+        try:
+            with open(LAST_RUN_FILE, 'r') as f:
+                date_str = f.read().strip()
+                return datetime.strptime(date_str, '%Y-%m-%d').date()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save_last_run_date(self, date):
+        try:
+            with open(LAST_RUN_FILE, 'w') as f:
+                f.write(date.strftime('%Y-%m-%d'))
+        except Exception as e:
+            self.log_message(f"❌ Помилка збереження дати останнього запуску: {e}")
+
+    def auto_configure_drive(self):
+        policy = self.settings.get('drives', {}).get('main_drive_policy', 'D')
+        initial_drive = None
+        d_exists = os.path.exists("D:\\")
+        e_exists = os.path.exists("E:\\")
+
+        if policy == 'D' and d_exists:
+            initial_drive = 'D'
+        elif policy == 'auto':
+            detected_drive = find_next_available_drive()
+            if detected_drive:
+                initial_drive = detected_drive
+            elif d_exists:
+                self.log_message("ℹ️ Автовизначення не вдалося, використовується диск D:")
+                initial_drive = 'D'
+        elif policy == 'D' and not d_exists and e_exists:
+            self.log_message("ℹ️ Встановлено політику 'D', але диск D: не знайдено. Використовується диск E:")
+            initial_drive = 'E'
+        elif e_exists and not initial_drive:
+            self.log_message(f"ℹ️ Політика '{policy}' не спрацювала, використовується диск E:")
+            initial_drive = 'E'
+
+        if initial_drive:
+            self.selected_drive = initial_drive
+        else:
+            self.selected_drive = 'C'
+            if policy != 'C':
+                self.log_message("⚠️ Не знайдено відповідного диска. Використовується диск C:")
+        self.log_message(f"⚙️ Основний диск встановлено на: {self.selected_drive}:")
+
+    def recover_interrupted_runs(self):
+        """Synchronously finish organise runs that were interrupted, using their journals"""
+        journals = get_incomplete_run_journals([self.selected_drive, 'C'])
+        for journal_path in journals:
+            try:
+                state = load_journal(journal_path)
+                self.log_message(f"♻️ Відновлення незавершеного запуску: {state.dest} ({len(state.remaining)} елементів залишилось)")
+                engine = engine_from_settings(
+                    self.settings,
+                    lambda progress: self.log_message(format_progress(progress)) if progress.final else None,
+                )
+                with_hash = self.settings.get('mover', DEFAULT_SETTINGS['mover']).get('manifest_hash', False)
+                result = resume_with_manifest(
+                    state, engine, with_hash=with_hash,
+                    on_manifest_error=lambda e: self.log_message(f"⚠️ Не вдалося записати маніфест відновлення: {e}"))
+                self.log_message(f"✅ Відновлено: {result.moved}, помилок: {result.errors}")
+            except Exception as e:
+                self.log_message(f"❌ Помилка відновлення з журналу {journal_path}: {e}")
+        return len(journals)
+
+    def check_and_run(self):
+        # Interrupted runs are finished first, so they never get a second timestamped folder
+        self.recover_interrupted_runs()
+
+        schedule_cfg = self.settings.get('schedule', DEFAULT_SETTINGS['schedule'])
+        schedule_type = schedule_cfg.get('type', 'disabled')
+
+        if schedule_type == 'disabled':
+            self.log_message("ℹ️ Розклад вимкнено. Вихід.")
+            return False
+
+        now = datetime.now()
+        today = now.date()
+        last_run_date = self.load_last_run_date()
+
+        if not is_scheduled_day(schedule_cfg):
+            self.log_message("ℹ️ Не запланований день. Вихід.")
+            return False
+
+        if last_run_date == today:
+            self.log_message("ℹ️ Заплановане завдання вже виконано сьогодні. Вихід.")
+            return False
+
+        start_time = _parse_schedule_time(schedule_cfg.get('time_start'), '22:00')
+        end_time = _parse_schedule_time(schedule_cfg.get('time_end'), '23:00')
+        current_time = now.time()
+
+        run_now = False
+        if start_time <= current_time <= end_time:
+            import psutil
+            cpu_usage = psutil.cpu_percent(interval=1)
+            self.log_message(f"ℹ️ У вікні розкладу. ЦП: {cpu_usage}%.")
+            if cpu_usage < 15.0:
+                self.log_message("⏰ Низьке завантаження ЦП. Запуск запланованого завдання.")
+                run_now = True
+        elif current_time > end_time:
+            self.log_message("⚠️ Вікно розкладу пропущено. Запуск завдання зараз.")
+            run_now = True
+
+        if run_now:
+            self.launch_gui_app() # Call the new method to launch GUI
+            self.save_last_run_date(today)
+            return True
+        else:
+            self.log_message("ℹ️ Умови для запуску завдання зараз не виконані. Вихід.")
+            return False
+
+    def launch_gui_app(self):
+        self.log_message("🚀 Запуск графічного інтерфейсу для виконання запланованого завдання...")
+        try:
+            # The GUI script is the one this process was started with
+            script_path = os.path.abspath(sys.argv[0])
+
+            # Use sys.executable to ensure the same Python interpreter is used
+            # Pass a special argument to indicate it's a scheduled run
+            popen_subprocess_silent([sys.executable, script_path, '--scheduled-run'])
+        except Exception as e:
+            self.log_message(f"❌ Помилка запуску графічного інтерфейсу: {e}")
+
+
+def background_main() -> int:
+    """Entry point of --background-run: one scheduled check, then exit"""
+    runner = BackgroundTaskRunner()
+    runner.check_and_run()
+    startup_profiler.mark("background check finished")
+    return 0
@@ -0,0 +1,69 @@
+"""Rate-limited progress reporting shared by the worker threads.
+
+Workers call update() and add_item() as often as they like; the latest
+progress state is passed on at most rate_hz times per second, and items are
+delivered in batches together with it. finish() always delivers the final
+state. The callbacks are usually bound Qt signal emits, so every delivery is
+one cross-thread event instead of one per file.
+This module must not import PyQt5.
+"""
+
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+DEFAULT_PROGRESS_RATE_HZ = 10
+DEFAULT_ITEM_BATCH = 200  # items delivered at once even if the interval has not passed
+
+
+class ProgressReporter:
+    """Coalesces (percent, message) updates and batches found items"""
+
+    def __init__(self, on_progress: Callable[[int, str], None], rate_hz: float = DEFAULT_PROGRESS_RATE_HZ,
+                 on_items: Optional[Callable[[List[Any]], None]] = None, max_items: int = DEFAULT_ITEM_BATCH):
+        self.on_progress = on_progress
+        self.on_items = on_items
+        self.interval = 1.0 / rate_hz if rate_hz and rate_hz > 0 else 0.0
+        self.max_items = max(1, int(max_items))
+        self._lock = threading.Lock()
+        self._pending = None  # latest (percent, message) not delivered yet
+        self._last = (0, "")  # latest state seen, delivered or not
+        self._items: List[Any] = []
+        self._last_delivery = float('-inf')
+
+    def due(self) -> bool:
+        """True when the next update would be delivered; lets callers skip building messages"""
+        return time.monotonic() - self._last_delivery >= self.interval
+
+    def update(self, percent: int, message: str = ""):
+        with self._lock:
+            self._pending = self._last = (int(percent), message)
+        if self.due():
+            self.flush()
+
+    def add_item(self, item: Any):
+        with self._lock:
+            self._items.append(item)
+            full = len(self._items) >= self.max_items
+        if full or self.due():
+            self.flush()
+
+    def flush(self):
+        """Deliver pending items and the latest state now"""
+        with self._lock:
+            state, self._pending = self._pending, None
+            items, self._items = self._items, []
+            self._last_delivery = time.monotonic()
+        if items and self.on_items:
+            self.on_items(items)
+        if state is not None:
+            self.on_progress(*state)
+
+    def finish(self, percent: Optional[int] = None, message: Optional[str] = None):
+        """Deliver everything still pending; percent/message replace the final state when given"""
+        if percent is not None or message is not None:
+            with self._lock:
+                last_percent, last_message = self._last
+                self._pending = self._last = (last_percent if percent is None else int(percent),
+                                              last_message if message is None else message)
+        self.flush()